@@ -0,0 +1,50 @@
+import secrets
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncEngine
+from config import settings
+from db.sql import get_export_engine
+from services.exports import ARROW_STREAM_MEDIA_TYPE, require_pyarrow, stream_orders_arrow
+from utils.exceptions import ForbiddenException, ValidationException
+from utils.helpers import as_utc
+from utils.logger import logger
+
+async def require_admin_key(x_admin_key: Optional[str] = Header(None)):
+    if not settings.ADMIN_API_KEY or not secrets.compare_digest((x_admin_key or "").encode(), settings.ADMIN_API_KEY.encode()):
+        raise ForbiddenException("A valid X-Admin-Key header is required")
+
+router = APIRouter(dependencies=[Depends(require_admin_key)])
+
+@router.get("/exports/orders")
+async def handle_export_orders(
+    export_engine: AsyncEngine=Depends(get_export_engine),
+    start: datetime = Query(..., description="First order creation time; UTC when it has no offset"),
+    end: datetime = Query(..., description="Exclusive end of the creation time range; UTC when it has no offset"),
+    after_id: int = Query(0, ge=0, description="Resume after this order id"),
+    chunk_size: int = Query(settings.EXPORT_CHUNK_SIZE, ge=1, le=100_000, description="Order items per record batch"),
+):
+    """Items of the orders created in [start, end) as a zstd-compressed Arrow IPC stream, ordered by order id.
+
+    Read from the replica when DB_REPLICA_URL is set. Batches never split an
+    order, so after an interrupted download pass the last complete batch's
+    highest order_id back as `after_id`.
+    """
+    start, end = as_utc(start), as_utc(end)
+    if end <= start:
+        raise ValidationException(message="end must be after start")
+    require_pyarrow()
+
+    async def stream():
+        try:
+            # A connection of its own: request-scoped sessions are closed before a streamed body is sent
+            async with export_engine.connect() as conn:
+                async for data in stream_orders_arrow(conn, start, end, after_id=after_id, chunk_size=chunk_size):
+                    yield data
+        except Exception as e:
+            # The status line is already sent; the client sees a truncated stream
+            logger.error("Exception in order export stream ==> %s", e)
+            raise
+
+    return StreamingResponse(stream(), media_type=ARROW_STREAM_MEDIA_TYPE)
@@ -0,0 +1,100 @@
+from fastapi import APIRouter, Depends, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from db.cart_store import CartStore, get_cart_store
+from db.sql import get_session
+from models.carts import CartCreate, CartItemUpdate, CartRead
+from models.orders import OrderItemCreate
+from models.products import OrderWithProductRead
+from services.carts import checkout_cart, create_cart, delete_cart, get_cart, update_cart_item
+from api.v1.routes.orders import order_writers
+from utils.exceptions import BaseAppException, ResourceNotFoundException, ValidationException
+
+router = APIRouter()
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=CartRead)
+async def handle_create_cart(
+    cart_data: CartCreate,
+    session: AsyncSession=Depends(get_session),
+    store: CartStore=Depends(get_cart_store)
+):
+    try:
+        return await create_cart(session, store, order_items=cart_data.items)
+    except ValidationException as e:
+        raise
+    except Exception as e:
+        raise BaseAppException("Could not create the cart. Please try again later.") from e
+
+@router.get("/{cart_id}", response_model=CartRead)
+async def handle_get_cart(cart_id: str, session: AsyncSession=Depends(get_session), store: CartStore=Depends(get_cart_store)):
+    """The cart repriced with current prices and stock."""
+    try:
+        return await get_cart(session, store, cart_id=cart_id)
+    except ResourceNotFoundException as e:
+        raise
+    except Exception as e:
+        raise BaseAppException("Could not get the cart. Please try again later.") from e
+
+@router.post("/{cart_id}/items", response_model=CartRead)
+async def handle_add_cart_item(
+    cart_id: str,
+    item: OrderItemCreate,
+    session: AsyncSession=Depends(get_session),
+    store: CartStore=Depends(get_cart_store)
+):
+    try:
+        return await update_cart_item(session, store, cart_id=cart_id, product_id=item.product_id, quantity=item.quantity, add=True)
+    except (ValidationException, ResourceNotFoundException) as e:
+        raise
+    except Exception as e:
+        raise BaseAppException("Could not update the cart. Please try again later.") from e
+
+@router.put("/{cart_id}/items/{product_id}", response_model=CartRead)
+async def handle_set_cart_item(
+    cart_id: str,
+    product_id: int,
+    item: CartItemUpdate,
+    session: AsyncSession=Depends(get_session),
+    store: CartStore=Depends(get_cart_store)
+):
+    try:
+        return await update_cart_item(session, store, cart_id=cart_id, product_id=product_id, quantity=item.quantity, add=False)
+    except (ValidationException, ResourceNotFoundException) as e:
+        raise
+    except Exception as e:
+        raise BaseAppException("Could not update the cart. Please try again later.") from e
+
+@router.delete("/{cart_id}/items/{product_id}", response_model=CartRead)
+async def handle_remove_cart_item(
+    cart_id: str,
+    product_id: int,
+    session: AsyncSession=Depends(get_session),
+    store: CartStore=Depends(get_cart_store)
+):
+    try:
+        return await update_cart_item(session, store, cart_id=cart_id, product_id=product_id, quantity=0, add=False)
+    except (ValidationException, ResourceNotFoundException) as e:
+        raise
+    except Exception as e:
+        raise BaseAppException("Could not update the cart. Please try again later.") from e
+
+@router.delete("/{cart_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def handle_delete_cart(cart_id: str, store: CartStore=Depends(get_cart_store)):
+    try:
+        await delete_cart(store, cart_id=cart_id)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except ResourceNotFoundException as e:
+        raise
+    except Exception as e:
+        raise BaseAppException("Could not delete the cart. Please try again later.") from e
+
+@router.post("/{cart_id}/checkout", status_code=status.HTTP_201_CREATED, response_model=OrderWithProductRead)
+async def handle_checkout_cart(cart_id: str, session: AsyncSession=Depends(get_session), store: CartStore=Depends(get_cart_store)):
+    """Place the cart as an order; on success the cart is deleted."""
+    try:
+        return await checkout_cart(session, store, cart_id=cart_id, create_order=order_writers[settings.ORDER_WRITE_PATH])
+    except (ValidationException, ResourceNotFoundException) as e:
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise BaseAppException("Could not create the order. Please try again later.") from e
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from db.sql import get_session
+from models.events import ChangeFeedResponse
+from services.changes import read_changes, wait_for_changes
+from utils.exceptions import BaseAppException
+from utils.logger import logger
+
+router = APIRouter()
+
+@router.get("/", response_model=ChangeFeedResponse)
+async def handle_get_changes(
+    session: AsyncSession=Depends(get_session),
+    after: int = Query(0, ge=0, description="Resume after this sequence number"),
+    limit: int = Query(settings.CHANGE_FEED_BATCH_SIZE, ge=1, le=5000),
+    wait: float = Query(0, ge=0, le=settings.CHANGE_FEED_MAX_WAIT, description="Long-poll for up to this many seconds"),
+):
+    try:
+        return await wait_for_changes(session, after=after, limit=limit, wait=wait, poll_interval=settings.CHANGE_FEED_POLL_INTERVAL)
+    except Exception as e:
+        raise BaseAppException("Could not get the changes. Please try again later.") from e
+
+def format_sse(event: dict, sequence: Optional[int]) -> str:
+    # Only the last event of a batch carries an id, so a reconnecting client
+    # (Last-Event-ID) resumes on a batch boundary and never skips a merged delta
+    lines = [f"event: {event['event_type']}"]
+    if sequence is not None:
+        lines.append(f"id: {sequence}")
+    lines.append(f"data: {json.dumps(jsonable_encoder(event))}")
+    return "\n".join(lines) + "\n\n"
+
+@router.get("/stream")
+async def handle_stream_changes(
+    request: Request,
+    session: AsyncSession=Depends(get_session),
+    after: Optional[int] = Query(None, ge=0, description="Resume after this sequence number"),
+    last_event_id: Optional[int] = Header(None),
+    limit: int = Query(settings.CHANGE_FEED_BATCH_SIZE, ge=1, le=5000),
+):
+    cursor = after if after is not None else last_event_id or 0
+
+    async def stream():
+        nonlocal cursor
+        last_sent_at = time.monotonic()
+        try:
+            while not await request.is_disconnected():
+                changes = await read_changes(session, after=cursor, limit=limit)
+                await session.rollback()
+
+                events = changes["events"]
+                for index, event in enumerate(events):
+                    yield format_sse(event, changes["next_sequence"] if index == len(events) - 1 else None)
+                cursor = changes["next_sequence"]
+
+                if events:
+                    last_sent_at = time.monotonic()
+                    continue
+                if time.monotonic() - last_sent_at >= settings.CHANGE_FEED_HEARTBEAT_INTERVAL:
+                    yield ": keep-alive\n\n"
+                    last_sent_at = time.monotonic()
+                await asyncio.sleep(settings.CHANGE_FEED_POLL_INTERVAL)
+        except Exception as e:
+            logger.error("Exception in handle_stream_changes ==> %s", e)
+        finally:
+            # The request's session outlives the dependency for streamed responses
+            await session.close()
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
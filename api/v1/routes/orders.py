@@ -1,17 +1,23 @@
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
 from db.sql import get_session
 from models.orders import OrderCreate
 from models.products import OrderWithProductRead
-from services.orders import create_order
+from services.orders import create_order, create_order_cte
 from utils.exceptions import BaseAppException, ValidationException
 
 router = APIRouter()
 
+order_writers = {
+    "orm": create_order,
+    "cte": create_order_cte,
+}
+
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=OrderWithProductRead)
 async def handle_create_order(order_data: OrderCreate, session: AsyncSession=Depends(get_session)):
     try:
-        return await create_order(session, order_data=order_data)
+        return await order_writers[settings.ORDER_WRITE_PATH](session, order_data=order_data)
     except ValidationException as e:
         raise
     except Exception as e:
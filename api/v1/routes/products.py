@@ -1,11 +1,14 @@
-from typing import Optional
+from decimal import Decimal
+from typing import List, Optional
 from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.sql import get_session
 from models.common import PaginationResponse
-from models.products import ProductCreate, ProductRead
-from services.products import get_products, create_product
-from utils.exceptions import BaseAppException, ValidationException
+from models.products import ProductCreate, ProductRead, ProductUpdate, ProductDetailRead, ProductAdjustmentRequest, ProductAdjustmentResponse, ProductFacetsRead
+from models.stock_alerts import LowStockProductRead, StockAlertRead
+from services.products import get_products, get_product_facets, create_product, update_product, adjust_products
+from services.stock_alerts import get_low_stock_products, get_stock_alerts
+from utils.exceptions import BaseAppException, ConflictException, ResourceNotFoundException, ValidationException
 from utils.logger import logger
 
 
@@ -17,19 +20,86 @@ async def handle_get_products(
     query: Optional[str] = Query(default=""),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=101),
-    sort_by: Optional[str] = Query(None)
+    sort_by: Optional[str] = Query(None),
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    in_stock: bool = Query(False),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces page")
 ):
     try:
-        return await get_products(session, query=query, page=page, page_size=page_size, sort_by=sort_by)
+        return await get_products(
+            session, query=query, page=page, page_size=page_size, sort_by=sort_by,
+            min_price=min_price, max_price=max_price, in_stock=in_stock, cursor=cursor,
+        )
     except ValidationException as e:
         raise
     except Exception as e:
         raise BaseAppException("Could not get the products. Please try again later.") from e
 
+@router.get("/facets", response_model=ProductFacetsRead)
+async def handle_get_product_facets(
+    session: AsyncSession=Depends(get_session),
+    query: Optional[str] = Query(default=""),
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    in_stock: bool = Query(False)
+):
+    """Price bucket and in-stock counts for the listing filters, from one grouped query."""
+    try:
+        return await get_product_facets(session, query=query, min_price=min_price, max_price=max_price, in_stock=in_stock)
+    except ValidationException as e:
+        raise
+    except Exception as e:
+        raise BaseAppException("Could not get the product facets. Please try again later.") from e
+
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=ProductRead)
 async def handle_create_product(product_data: ProductCreate, session: AsyncSession=Depends(get_session)):
     try:
         return await create_product(session, product_data=product_data)
     except Exception as e:
-        logger.error(f"ERRRORR  ==> {type(e)=}")
-        raise BaseAppException("Could not create the product. Please try again later.") from e
\ No newline at end of file
+        logger.error("Exception in handle_create_product ==> %r", type(e))
+        raise BaseAppException("Could not create the product. Please try again later.") from e
+
+@router.get("/low-stock", response_model=PaginationResponse[LowStockProductRead])
+async def handle_get_low_stock_products(
+    session: AsyncSession=Depends(get_session),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500)
+):
+    """Replenishment report: products at or below their low-stock threshold, lowest stock first."""
+    try:
+        return await get_low_stock_products(session, page=page, page_size=page_size)
+    except Exception as e:
+        raise BaseAppException("Could not get the low stock products. Please try again later.") from e
+
+@router.get("/stock-alerts", response_model=List[StockAlertRead])
+async def handle_get_stock_alerts(
+    session: AsyncSession=Depends(get_session),
+    after_id: int = Query(0, ge=0, description="Best effort: alerts committing out of id order can be skipped; use the change feed to see every alert"),
+    limit: int = Query(100, ge=1, le=1000),
+    product_id: Optional[int] = Query(None)
+):
+    """Recent stock alerts in id order. To consume every alert, read `stock_alert.created` from GET /api/v1/changes/."""
+    try:
+        return await get_stock_alerts(session, after_id=after_id, limit=limit, product_id=product_id)
+    except Exception as e:
+        raise BaseAppException("Could not get the stock alerts. Please try again later.") from e
+
+@router.post("/adjustments", response_model=ProductAdjustmentResponse)
+async def handle_adjust_products(adjustment_data: ProductAdjustmentRequest, session: AsyncSession=Depends(get_session)):
+    """Bulk price/stock changes; pass each item's expected_updated_at to reject concurrent edits with a 409."""
+    try:
+        return await adjust_products(session, adjustments=adjustment_data.items)
+    except (ValidationException, ConflictException):
+        raise
+    except Exception as e:
+        raise BaseAppException("Could not adjust the products. Please try again later.") from e
+
+@router.patch("/{product_id}", response_model=ProductDetailRead)
+async def handle_update_product(product_id: int, product_data: ProductUpdate, session: AsyncSession=Depends(get_session)):
+    try:
+        return await update_product(session, product_id=product_id, product_data=product_data)
+    except (ValidationException, ResourceNotFoundException, ConflictException):
+        raise
+    except Exception as e:
+        raise BaseAppException("Could not update the product. Please try again later.") from e
@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from random import sample
+from typing import Awaitable, Callable, Dict, List
+
+# Admission control stays on, but one benchmark client must not be rate limited
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from httpx import ASGITransport, AsyncClient
+from config import settings
+from utils.helpers import get_percentile
+
+class GcMonitor:
+    """Counts garbage collections per generation and the time spent in them."""
+
+    def __init__(self):
+        self.collections = [0, 0, 0]
+        self.pause_seconds = 0.0
+        self._started_at = None
+
+    def __call__(self, phase: str, info: Dict):
+        if phase == "start":
+            self._started_at = time.perf_counter()
+        elif self._started_at is not None:
+            self.collections[info["generation"]] += 1
+            self.pause_seconds += time.perf_counter() - self._started_at
+            self._started_at = None
+
+    def __enter__(self):
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self)
+
+def reset_peak():
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:  # Python 3.8
+        tracemalloc.clear_traces()
+
+async def measure(send: Callable[[], Awaitable], n: int) -> Dict[str, float]:
+    """Allocation profile of `n` sequential requests made by `send`.
+
+    Peak is the most memory traced at once during a request, above what was
+    allocated before it started; retained is what is still allocated after
+    all `n` requests. GC counts and pauses are per 1,000 requests, so runs of
+    different lengths compare.
+    """
+    gc.collect()
+    peaks: List[int] = []
+    tracemalloc.start()
+    try:
+        start_memory = tracemalloc.get_traced_memory()[0]
+        with GcMonitor() as monitor:
+            for _ in range(n):
+                reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                response = await send()
+                response.raise_for_status()
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        retained = tracemalloc.get_traced_memory()[0] - start_memory
+    finally:
+        tracemalloc.stop()
+
+    peaks.sort()
+    return {
+        "peak_kib_p50": get_percentile(peaks, 50) / 1024,
+        "peak_kib_p99": get_percentile(peaks, 99) / 1024,
+        "retained_kib": retained / 1024,
+        "gen0_per_1k": monitor.collections[0] * 1000 / n,
+        "gen2_per_1k": monitor.collections[2] * 1000 / n,
+        "gc_ms_per_1k": monitor.pause_seconds * 1000 * 1000 / n,
+    }
+
+def print_report(name: str, result: Dict[str, float]):
+    print(
+        f"{name:>14}: peak p50 {result['peak_kib_p50']:7.1f} KiB | p99 {result['peak_kib_p99']:7.1f} KiB | "
+        f"retained {result['retained_kib']:7.1f} KiB | "
+        f"GC per 1k requests: gen0 {result['gen0_per_1k']:6.1f}, gen2 {result['gen2_per_1k']:4.1f}, "
+        f"{result['gc_ms_per_1k']:6.1f} ms"
+    )
+
+async def benchmark(n_requests: int, page_size: int, items_per_order: int, n_products: int, endpoints: List[str], budget_kib: float) -> bool:
+    # Imported here so RATE_LIMIT_ENABLED above applies to the app's settings
+    from main import app
+    from db.sql import engine
+    from benchmarks.order_create import cleanup, create_benchmark_products
+
+    product_ids = await create_benchmark_products(n_products, stock=n_requests * 2 * len(endpoints) + 1)
+    order_ids: List[int] = []
+    within_budget = True
+
+    async def place_order():
+        items = [{"product_id": product_id, "quantity": 1} for product_id in sample(product_ids, items_per_order)]
+        response = await client.post("/orders/", json={"items": items})
+        order_ids.append(response.json()["id"])
+        return response
+
+    def list_products():
+        return client.get("/products/", params={"page_size": page_size, "sort_by": "-price"})
+
+    def order_sender(write_path: str):
+        async def send():
+            settings.ORDER_WRITE_PATH = write_path
+            return await place_order()
+        return send
+
+    senders = {
+        "orders-orm": order_sender("orm"),
+        "orders-cte": order_sender("cte"),
+        "products": list_products,
+    }
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark/api/v1") as client:
+            print(f"{n_requests} requests per endpoint, {items_per_order} items per order, {page_size} products per page")
+            for name in endpoints:
+                # Warm up the pool, statement caches and lazily built schemas before measuring
+                for _ in range(min(n_requests, 20)):
+                    await senders[name]()
+            for name in endpoints:
+                result = await measure(senders[name], n_requests)
+                print_report(name, result)
+                if budget_kib and result["peak_kib_p50"] > budget_kib:
+                    print(f"{name}: median peak {result['peak_kib_p50']:.1f} KiB exceeds the {budget_kib:.0f} KiB budget")
+                    within_budget = False
+    finally:
+        await cleanup(product_ids, order_ids)
+        await engine.dispose()
+    return within_budget
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Per-request allocations, peak memory and GC activity of the order and listing endpoints")
+    parser.add_argument("-n", type=int, default=1000, help="Requests per endpoint")
+    parser.add_argument("--page-size", type=int, default=50, help="Products per listing page")
+    parser.add_argument("--items", type=int, default=5, help="Items per order")
+    parser.add_argument("--products", type=int, default=200, help="Number of products to spread orders over")
+    parser.add_argument("--endpoints", nargs="+", choices=["orders-orm", "orders-cte", "products"], default=["orders-orm", "orders-cte", "products"])
+    parser.add_argument("--budget-kib", type=float, default=0, help="Fail when an endpoint's median peak exceeds this (0 = no budget)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    ok = asyncio.run(benchmark(args.n, args.page_size, args.items, args.products, args.endpoints, args.budget_kib))
+    sys.exit(0 if ok else 1)
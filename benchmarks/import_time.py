@@ -0,0 +1,120 @@
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import sysconfig
+from typing import Dict, List, NamedTuple, Set
+
+# Heavy or optional modules that must only be imported on first use
+LAZY_MODULES = ("faker", "brotli", "zstandard", "pyarrow")
+
+# Installed packages `import main` is known to load; a new one is a startup regression until added here
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "startup_packages.txt")
+
+# Backports of newer stdlib modules that dependencies import on older Pythons only
+BACKPORTS = ("async_timeout", "exceptiongroup", "importlib_metadata", "importlib_resources", "zipp")
+
+class ImportProfile(NamedTuple):
+    total_us: int
+    self_us: Dict[str, int]
+    modules: List[str]
+
+def profile_imports(module: str = "main") -> ImportProfile:
+    """Import `module` in a fresh interpreter with -X importtime and parse its report."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+
+    self_us: Dict[str, int] = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        self_us[name] = int(self_time)
+        if name == module:
+            total_us = int(cumulative)
+
+    return ImportProfile(total_us=total_us, self_us=self_us, modules=list(self_us))
+
+def eagerly_imported_lazy_modules(profile: ImportProfile) -> List[str]:
+    return sorted({name.split(".")[0] for name in profile.modules if name.split(".")[0] in LAZY_MODULES})
+
+def _is_installed(package: str) -> bool:
+    """Whether `package` resolves to site-packages; failed optional imports and the stdlib do not."""
+    try:
+        spec = importlib.util.find_spec(package)
+    except (ImportError, ValueError):
+        return False
+    if spec is None:
+        return False
+    locations = [spec.origin] if spec.origin else list(spec.submodule_search_locations or [])
+    site_dirs = tuple({sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"]})
+    return any(os.path.abspath(location).startswith(site_dirs) for location in locations)
+
+def installed_packages(profile: ImportProfile) -> List[str]:
+    """Top-level site-packages imported by the profiled module, leaving out what the bare interpreter loads."""
+    interpreter = profile_imports("sys").modules
+    packages = {name.split(".")[0] for name in profile.modules} - {name.split(".")[0] for name in interpreter}
+    return sorted(package for package in packages if package not in BACKPORTS and _is_installed(package))
+
+def load_baseline(path: str = BASELINE_PATH) -> Set[str]:
+    with open(path) as f:
+        return {line.strip() for line in f if line.strip() and not line.startswith("#")}
+
+def save_baseline(packages: List[str], path: str = BASELINE_PATH):
+    with open(path, "w") as f:
+        f.write("# Installed packages imported by `import main`; regenerate with\n")
+        f.write("# python3 -m benchmarks.import_time --update-baseline\n")
+        f.writelines(f"{package}\n" for package in packages)
+
+def packages_beyond_baseline(profile: ImportProfile, baseline: Set[str]) -> List[str]:
+    return [package for package in installed_packages(profile) if package not in baseline]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Profile the import (cold start) time of the API process")
+    parser.add_argument("-n", type=int, default=5, help="Number of fresh interpreter runs")
+    parser.add_argument("--module", type=str, default="main", help="Module to import")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when the median import time exceeds this")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the installed packages imported at startup as the baseline")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    profiles = [profile_imports(args.module) for _ in range(args.n)]
+    totals_ms = [p.total_us / 1000 for p in profiles]
+    median_ms = statistics.median(totals_ms)
+
+    print(f"import {args.module}: median {median_ms:.1f} ms, min {min(totals_ms):.1f} ms, max {max(totals_ms):.1f} ms over {args.n} runs")
+
+    slowest = sorted(profiles[-1].self_us.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    print(f"\nTop {args.top} modules by self time (last run):")
+    for name, self_time in slowest:
+        print(f"  {self_time / 1000:8.1f} ms  {name}")
+
+    if args.update_baseline:
+        save_baseline(installed_packages(profiles[-1]))
+        print(f"\nBaseline written to {BASELINE_PATH}")
+
+    failures = []
+    new_packages = packages_beyond_baseline(profiles[-1], load_baseline())
+    if new_packages:
+        failures.append(f"packages imported at startup beyond the baseline: {', '.join(new_packages)}")
+    eager = eagerly_imported_lazy_modules(profiles[-1])
+    if eager:
+        failures.append(f"lazy modules imported at startup: {', '.join(eager)}")
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.1f} ms exceeds budget of {args.budget_ms:.1f} ms")
+
+    for failure in failures:
+        print(f"\nREGRESSION: {failure}")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+from random import sample
+from typing import List
+from sqlmodel import delete, insert
+from db.sql import async_session, engine
+from models.orders import Order, OrderCreate, OrderItemCreate
+from models.products import Product
+from services.orders import create_order, create_order_cte
+from utils.helpers import get_current_timestamp, get_percentile
+
+WRITERS = {
+    "orm": create_order,
+    "cte": create_order_cte,
+}
+
+async def create_benchmark_products(n: int, stock: int) -> List[int]:
+    now = get_current_timestamp()
+    async with async_session() as session:
+        results = await session.execute(
+            insert(Product).returning(Product.id),
+            [
+                {"name": f"Benchmark Product {i + 1}", "description": "benchmark", "price": Decimal("9.99"), "stock": stock, "updated_at": now}
+                for i in range(n)
+            ],
+        )
+        product_ids = list(results.scalars())
+        await session.commit()
+    return product_ids
+
+async def cleanup(product_ids: List[int], order_ids: List[int]):
+    async with async_session() as session:
+        await session.execute(delete(Order).where(Order.id.in_(order_ids)))
+        await session.execute(delete(Product).where(Product.id.in_(product_ids)))
+        await session.commit()
+
+async def run_writer(name: str, product_ids: List[int], n_orders: int, concurrency: int, items_per_order: int, report: bool = True):
+    writer = WRITERS[name]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    order_ids: List[int] = []
+
+    async def place_order():
+        items = [OrderItemCreate(product_id=product_id, quantity=1) for product_id in sample(product_ids, items_per_order)]
+        async with semaphore, async_session() as session:
+            started_at = time.perf_counter()
+            created_order = await writer(session, order_data=OrderCreate(items=items))
+            latencies.append(time.perf_counter() - started_at)
+            order_ids.append(created_order["id"])
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(place_order() for _ in range(n_orders)))
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    if report:
+        print(
+            f"{name:>4}: {n_orders / elapsed:8.1f} orders/s | "
+            f"p50 {get_percentile(latencies, 50) * 1000:6.2f} ms | "
+            f"p95 {get_percentile(latencies, 95) * 1000:6.2f} ms | "
+            f"p99 {get_percentile(latencies, 99) * 1000:6.2f} ms"
+        )
+    return order_ids
+
+async def benchmark(n_orders: int, concurrency: int, items_per_order: int, n_products: int, writers: List[str]):
+    product_ids = await create_benchmark_products(n_products, stock=n_orders * len(writers) + 1)
+    order_ids: List[int] = []
+    try:
+        print(f"{n_orders} orders of {items_per_order} items, concurrency {concurrency}, {n_products} products")
+        for name in writers:
+            # Warm up the pool and statement caches before measuring
+            order_ids += await run_writer(name, product_ids, min(n_orders, concurrency), concurrency, items_per_order, report=False)
+        for name in writers:
+            order_ids += await run_writer(name, product_ids, n_orders, concurrency, items_per_order)
+    finally:
+        await cleanup(product_ids, order_ids)
+        await engine.dispose()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare the ORM and single-statement (CTE) order write paths")
+    parser.add_argument("-n", type=int, default=500, help="Number of orders per write path")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Concurrent orders in flight")
+    parser.add_argument("--items", type=int, default=3, help="Items per order")
+    parser.add_argument("--products", type=int, default=200, help="Number of products to spread orders over")
+    parser.add_argument("--writers", nargs="+", choices=list(WRITERS), default=list(WRITERS), help="Write paths to run")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(benchmark(args.n, args.concurrency, args.items, args.products, args.writers))
@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+from random import randint
+from typing import List
+from sqlmodel import delete, func, select, update
+from db.sql import async_session, engine
+from models.events import ChangeEvent, EntityType
+from models.products import Product, ProductAdjustment
+from services.changes import product_changed_event, record_events
+from services.products import adjust_products
+from services.stock_alerts import crossed_low_stock_threshold, record_stock_alerts
+from benchmarks.order_create import create_benchmark_products
+from utils.helpers import get_percentile
+
+def build_adjustments(product_ids: List[int]) -> List[ProductAdjustment]:
+    return [
+        ProductAdjustment(id=product_id, price=Decimal(randint(100, 10000)) / 100, stock_delta=randint(1, 10))
+        for product_id in product_ids
+    ]
+
+async def adjust_set_based(adjustments: List[ProductAdjustment]):
+    async with async_session() as session:
+        await adjust_products(session, adjustments)
+
+async def adjust_per_row(adjustments: List[ProductAdjustment]):
+    # The same work as adjust_products, done the way update_product does it for
+    # one product: per row a locking read and an UPDATE ... RETURNING, then the
+    # change events and any stock alerts, all in one transaction
+    async with async_session() as session:
+        events = []
+        for a in adjustments:
+            current = (await session.execute(
+                select(Product.stock, Product.low_stock_threshold).where(Product.id == a.id).with_for_update()
+            )).one()
+            stmt = (
+                update(Product)
+                .where(Product.id == a.id)
+                .values(price=a.price, stock=Product.stock + a.stock_delta, updated_at=func.clock_timestamp())
+                .returning(Product.stock, Product.low_stock_threshold)
+            )
+            product = (await session.execute(stmt.execution_options(synchronize_session=False))).one()
+            events.append(product_changed_event(a.id, price=a.price, stock=product.stock))
+            if crossed_low_stock_threshold(current.stock, product.stock, product.low_stock_threshold):
+                events += await record_stock_alerts(session, [{
+                    "product_id": a.id,
+                    "order_id": None,
+                    "stock": product.stock,
+                    "low_stock_threshold": product.low_stock_threshold,
+                }])
+        await record_events(session, events)
+        await session.commit()
+
+STRATEGIES = {
+    "set": adjust_set_based,
+    "per-row": adjust_per_row,
+}
+
+async def benchmark(n_rows: int, repeat: int, strategies: List[str]):
+    product_ids = await create_benchmark_products(n_rows, stock=0)
+    try:
+        print(f"{n_rows} adjustments per run, {repeat} runs")
+        for name in strategies:
+            # Warm up the pool and statement caches before measuring
+            await STRATEGIES[name](build_adjustments(product_ids))
+            timings = []
+            for _ in range(repeat):
+                adjustments = build_adjustments(product_ids)
+                started_at = time.perf_counter()
+                await STRATEGIES[name](adjustments)
+                timings.append(time.perf_counter() - started_at)
+            timings.sort()
+            print(
+                f"{name:>7}: p50 {get_percentile(timings, 50) * 1000:8.1f} ms | "
+                f"max {timings[-1] * 1000:8.1f} ms | "
+                f"{n_rows / get_percentile(timings, 50):10.0f} rows/s"
+            )
+    finally:
+        async with async_session() as session:
+            await session.execute(delete(ChangeEvent).where(ChangeEvent.entity_type == EntityType.PRODUCT, ChangeEvent.entity_id.in_(product_ids)))
+            await session.execute(delete(Product).where(Product.id.in_(product_ids)))
+            await session.commit()
+        await engine.dispose()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time bulk product price/stock adjustments")
+    parser.add_argument("-n", type=int, default=10_000, help="Products adjusted per run")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Measured runs per strategy")
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES), help="Strategies to run")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(benchmark(args.n, args.repeat, args.strategies))
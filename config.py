@@ -1,7 +1,11 @@
+from decimal import Decimal
+from typing import Dict, List, Literal
+from pydantic import field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     APP_NAME: str = "FastCart API"
+    APP_ENV: str = "development"
     DEBUG_MODE: bool = False
     CORS_ORIGINS: str = "http://localhost:5173"
     DB_HOST: str = "localhost"
@@ -10,6 +14,82 @@ class Settings(BaseSettings):
     DB_USER: str = "postgres"
     DB_PASSWORD: str = "postgres"
     DB_URL: str = ""
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 5
+    # Postgres statement/lock timeouts in milliseconds (0 = none), overridable per route
+    DB_STATEMENT_TIMEOUT: int = 0
+    DB_LOCK_TIMEOUT: int = 0
+    DB_ROUTE_STATEMENT_TIMEOUTS: Dict[str, int] = {"GET /api/v1/products": 3000, "POST /api/v1/orders": 5000}
+    DB_ROUTE_LOCK_TIMEOUTS: Dict[str, int] = {"POST /api/v1/orders": 1000, "PATCH /api/v1/products": 1000}
+    DB_CANCEL_ON_DISCONNECT: bool = True  # cancel the handler and its query when the client goes away
+    DB_REPLICA_URL: str = ""  # optional; its replication lag is reported by /ready
+
+    # Before /ready reports ready, open and prime this many pool connections, for at most WARMUP_BUDGET seconds
+    WARMUP_CONNECTIONS: int = 2
+    WARMUP_BUDGET: float = 10
+    READY_CHECK_TIMEOUT: float = 1
+
+    ORDER_WRITE_PATH: Literal["orm", "cte"] = "orm"  # cte: single round-trip statement
+
+    PRODUCT_ADJUSTMENT_MAX_ITEMS: int = 10000  # per bulk price/stock adjustment request
+    PRODUCT_PRICE_FACET_BOUNDARIES: List[Decimal] = [Decimal(10), Decimal(25), Decimal(50), Decimal(100), Decimal(250), Decimal(500)]
+
+    # Admin endpoints (X-Admin-Key header) are disabled while this is empty
+    ADMIN_API_KEY: str = ""
+    EXPORT_CHUNK_SIZE: int = 10000  # order items per record batch of an export stream
+
+    CART_STORE_BACKEND: Literal["memory", "redis"] = "memory"  # memory is per process
+    CART_REDIS_URL: str = "redis://localhost:6379/1"
+    CART_TTL: int = 7 * 24 * 3600  # seconds a cart is kept after its last use
+    CART_MAX_ITEMS: int = 100  # distinct products per cart
+    CART_MAX_CARTS: int = 100_000  # per process with the memory backend
+
+    # Monthly order/orderitem partitions are created this many months ahead
+    PARTITION_MONTHS_AHEAD: int = 3
+    PARTITION_ENSURE_ON_STARTUP: bool = True
+    PARTITION_MAINTENANCE_INTERVAL: float = 3600  # seconds between checks in each worker (0 = never)
+
+    CHANGE_FEED_BATCH_SIZE: int = 500
+    CHANGE_FEED_MAX_WAIT: float = 30  # longest long-poll, in seconds
+    CHANGE_FEED_POLL_INTERVAL: float = 0.5
+    CHANGE_FEED_HEARTBEAT_INTERVAL: float = 15  # SSE keep-alive comment
+
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int = 0  # 0 means one worker per CPU
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
+    KEEPALIVE_TIMEOUT: int = 5
+
+    # Keys are "METHOD /path/prefix"; values are max concurrent requests per worker.
+    # Together they must fit in DB_POOL_SIZE + DB_MAX_OVERFLOW, so requests past
+    # the limits are shed with a 503 instead of timing out in the pool; the
+    # remaining connections serve routes without a limit.
+    ADMISSION_CONCURRENCY_LIMITS: Dict[str, int] = {"POST /api/v1/orders": 6, "GET /api/v1/products": 5, "GET /api/v1/admin/exports": 2}
+    ADMISSION_MAX_QUEUE: int = 50
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+
+    # Keys are "METHOD /path/prefix"; values are requests per second per client key
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_ROUTES: Dict[str, float] = {"POST /api/v1/orders": 5.0}
+    RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_CLIENT_HEADER: str = "X-API-Key"
+    RATE_LIMIT_BACKEND: Literal["memory", "redis"] = "memory"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_REDIS_TIMEOUT: float = 0.25  # seconds; on errors and timeouts requests are let through
+
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    LOG_FORMAT: Literal["", "text", "json"] = ""  # empty means json in production, text elsewhere
+    LOG_QUEUE_SIZE: int = 10000
+    # Warnings and errors per second per message template (0 = unlimited)
+    LOG_RATE_LIMIT_PER_SEC: float = 10
+    LOG_RATE_LIMIT_BURST: int = 50
 
     TEST_DB_HOST: str = "localhost"
     TEST_DB_PORT: str = "5433"
@@ -17,9 +97,31 @@ class Settings(BaseSettings):
     TEST_DB_USER: str = "testuser"
     TEST_DB_PASSWORD: str = "testpass"
     TEST_DB_URL: str = ""
+    TEST_DB_ECHO: bool = False
 
     model_config = SettingsConfigDict(env_file='.env', env_file_encoding='utf-8')
 
+    @field_validator("PRODUCT_PRICE_FACET_BOUNDARIES")
+    @classmethod
+    def check_price_facet_boundaries(cls, boundaries: List[Decimal]) -> List[Decimal]:
+        # Facet price buckets come from width_bucket, which needs sorted boundaries
+        if not boundaries:
+            raise ValueError("at least one boundary is required")
+        if any(lower >= upper for lower, upper in zip(boundaries, boundaries[1:])):
+            raise ValueError("boundaries must be strictly increasing")
+        return boundaries
+
+    @model_validator(mode="after")
+    def check_admission_limits_fit_pool(self) -> "Settings":
+        admitted = sum(self.ADMISSION_CONCURRENCY_LIMITS.values())
+        connections = self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW
+        if admitted > connections:
+            raise ValueError(
+                f"ADMISSION_CONCURRENCY_LIMITS admit {admitted} concurrent requests, more than the "
+                f"{connections} connections of DB_POOL_SIZE + DB_MAX_OVERFLOW"
+            )
+        return self
+
 settings = Settings()
 
 settings.DB_URL = f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
@@ -0,0 +1,190 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from config import settings
+from utils.lazy import optional_import
+
+class CartStore(ABC):
+    """Cart storage: product_id -> quantity per cart id, forgotten after `ttl` idle seconds.
+
+    Every read or write of a cart pushes its expiry back. `update_item` adds to
+    (or, with `add=False`, replaces) a line's quantity, drops lines that reach
+    zero and returns the new quantity, or None when the cart does not exist.
+    `claim` removes a cart and returns its items in one atomic step, so of
+    concurrent callers only one gets them.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+    @abstractmethod
+    async def create(self, cart_id: str, items: Dict[int, int]):
+        ...
+
+    @abstractmethod
+    async def get(self, cart_id: str) -> Optional[Dict[int, int]]:
+        ...
+
+    @abstractmethod
+    async def update_item(self, cart_id: str, product_id: int, quantity: int, add: bool = True) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    async def delete(self, cart_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def claim(self, cart_id: str) -> Optional[Dict[int, int]]:
+        ...
+
+    async def close(self):
+        pass
+
+class InMemoryCartStore(CartStore):
+    """Per-process carts; with several workers use the Redis store so every worker sees them."""
+
+    def __init__(self, ttl: float, max_carts: int = 100_000):
+        super().__init__(ttl)
+        self.max_carts = max_carts
+        # cart_id -> (expires_at (monotonic seconds), items), least recently used first
+        self._carts: "OrderedDict[str, Tuple[float, Dict[int, int]]]" = OrderedDict()
+
+    def _touch(self, cart_id: str) -> Optional[Dict[int, int]]:
+        now = time.monotonic()
+        cart = self._carts.get(cart_id)
+        if cart is None:
+            return None
+        if cart[0] <= now:
+            del self._carts[cart_id]
+            return None
+        self._carts[cart_id] = (now + self.ttl, cart[1])
+        self._carts.move_to_end(cart_id)
+        return cart[1]
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._carts:
+            cart_id, (expires_at, _) = next(iter(self._carts.items()))
+            if expires_at > now and len(self._carts) < self.max_carts:
+                break
+            del self._carts[cart_id]
+
+    async def create(self, cart_id: str, items: Dict[int, int]):
+        self._evict()
+        self._carts[cart_id] = (time.monotonic() + self.ttl, dict(items))
+
+    async def get(self, cart_id: str) -> Optional[Dict[int, int]]:
+        items = self._touch(cart_id)
+        return dict(items) if items is not None else None
+
+    async def update_item(self, cart_id: str, product_id: int, quantity: int, add: bool = True) -> Optional[int]:
+        items = self._touch(cart_id)
+        if items is None:
+            return None
+        quantity = items.get(product_id, 0) + quantity if add else quantity
+        if quantity > 0:
+            items[product_id] = quantity
+        else:
+            items.pop(product_id, None)
+        return max(quantity, 0)
+
+    async def delete(self, cart_id: str) -> bool:
+        return self._carts.pop(cart_id, None) is not None
+
+    async def claim(self, cart_id: str) -> Optional[Dict[int, int]]:
+        # No await between the read and the removal, so no other request runs in between
+        items = self._touch(cart_id)
+        if items is not None:
+            del self._carts[cart_id]
+        return items
+
+class RedisCartStore(CartStore):
+    """Carts shared by every worker and pod as Redis hashes; requires the `redis` package."""
+
+    # Hashes cannot be empty, so every cart keeps this field next to its lines
+    MARKER = "cart"
+
+    # Change one line atomically, and only if the cart still exists
+    UPDATE_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return -1
+    end
+    local quantity = tonumber(ARGV[2])
+    if ARGV[3] == '1' then
+        quantity = redis.call('HINCRBY', KEYS[1], ARGV[1], quantity)
+    end
+    if quantity > 0 then
+        redis.call('HSET', KEYS[1], ARGV[1], quantity)
+    else
+        redis.call('HDEL', KEYS[1], ARGV[1])
+        quantity = 0
+    end
+    redis.call('PEXPIRE', KEYS[1], ARGV[4])
+    return quantity
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "fastcart:cart:", client=None):
+        super().__init__(ttl)
+        if client is None:
+            redis = optional_import("redis.asyncio")
+            if redis is None:
+                raise RuntimeError("CART_STORE_BACKEND=redis requires the 'redis' package")
+            client = redis.from_url(url)
+        self.prefix = prefix
+        self.client = client
+        self.update_script = self.client.register_script(self.UPDATE_SCRIPT)
+
+    @property
+    def ttl_ms(self) -> int:
+        return int(self.ttl * 1000)
+
+    def _parse_items(self, fields: Dict[bytes, bytes]) -> Dict[int, int]:
+        return {int(k): int(v) for k, v in fields.items() if k.decode() != self.MARKER}
+
+    async def create(self, cart_id: str, items: Dict[int, int]):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.prefix + cart_id, mapping={self.MARKER: 1, **{str(k): v for k, v in items.items()}})
+            pipe.pexpire(self.prefix + cart_id, self.ttl_ms)
+            await pipe.execute()
+
+    async def get(self, cart_id: str) -> Optional[Dict[int, int]]:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(self.prefix + cart_id)
+            pipe.pexpire(self.prefix + cart_id, self.ttl_ms)
+            fields, _ = await pipe.execute()
+        if not fields:
+            return None
+        return self._parse_items(fields)
+
+    async def update_item(self, cart_id: str, product_id: int, quantity: int, add: bool = True) -> Optional[int]:
+        result = int(await self.update_script(
+            keys=[self.prefix + cart_id],
+            args=[str(product_id), quantity, "1" if add else "0", self.ttl_ms],
+        ))
+        return None if result < 0 else result
+
+    async def delete(self, cart_id: str) -> bool:
+        return bool(await self.client.delete(self.prefix + cart_id))
+
+    async def claim(self, cart_id: str) -> Optional[Dict[int, int]]:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(self.prefix + cart_id)
+            pipe.delete(self.prefix + cart_id)
+            fields, _ = await pipe.execute()
+        if not fields:
+            return None
+        return self._parse_items(fields)
+
+    async def close(self):
+        await self.client.aclose()
+
+def create_cart_store() -> CartStore:
+    if settings.CART_STORE_BACKEND == "redis":
+        return RedisCartStore(settings.CART_REDIS_URL, ttl=settings.CART_TTL)
+    return InMemoryCartStore(ttl=settings.CART_TTL, max_carts=settings.CART_MAX_CARTS)
+
+cart_store = create_cart_store()
+
+async def get_cart_store() -> CartStore:
+    return cart_store
@@ -0,0 +1,38 @@
+import re
+from datetime import date
+from typing import Optional
+
+# Naming only: no engine or logger imports, so migrations/env.py can use it
+# without building the app's connection pool or starting its log thread.
+
+# Parent table -> partition key; both are range partitioned by month (UTC)
+PARTITIONED_TABLES = {
+    "order": "created_at",
+    "orderitem": "order_created_at",
+}
+
+PARTITION_NAME_PATTERN = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+def month_floor(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+def partition_month(name: str) -> Optional[date]:
+    match = PARTITION_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    return date(int(match["year"]), int(match["month"]), 1)
+
+def is_partition_table(name: str) -> bool:
+    match = PARTITION_NAME_PATTERN.match(name)
+    parent = match["table"] if match else name[:-len("_default")] if name.endswith("_default") else None
+    return parent in PARTITIONED_TABLES
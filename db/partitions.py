@@ -0,0 +1,92 @@
+import asyncio
+from datetime import date, datetime, timezone
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import text
+from db.partition_names import PARTITIONED_TABLES, add_months, default_partition_name, month_floor, partition_month, partition_name
+from db.sql import engine
+from utils.logger import logger
+from utils.metrics import metrics
+
+metrics.describe("partition_default_rows_found_total", "Partition checks that found rows in a default partition.")
+
+# Serializes partition DDL across workers that run it at the same time on startup
+PARTITION_LOCK_KEY = 0x0FA57CA7
+
+def create_partition_sql(table: str, month: date) -> str:
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+    )
+
+async def list_partitions(conn: AsyncConnection, table: str) -> List[str]:
+    results = await conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+        ORDER BY child.relname
+    """), {"table": table})
+    return list(results.scalars())
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int, start: Optional[date] = None) -> List[str]:
+    """Create monthly partitions from `start` (default: this month) through `months_ahead` months ahead.
+
+    Returns the names of the partitions that were created.
+    """
+    first_month = month_floor(start or datetime.now(timezone.utc).date())
+    months = [add_months(first_month, offset) for offset in range(months_ahead + 1)]
+
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+
+    created = []
+    # "order" first: orderitem partitions reference it through the foreign key
+    for table in PARTITIONED_TABLES:
+        existing = set(await list_partitions(conn, table))
+        for month in months:
+            if partition_name(table, month) not in existing:
+                await conn.execute(text(create_partition_sql(table, month)))
+                created.append(partition_name(table, month))
+
+    return created
+
+async def partitions_older_than(conn: AsyncConnection, table: str, cutoff: date) -> List[str]:
+    """Monthly partitions whose whole range ends on or before `cutoff`, oldest first."""
+    return [
+        name for name in await list_partitions(conn, table)
+        if partition_month(name) is not None and add_months(partition_month(name), 1) <= cutoff
+    ]
+
+async def default_partitions_with_rows(conn: AsyncConnection) -> List[str]:
+    """Default partitions holding rows. A month with rows there cannot get its own
+    partition until they are moved out, so this should always be empty."""
+    names = []
+    for table in PARTITIONED_TABLES:
+        name = default_partition_name(table)
+        if (await conn.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{name}")'))).scalar():
+            names.append(name)
+    return names
+
+async def create_upcoming_partitions(months_ahead: int):
+    """Make sure inserts for the coming months always have a partition to land in,
+    and alert when rows already ended up in a default partition."""
+    try:
+        async with engine.begin() as conn:
+            created = await ensure_partitions(conn, months_ahead)
+            filled_defaults = await default_partitions_with_rows(conn)
+        if created:
+            logger.info("Created order partitions: %s", ", ".join(created))
+        for name in filled_defaults:
+            metrics.inc("partition_default_rows_found_total", partition=name)
+            logger.error("Default partition %s holds rows; move them out before creating their months' partitions", name)
+    except Exception as e:
+        logger.error("Could not create upcoming order partitions ==> %s", e)
+
+async def maintain_partitions(months_ahead: int, interval: float):
+    """Lifespan task: repeat create_upcoming_partitions every `interval` seconds, so a
+    worker that runs for months (or starts without it) keeps partitions ahead.
+    Workers doing this at once are serialized by ensure_partitions' advisory lock."""
+    while True:
+        await asyncio.sleep(interval)
+        await create_upcoming_partitions(months_ahead)
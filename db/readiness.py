@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlmodel import text
+from config import settings
+from db.sql import engine
+from services.orders import CREATE_ORDER_STMT, INSERT_ORDER_ITEMS_STMT, SET_PRODUCT_STOCKS_STMT, build_reserve_products_stmt
+from services.products import build_products_statements
+from utils.logger import logger
+
+# Seconds since the standby last replayed a transaction; NULL on a primary
+REPLICA_LAG_STMT = text(
+    "SELECT CASE WHEN pg_is_in_recovery() THEN extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+async def prime_statements(conn: AsyncConnection):
+    """Run the hot listing and order statements once, filling SQLAlchemy's compiled
+    cache and this connection's asyncpg prepared statement cache.
+
+    The order statements target a product id that does not exist, so they lock and
+    insert nothing, and everything is rolled back anyway.
+    """
+    async with conn.begin() as transaction:
+        for query in ("", "warmup"):
+            stmt, total_count_stmt = build_products_statements(page=1, page_size=10, query=query, sort_by=None)
+            await conn.execute(stmt)
+            await conn.execute(total_count_stmt)
+        await conn.execute(build_reserve_products_stmt([0]))
+        await conn.execute(SET_PRODUCT_STOCKS_STMT, {"product_ids": [], "stocks": []})
+        await conn.execute(INSERT_ORDER_ITEMS_STMT, {
+            "order_id": 0, "order_created_at": None, "product_ids": [], "quantities": [], "unit_prices": [],
+        })
+        await conn.execute(CREATE_ORDER_STMT, {"product_ids": [0], "quantities": [1]})
+        await transaction.rollback()
+
+class Readiness:
+    """Tracks the startup warm-up and answers the readiness probe."""
+
+    def __init__(self, engine: AsyncEngine, replica_url: str = ""):
+        self.engine = engine
+        self.replica_url = replica_url
+        self._replica_engine: Optional[AsyncEngine] = None
+        self.warmed_up = False
+        self.warmup: Dict[str, Any] = {"complete": False, "connections": 0, "seconds": None}
+
+    async def _open_and_prime(self, connections: int):
+        # Checked out together so the pool really opens that many connections
+        conns = await asyncio.gather(*(self.engine.connect() for _ in range(connections)))
+        try:
+            await asyncio.gather(*(prime_statements(conn) for conn in conns))
+            self.warmup["connections"] = len(conns)
+        finally:
+            await asyncio.gather(*(conn.close() for conn in conns))
+
+    async def warm_up(self, connections: int, budget: float):
+        """Open and prime `connections` pooled connections, giving up after `budget` seconds.
+
+        The pod is reported ready either way; a warm-up that did not finish only
+        means the first requests pay for their own connections.
+        """
+        started_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._open_and_prime(connections), timeout=budget)
+            self.warmup["complete"] = True
+        except asyncio.TimeoutError:
+            logger.warning("Warm-up did not finish within %.1fs", budget)
+        except Exception as e:
+            logger.error("Warm-up failed ==> %s", e)
+        finally:
+            self.warmup["seconds"] = round(time.perf_counter() - started_at, 3)
+            self.warmed_up = True
+        logger.info("Warm-up finished in %.3fs (%d connections)", self.warmup["seconds"], self.warmup["connections"])
+
+    def pool_status(self) -> Dict[str, int]:
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        }
+
+    async def replica_lag(self) -> Optional[float]:
+        if self._replica_engine is None:
+            self._replica_engine = create_async_engine(self.replica_url, pool_size=1, max_overflow=0)
+        async with self._replica_engine.connect() as conn:
+            lag = (await conn.execute(REPLICA_LAG_STMT)).scalar()
+        return float(lag) if lag is not None else None
+
+    async def report(self, timeout: float) -> Dict[str, Any]:
+        """Readiness status with pool health; "ready" only once warmed up and the database answers."""
+        status = "ready"
+        database: Dict[str, Any] = {"reachable": False}
+        if not self.warmed_up:
+            status = "warming_up"
+        else:
+            try:
+                started_at = time.perf_counter()
+                await asyncio.wait_for(self._ping(), timeout=timeout)
+                database = {"reachable": True, "latency_ms": round((time.perf_counter() - started_at) * 1000, 2)}
+            except Exception as e:
+                logger.warning("Readiness check could not reach the database ==> %r", e)
+                status = "unavailable"
+
+        report = {"status": status, "warmup": self.warmup, "database": database, "pool": self.pool_status()}
+        if self.replica_url:
+            try:
+                report["replica"] = {"lag_seconds": await asyncio.wait_for(self.replica_lag(), timeout=timeout)}
+            except Exception as e:
+                logger.warning("Readiness check could not reach the replica ==> %r", e)
+                report["replica"] = {"lag_seconds": None, "error": "unreachable"}
+        return report
+
+    async def _ping(self):
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def close(self):
+        if self._replica_engine is not None:
+            await self._replica_engine.dispose()
+
+readiness = Readiness(engine, replica_url=settings.DB_REPLICA_URL)
@@ -1,12 +1,77 @@
-from typing import AsyncIterator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 from sqlmodel import SQLModel
 from config import settings
+from utils.logger import logger
+
+# Engines never connect at import time, so every worker process that imports
+# this module gets its own pool, opened in connect_db and closed in close_db.
+engine = create_async_engine(
+    settings.DB_URL,
+    echo=settings.DB_ECHO,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    # Defaults for every connection; 0 means no limit
+    connect_args={"server_settings": {
+        "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT),
+        "lock_timeout": str(settings.DB_LOCK_TIMEOUT),
+    }},
+)
+
+# Long read-only scans (order exports) go to the replica when one is configured,
+# keeping them off the primary that serves checkout
+replica_engine = create_async_engine(
+    settings.DB_REPLICA_URL,
+    pool_size=2,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+) if settings.DB_REPLICA_URL else None
+
+# (statement_timeout, lock_timeout) in milliseconds for the current request's
+# route, set by QueryLimitsMiddleware when the route overrides the defaults
+request_query_timeouts: ContextVar[Optional[Tuple[int, int]]] = ContextVar("request_query_timeouts", default=None)
+
+SET_QUERY_TIMEOUTS_STMT = text(
+    "SELECT set_config('statement_timeout', :statement_timeout, true), set_config('lock_timeout', :lock_timeout, true)"
+)
+
+# Postgres error codes of statements cut short by the server
+QUERY_TIMEOUT_SQLSTATES = {
+    "57014": "statement_timeout",
+    "55P03": "lock_timeout",
+}
+
+class TimeoutSession(Session):
+    """Applies the current request's query timeouts to each transaction it begins."""
+
+@event.listens_for(TimeoutSession, "after_begin")
+def apply_request_query_timeouts(session, transaction, connection):
+    timeouts = request_query_timeouts.get()
+    if timeouts is not None:
+        # Transaction-local (SET LOCAL), so the pooled connection keeps its defaults
+        statement_timeout, lock_timeout = timeouts
+        connection.execute(SET_QUERY_TIMEOUTS_STMT, {
+            "statement_timeout": f"{statement_timeout}ms",
+            "lock_timeout": f"{lock_timeout}ms",
+        })
+
+def query_timeout_reason(exc: Optional[BaseException]) -> Optional[str]:
+    """"statement_timeout" or "lock_timeout" when `exc`, or an error it was raised from, is a Postgres timeout."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        reason = QUERY_TIMEOUT_SQLSTATES.get(getattr(getattr(exc, "orig", None), "sqlstate", None))
+        if reason:
+            return reason
+        exc = exc.__cause__ or exc.__context__
+    return None
 
-engine = create_async_engine(settings.DB_URL, echo=True)
 async_session = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
+    engine, class_=AsyncSession, sync_session_class=TimeoutSession, expire_on_commit=False
 )
 
 async def init_db():
@@ -14,6 +79,27 @@ async def init_db():
         # Create all tables
         await conn.run_sync(SQLModel.metadata.create_all)
 
+async def connect_db():
+    """Open the first pooled connection so the worker fails loudly on a bad DB config."""
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        logger.info("Database connection pool opened")
+    except Exception as e:
+        logger.error("Could not open database connection pool ==> %s", e)
+        raise
+
+async def close_db():
+    """Close every pooled connection; checked-out connections are closed as they are returned."""
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+    logger.info("Database connection pool closed")
+
+async def get_export_engine() -> AsyncEngine:
+    """Engine for export scans: the replica when DB_REPLICA_URL is set, else the primary."""
+    return replica_engine or engine
+
 async def get_session() -> AsyncIterator[AsyncSession]:
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
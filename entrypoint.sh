@@ -4,11 +4,13 @@
 echo "Running Alembic migrations..."
 alembic upgrade head
 
-# Run seeding script
-echo "Running seeding script..."
-python3 -m seeds.products -n 200
-python3 -m seeds.orders -n 200
+# Seed fake data for local development only
+if [ "${APP_ENV:-development}" = "development" ]; then
+    echo "Running seeding script..."
+    python3 -m seeds.products -n 200
+    python3 -m seeds.orders -n 200
+fi
 
-# Start the FastAPI app
+# Start the FastAPI app; exec so SIGTERM reaches uvicorn and in-flight requests drain
 echo "Starting FastAPI app..."
-uvicorn main:app --host 0.0.0.0 --port 8000
+exec python3 -m server
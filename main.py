@@ -1,12 +1,71 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from api.v1.routes import products, orders
-from utils.exceptions import BaseAppException
-from utils.logger import logger
+from api.v1.routes import products, orders, changes, carts, admin
+from db.sql import connect_db, close_db, query_timeout_reason
+from db.cart_store import cart_store
+from db.readiness import readiness
+from db.partitions import create_upcoming_partitions, maintain_partitions
+from middlewares.admission import AdmissionControlMiddleware
+from middlewares.compression import CompressionMiddleware
+from middlewares.query_limits import QueryLimitsMiddleware, route_label
+from middlewares.rate_limit import InMemoryRateLimitBackend, RedisRateLimitBackend
+from middlewares.request_id import RequestIdMiddleware
+from utils.exceptions import BaseAppException, QueryTimeoutException
+from utils.logger import logger, stop_logging
+from utils.metrics import metrics
 from config import settings
 
-app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG_MODE)
+if settings.RATE_LIMIT_BACKEND == "redis":
+    rate_limit_backend = RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL, timeout=settings.RATE_LIMIT_REDIS_TIMEOUT)
+else:
+    rate_limit_backend = InMemoryRateLimitBackend()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Starting %s in %s mode", settings.APP_NAME, settings.APP_ENV)
+    await connect_db()
+    if settings.PARTITION_ENSURE_ON_STARTUP:
+        await create_upcoming_partitions(settings.PARTITION_MONTHS_AHEAD)
+    partition_maintenance = None
+    if settings.PARTITION_MAINTENANCE_INTERVAL > 0:
+        partition_maintenance = asyncio.create_task(maintain_partitions(settings.PARTITION_MONTHS_AHEAD, settings.PARTITION_MAINTENANCE_INTERVAL))
+    # In the background, so /health answers while /ready waits for the warm-up
+    warmup = asyncio.create_task(readiness.warm_up(min(settings.WARMUP_CONNECTIONS, settings.DB_POOL_SIZE), settings.WARMUP_BUDGET))
+    yield
+    warmup.cancel()
+    if partition_maintenance is not None:
+        partition_maintenance.cancel()
+    await readiness.close()
+    await close_db()
+    await rate_limit_backend.close()
+    await cart_store.close()
+    stop_logging()
+
+app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG_MODE, lifespan=lifespan)
+
+# Innermost, so a cancelled handler releases its admission slot and pooled connection together
+app.add_middleware(
+    QueryLimitsMiddleware,
+    statement_timeouts=settings.DB_ROUTE_STATEMENT_TIMEOUTS,
+    lock_timeouts=settings.DB_ROUTE_LOCK_TIMEOUTS,
+    default_statement_timeout=settings.DB_STATEMENT_TIMEOUT,
+    default_lock_timeout=settings.DB_LOCK_TIMEOUT,
+    cancel_on_disconnect=settings.DB_CANCEL_ON_DISCONNECT,
+)
+
+app.add_middleware(
+    AdmissionControlMiddleware,
+    concurrency_limits=settings.ADMISSION_CONCURRENCY_LIMITS,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    rate_limits=settings.RATE_LIMIT_ROUTES if settings.RATE_LIMIT_ENABLED else None,
+    rate_limit_burst=settings.RATE_LIMIT_BURST,
+    rate_limit_backend=rate_limit_backend,
+    client_key_header=settings.RATE_LIMIT_CLIENT_HEADER,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,17 +75,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(RequestIdMiddleware)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+    )
+
 @app.exception_handler(BaseAppException)
 async def app_exception_handler(request, exc):
-    import traceback
-    logger.exception(f"Application error traceback starts ==>")
-    logger.error(traceback.format_exc())
-    logger.exception(f"Application error traceback ends\n")
-    logger.exception(f"Application error msg ==> {exc.message}")
+    timeout_reason = query_timeout_reason(exc)
+    if timeout_reason:
+        metrics.inc("db_queries_cancelled_total", route=route_label(request.scope), reason=timeout_reason)
+        exc = QueryTimeoutException(timeout_reason)
+
+    # Tracebacks are rendered by the log writer thread, not on the event loop
+    if exc.status_code >= 500 and not isinstance(exc, QueryTimeoutException):
+        logger.error("Application error msg ==> %s", exc.message, exc_info=exc)
+    else:
+        logger.warning("Request rejected ==> %s", exc.message)
     return JSONResponse(
         status_code=exc.status_code,
-        content={"error": exc.message}
-    )    
+        content={"error": exc.message},
+        headers=exc.headers,
+    )
 
 # Include routers
 app.include_router(
@@ -39,11 +115,37 @@ app.include_router(
     prefix="/api/v1/orders", 
     tags=["orders"]
 )
+app.include_router(
+    carts.router,
+    prefix="/api/v1/carts",
+    tags=["carts"]
+)
+app.include_router(
+    changes.router,
+    prefix="/api/v1/changes",
+    tags=["changes"]
+)
+app.include_router(
+    admin.router,
+    prefix="/api/v1/admin",
+    tags=["admin"]
+)
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up, whether or not it can serve yet."""
     return {"status": "ok"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once the startup warm-up is done and the database answers, else 503."""
+    report = await readiness.report(timeout=settings.READY_CHECK_TIMEOUT)
+    return JSONResponse(status_code=200 if report["status"] == "ready" else 503, content=report)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint():
+    return metrics.render()
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False)
+    from server import run
+    run()
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from middlewares.rate_limit import RateLimitBackend, retry_after_seconds
+from utils.metrics import metrics
+
+metrics.describe("admission_rejected_total", "Requests rejected by admission control or rate limiting.")
+metrics.describe("admission_queue_wait_seconds", "Time admitted requests spent waiting for a concurrency slot.")
+
+class ConcurrencyLimiter:
+    """At most `limit` requests run at once; up to `max_queue` more wait for `queue_timeout` seconds."""
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def acquire(self) -> bool:
+        # Created on first use so the semaphore binds to the server's running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            return False
+
+        self.waiting += 1
+        # Not asyncio.wait_for: before Python 3.12 it can raise TimeoutError after
+        # the acquire went through, and that permit would never be released
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            await asyncio.wait({acquire}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if acquire.done():
+                self._semaphore.release()
+            raise
+        finally:
+            self.waiting -= 1
+            if not acquire.done():
+                # The semaphore hands a permit it woke this waiter for on to the next one
+                acquire.cancel()
+        return acquire.done()
+
+    def release(self):
+        self._semaphore.release()
+
+def parse_route_key(route_key: str) -> Tuple[str, str]:
+    """Split a "METHOD /path/prefix" setting key; the path is matched as a prefix, ignoring a trailing slash."""
+    method, _, path = route_key.strip().partition(" ")
+    return method.upper(), path.strip().rstrip("/")
+
+class RouteTable:
+    def __init__(self, entries: Dict[str, object]):
+        self._entries = {}
+        for route_key, value in entries.items():
+            method, path = parse_route_key(route_key)
+            self._entries[(method, path)] = (f"{method} {path}", value)
+
+    def match(self, method: str, path: str) -> Optional[Tuple[str, object]]:
+        """Longest matching prefix for the method."""
+        best, best_length = None, -1
+        for (route_method, prefix), entry in self._entries.items():
+            if route_method != method or len(prefix) <= best_length:
+                continue
+            if path == prefix or path.startswith(prefix + "/"):
+                best, best_length = entry, len(prefix)
+        return best
+
+class AdmissionControlMiddleware:
+    """Sheds load before it reaches the database pool.
+
+    Token-bucket rate limits per client key answer 429, and per-route
+    concurrency limits with a bounded wait queue answer 503; both set
+    Retry-After so well-behaved clients back off.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        concurrency_limits: Dict[str, int] = None,
+        max_queue: int = 50,
+        queue_timeout: float = 2.0,
+        rate_limits: Dict[str, float] = None,
+        rate_limit_burst: int = 10,
+        rate_limit_backend: RateLimitBackend = None,
+        client_key_header: str = "X-API-Key",
+    ):
+        self.app = app
+        self.limiters = RouteTable({
+            route_key: ConcurrencyLimiter(limit, max_queue, queue_timeout)
+            for route_key, limit in (concurrency_limits or {}).items()
+        })
+        self.rate_limits = RouteTable(rate_limits or {})
+        self.rate_limit_burst = rate_limit_burst
+        self.rate_limit_backend = rate_limit_backend
+        self.client_key_header = client_key_header
+
+    def client_key(self, scope: Scope) -> str:
+        api_key = Headers(scope=scope).get(self.client_key_header)
+        if api_key:
+            return f"key:{api_key}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"].rstrip("/")
+
+        rate_limit = self.rate_limits.match(method, path)
+        if rate_limit is not None and self.rate_limit_backend is not None:
+            route, rate = rate_limit
+            wait = await self.rate_limit_backend.consume(f"{route}|{self.client_key(scope)}", rate, self.rate_limit_burst)
+            if wait > 0:
+                metrics.inc("admission_rejected_total", route=route, reason="rate_limited")
+                response = JSONResponse(
+                    status_code=429,
+                    content={"error": "Too many requests. Please retry later."},
+                    headers={"Retry-After": retry_after_seconds(wait)},
+                )
+                await response(scope, receive, send)
+                return
+
+        limited = self.limiters.match(method, path)
+        if limited is None:
+            await self.app(scope, receive, send)
+            return
+
+        route, limiter = limited
+        started_at = time.perf_counter()
+        if not await limiter.acquire():
+            metrics.inc("admission_rejected_total", route=route, reason="overloaded")
+            response = JSONResponse(
+                status_code=503,
+                content={"error": "Service is busy. Please retry later."},
+                headers={"Retry-After": retry_after_seconds(limiter.queue_timeout)},
+            )
+            await response(scope, receive, send)
+            return
+
+        metrics.observe("admission_queue_wait_seconds", time.perf_counter() - started_at, route=route)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
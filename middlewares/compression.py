@@ -0,0 +1,212 @@
+import time
+import zlib
+from typing import Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.lazy import is_available, optional_import
+from utils.metrics import metrics
+
+# Streamed as produced, or already compressed
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "application/vnd.apache.arrow")
+
+metrics.describe("http_response_compression_seconds", "CPU time spent compressing response bodies.")
+metrics.describe("http_response_compression_bytes_in_total", "Uncompressed response bytes fed to the compressor.")
+metrics.describe("http_response_compression_bytes_out_total", "Compressed response bytes sent to clients.")
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, level: int):
+        self._compressor = optional_import("brotli").Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+class ZstdCompressor:
+    encoding = "zstd"
+
+    def __init__(self, level: int):
+        self._zstandard = optional_import("zstandard")
+        self._compressor = self._zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(self._zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+def available_encodings() -> Dict[str, type]:
+    """Supported encodings in server preference order; optional codecs are imported on first use."""
+    encodings = {}
+    if is_available("zstandard"):
+        encodings["zstd"] = ZstdCompressor
+    if is_available("brotli"):
+        encodings["br"] = BrotliCompressor
+    encodings["gzip"] = GzipCompressor
+    return encodings
+
+def parse_accept_encoding(header_value: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header_value.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+
+    return accepted
+
+def select_encoding(header_value: str, encodings: Dict[str, type]) -> Optional[str]:
+    """Pick the acceptable encoding with the highest q-value, preferring server order on ties."""
+    accepted = parse_accept_encoding(header_value)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+
+    for encoding in encodings:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality, "zstd": zstd_level}
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(
+            self.app,
+            compressor_factory=lambda: self.encodings[encoding](self.levels[encoding]),
+            minimum_size=self.minimum_size,
+        )
+        await responder(scope, receive, send)
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, compressor_factory, minimum_size: int):
+        self.app = app
+        self.compressor_factory = compressor_factory
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.initial_message: Message = None
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a body chunk, flushing so streamed chunks reach the client without waiting for the end."""
+        started_at = time.thread_time()
+        output = self.compressor.compress(data) + (self.compressor.finish() if final else self.compressor.flush())
+        encoding = self.compressor.encoding
+        metrics.observe("http_response_compression_seconds", time.thread_time() - started_at, encoding=encoding)
+        metrics.inc("http_response_compression_bytes_in_total", len(data), encoding=encoding)
+        metrics.inc("http_response_compression_bytes_out_total", len(output), encoding=encoding)
+        return output
+
+    async def send_with_compression(self, message: Message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = "content-encoding" in headers or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+
+            if not more_body and len(body) < self.minimum_size:
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            self.compressor = self.compressor_factory()
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.compressor.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            message["body"] = self.compress(body, final=not more_body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(message["body"]))
+
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if self.compressor is None:
+            await self.send(message)
+            return
+
+        message["body"] = self.compress(body, final=not more_body)
+        await self.send(message)
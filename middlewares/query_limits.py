@@ -0,0 +1,102 @@
+import asyncio
+from typing import Dict, Optional, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from db.sql import request_query_timeouts
+from middlewares.admission import RouteTable
+from utils.logger import logger
+from utils.metrics import metrics
+
+metrics.describe("db_queries_cancelled_total", "Requests whose database work was cut short, by reason: client_disconnect, statement_timeout or lock_timeout.")
+
+def route_label(scope: Scope) -> str:
+    """Method and route template (not the raw path, so ids do not become labels)."""
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else 'unmatched'}"
+
+class QueryLimitsMiddleware:
+    """Bounds how long a request's database work can hold a pooled connection.
+
+    Routes can override the connection's statement and lock timeouts; the
+    overrides are applied to each transaction the request's session begins
+    (see TimeoutSession). When the client disconnects before a response is
+    sent, the handler is cancelled, and asyncpg cancels its running query on
+    the server.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        statement_timeouts: Dict[str, int] = None,
+        lock_timeouts: Dict[str, int] = None,
+        default_statement_timeout: int = 0,
+        default_lock_timeout: int = 0,
+        cancel_on_disconnect: bool = True,
+    ):
+        self.app = app
+        self.statement_timeouts = RouteTable(statement_timeouts or {})
+        self.lock_timeouts = RouteTable(lock_timeouts or {})
+        self.default_statement_timeout = default_statement_timeout
+        self.default_lock_timeout = default_lock_timeout
+        self.cancel_on_disconnect = cancel_on_disconnect
+
+    def route_timeouts(self, method: str, path: str) -> Optional[Tuple[int, int]]:
+        statement_timeout = self.statement_timeouts.match(method, path)
+        lock_timeout = self.lock_timeouts.match(method, path)
+        if statement_timeout is None and lock_timeout is None:
+            return None
+        return (
+            statement_timeout[1] if statement_timeout else self.default_statement_timeout,
+            lock_timeout[1] if lock_timeout else self.default_lock_timeout,
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = request_query_timeouts.set(self.route_timeouts(scope["method"], scope["path"].rstrip("/")))
+        try:
+            if self.cancel_on_disconnect:
+                await self.call_cancellable(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            request_query_timeouts.reset(token)
+
+    async def call_cancellable(self, scope: Scope, receive: Receive, send: Send):
+        # All client messages go through a queue, so the disconnect is seen while
+        # the handler is busy and not only when it next reads the request
+        messages: asyncio.Queue = asyncio.Queue()
+        response_started = False
+
+        async def read_messages():
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        async def tracked_send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        reader = asyncio.ensure_future(read_messages())
+        handler = asyncio.ensure_future(self.app(scope, messages.get, tracked_send))
+        try:
+            await asyncio.wait({reader, handler}, return_when=asyncio.FIRST_COMPLETED)
+            # Once the response has started, streaming responses handle disconnects themselves
+            if not handler.done() and not response_started:
+                handler.cancel()
+                await asyncio.wait({handler})
+                if not handler.cancelled() and handler.exception() is not None:
+                    # Failed while being cancelled; the client is gone, so only log it
+                    logger.warning("Handler failed after client disconnect ==> %s", handler.exception())
+                metrics.inc("db_queries_cancelled_total", route=route_label(scope), reason="client_disconnect")
+                logger.info("Client disconnected, cancelled %s", route_label(scope))
+                return
+            await handler
+        finally:
+            reader.cancel()
+            handler.cancel()
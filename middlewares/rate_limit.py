@@ -0,0 +1,102 @@
+import asyncio
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List
+from utils.lazy import optional_import
+from utils.logger import logger
+from utils.metrics import metrics
+
+metrics.describe("rate_limit_backend_errors_total", "Rate limit checks that failed and let the request through.")
+
+class RateLimitBackend(ABC):
+    """Token-bucket storage. `consume` takes one token and returns 0 when allowed,
+    otherwise the number of seconds until a token becomes available."""
+
+    @abstractmethod
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        ...
+
+    async def close(self):
+        pass
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets; with several workers each one enforces the limit separately."""
+
+    max_keys = 100_000
+
+    def __init__(self):
+        # key -> [tokens, last refill (monotonic seconds)]
+        self._buckets: Dict[str, List[float]] = {}
+
+    def _evict_full_buckets(self, now: float, rate: float, burst: int):
+        for key in [k for k, (tokens, updated_at) in self._buckets.items() if tokens + (now - updated_at) * rate >= burst]:
+            del self._buckets[key]
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._evict_full_buckets(now, rate, burst)
+            bucket = self._buckets[key] = [float(burst), now]
+
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+
+        return (1 - bucket[0]) / rate
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets shared by every worker and pod through Redis; requires the `redis` package."""
+
+    # Refill and take a token atomically; returns the wait in milliseconds (0 when allowed).
+    # The time comes from the Redis server, so clock skew between pods cannot corrupt a bucket
+    # (calling TIME before writes needs Redis 5+, which replicates a script's effects).
+    SCRIPT = """
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+    local tokens = tonumber(bucket[1]) or burst
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate / 1000)
+    local wait_ms = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait_ms = math.ceil((1 - tokens) * 1000 / rate)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+    return wait_ms
+    """
+
+    def __init__(self, url: str, timeout: float = 0.25, prefix: str = "fastcart:ratelimit:", client=None):
+        redis = optional_import("redis.asyncio")
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        if client is None:
+            client = redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self.prefix = prefix
+        self.client = client
+        self.script = self.client.register_script(self.SCRIPT)
+        self.errors = (redis.RedisError, OSError, asyncio.TimeoutError)
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        try:
+            wait_ms = await self.script(keys=[self.prefix + key], args=[rate, burst])
+        except self.errors as e:
+            # Fail open: an unreachable Redis must not turn every limited request into a 500
+            metrics.inc("rate_limit_backend_errors_total", backend="redis")
+            logger.warning("Rate limit check failed, allowing the request ==> %s", e)
+            return 0.0
+        return int(wait_ms) / 1000
+
+    async def close(self):
+        await self.client.aclose()
+
+def retry_after_seconds(wait: float) -> str:
+    return str(max(1, math.ceil(wait)))
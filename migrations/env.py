@@ -8,10 +8,14 @@ from sqlmodel import SQLModel
 
 from alembic import context
 from config import settings
+# Not db.partitions: importing it would build the app's engine and start its log thread
+from db.partition_names import is_partition_table
 
 # models
 from models.products import Product
 from models.orders import Order, OrderItem
+from models.events import ChangeEvent
+from models.stock_alerts import StockAlert
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -31,6 +35,16 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = SQLModel.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Partitions, and the foreign keys Postgres clones for them, are created
+    # at runtime by db/partitions.py, so autogenerate must not drop them
+    if type_ == "table" and reflected and compare_to is None:
+        return not is_partition_table(name)
+    if type_ == "foreign_key_constraint" and reflected and compare_to is None:
+        return not is_partition_table(object.referred_table.name)
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -55,6 +69,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -62,7 +77,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,50 @@
+"""money numeric
+
+Revision ID: bf450070e162
+Revises: 75c3f426e9de
+Create Date: 2026-10-19 18:15:52.788510
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bf450070e162'
+down_revision: Union[str, None] = '75c3f426e9de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MONEY_COLUMNS = [
+    ('product', 'price'),
+    ('orderitem', 'unit_price'),
+    ('order', 'total_price'),
+]
+
+
+def upgrade() -> None:
+    # Float amounts are rounded to cents; run tools.reconcile_orders afterwards
+    # to bring order totals back in line with their items.
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.Float(),
+            type_=sa.Numeric(precision=12, scale=2),
+            existing_nullable=False,
+            postgresql_using=f'round({column}::numeric, 2)',
+        )
+
+
+def downgrade() -> None:
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.Numeric(precision=12, scale=2),
+            type_=sa.Float(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::double precision',
+        )
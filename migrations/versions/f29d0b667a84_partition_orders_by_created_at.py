@@ -0,0 +1,166 @@
+"""partition orders by created_at
+
+The partitioned tables are created in the migration transaction, which only
+renames and creates tables and so holds its locks briefly. Existing rows are
+then copied in batches of BACKFILL_BATCH_SIZE orders outside that
+transaction: each batch commits on its own, so no lock is held for the whole
+copy and WAL is written in bounded steps that replicas can keep up with.
+The legacy tables cannot be attached as partitions instead: orderitem_legacy
+has no order_created_at partition key, and adding it would rewrite the table.
+Until the backfill finishes, old orders appear as their batch lands. An
+interrupted backfill resumes after the last copied order when the upgrade is
+run again.
+
+Revision ID: f29d0b667a84
+Revises: bf450070e162
+Create Date: 2026-10-19 18:20:11.402735
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f29d0b667a84'
+down_revision: Union[str, None] = 'bf450070e162'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+BACKFILL_BATCH_SIZE = 50_000
+
+order_status = postgresql.ENUM('PENDING', 'CANCELED', 'COMPLETED', name='orderstatus', create_type=False)
+
+
+def add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def create_monthly_partitions(table: str, first_month: date, last_month: date) -> None:
+    month = first_month
+    while month <= last_month:
+        op.execute(
+            f'CREATE TABLE "{table}_p{month:%Y_%m}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+        )
+        month = add_months(month, 1)
+    op.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+
+def create_partitioned_tables() -> None:
+    op.execute('ALTER TABLE orderitem RENAME TO orderitem_legacy')
+    op.execute('ALTER INDEX orderitem_pkey RENAME TO orderitem_legacy_pkey')
+    op.execute('ALTER TABLE "order" RENAME TO order_legacy')
+    op.execute('ALTER INDEX order_pkey RENAME TO order_legacy_pkey')
+
+    # The partition key has to be part of every unique constraint, so the
+    # primary keys (and the order foreign key) now include created_at.
+    op.create_table('order',
+    sa.Column('total_price', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('status', order_status, nullable=True),
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('order_id_seq')"), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+    op.create_table('orderitem',
+    sa.Column('order_id', sa.BigInteger(), nullable=False),
+    sa.Column('order_created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('product_id', sa.BigInteger(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['order_id', 'order_created_at'], ['order.id', 'order.created_at'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('order_id', 'order_created_at', 'product_id'),
+    postgresql_partition_by='RANGE (order_created_at)',
+    )
+    op.create_index('ix_orderitem_product_id', 'orderitem', ['product_id'], unique=False)
+
+    oldest = op.get_bind().execute(sa.text('SELECT min(created_at) FROM order_legacy')).scalar()
+    today = datetime.now(timezone.utc).date()
+    first_month = date((oldest or today).year, (oldest or today).month, 1)
+    last_month = add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    create_monthly_partitions('order', first_month, last_month)
+    create_monthly_partitions('orderitem', first_month, last_month)
+
+
+def backfill_batch(after_id: int, last_id: int) -> None:
+    # One statement, so orders and their items are copied in the same transaction
+    op.execute(sa.text('''
+        WITH copied AS (
+            INSERT INTO "order" (id, total_price, status, created_at, updated_at)
+            SELECT id, total_price, status, created_at, updated_at FROM order_legacy
+            WHERE id > :after_id AND id <= :last_id
+            RETURNING id, created_at
+        )
+        INSERT INTO orderitem (order_id, order_created_at, product_id, quantity, unit_price)
+        SELECT oi.order_id, copied.created_at, oi.product_id, oi.quantity, oi.unit_price
+        FROM orderitem_legacy AS oi
+        JOIN copied ON copied.id = oi.order_id
+    ''').bindparams(after_id=after_id, last_id=last_id))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Already there when an earlier run was interrupted during the backfill
+    if not sa.inspect(bind).has_table('order_legacy'):
+        create_partitioned_tables()
+
+    last_legacy_id = bind.execute(sa.text('SELECT coalesce(max(id), 0) FROM order_legacy')).scalar()
+    # New orders take higher ids from the sequence, so this is where an interrupted backfill stopped
+    after_id = bind.execute(
+        sa.text('SELECT coalesce(max(id), 0) FROM "order" WHERE id <= :last_id'), {'last_id': last_legacy_id}
+    ).scalar()
+    with op.get_context().autocommit_block():
+        while after_id < last_legacy_id:
+            backfill_batch(after_id, min(after_id + BACKFILL_BATCH_SIZE, last_legacy_id))
+            after_id += BACKFILL_BATCH_SIZE
+
+    op.execute('ALTER SEQUENCE order_id_seq OWNED BY "order".id')
+    op.drop_table('orderitem_legacy')
+    op.drop_table('order_legacy')
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE orderitem RENAME TO orderitem_partitioned')
+    op.execute('ALTER TABLE "order" RENAME TO order_partitioned')
+    op.execute('ALTER INDEX order_pkey RENAME TO order_partitioned_pkey')
+    op.execute('ALTER INDEX orderitem_pkey RENAME TO orderitem_partitioned_pkey')
+
+    op.create_table('order',
+    sa.Column('total_price', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('status', order_status, nullable=True),
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('order_id_seq')"), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('orderitem',
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['order.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('order_id', 'product_id')
+    )
+
+    op.execute('''
+        INSERT INTO "order" (id, total_price, status, created_at, updated_at)
+        SELECT id, total_price, status, created_at, updated_at FROM order_partitioned
+    ''')
+    op.execute('''
+        INSERT INTO orderitem (order_id, product_id, quantity, unit_price)
+        SELECT order_id, product_id, quantity, unit_price FROM orderitem_partitioned
+    ''')
+
+    op.execute('ALTER SEQUENCE order_id_seq OWNED BY "order".id')
+    op.drop_table('orderitem_partitioned')
+    op.drop_table('order_partitioned')
@@ -0,0 +1,31 @@
+from typing import List, Optional
+from sqlmodel import SQLModel, Field
+from models.common import Money
+from models.orders import OrderItemCreate
+
+class CartLineStatus:
+    OK = "ok"
+    INSUFFICIENT_STOCK = "insufficient_stock"
+    UNAVAILABLE = "unavailable"
+
+class CartCreate(SQLModel):
+    items: List[OrderItemCreate] = []
+
+class CartItemUpdate(SQLModel):
+    quantity: int = Field(ge=0, description="New quantity; 0 removes the line")
+
+# Priced with the product's current price and stock every time the cart is read
+class CartLineRead(SQLModel):
+    product_id: int
+    product_name: Optional[str]
+    quantity: int
+    unit_price: Optional[Money]
+    line_total: Money
+    available_stock: int
+    status: str
+
+class CartRead(SQLModel):
+    id: str
+    items: List[CartLineRead]
+    total_price: Money
+    checkout_ready: bool
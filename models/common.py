@@ -1,11 +1,26 @@
-from typing import TypeVar, Generic, List
-from pydantic import BaseModel
+from datetime import datetime
+from decimal import Decimal
+from typing import TypeVar, Generic, List, Optional
+from pydantic import AfterValidator, BaseModel, PlainSerializer
+from typing_extensions import Annotated
+from utils.helpers import as_utc
 
 T = TypeVar('T')
 
+MONEY_MAX_DIGITS = 12
+MONEY_DECIMAL_PLACES = 2
+
+# Exact NUMERIC(12, 2) amounts in Python and the database; JSON keeps emitting plain numbers
+Money = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
+
+# Timestamps without an offset are taken as UTC, so they compare with the database's timestamptz values
+UtcDatetime = Annotated[datetime, AfterValidator(as_utc)]
+
 class PaginationResponse(BaseModel, Generic[T]):
     current_page: int
     page_size: int
     total_records: int
     total_pages: int
     data: List[T]
+    # Pass back as `cursor` to read the next page by keyset instead of OFFSET
+    next_cursor: Optional[str] = None
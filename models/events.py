@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Any, Dict, List
+from pydantic import ConfigDict
+from sqlalchemy import Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import SQLModel, Column, DateTime, BigInteger, String, Field, func, text
+
+class EntityType:
+    PRODUCT = "product"
+    ORDER = "order"
+    STOCK_ALERT = "stock_alert"
+
+class ChangeEventType:
+    PRODUCT_CREATED = "product.created"
+    PRODUCT_CHANGED = "product.changed"
+    ORDER_CREATED = "order.created"
+    STOCK_ALERT_CREATED = "stock_alert.created"
+
+# Transactional outbox: rows are written in the same transaction as the change
+# they describe. The feed is ordered by the writing transaction's id, which is
+# also its resumable sequence number (see services/changes.py).
+class ChangeEvent(SQLModel, table=True):
+    model_config = ConfigDict(defer_build=True)
+
+    id: int = Field(default=None, sa_column=Column(BigInteger, autoincrement=True, primary_key=True))
+    entity_type: str = Field(sa_column=Column(String(32), nullable=False))
+    entity_id: int = Field(sa_column=Column(BigInteger, nullable=False))
+    event_type: str = Field(sa_column=Column(String(64), nullable=False))
+    payload: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+    transaction_id: int = Field(default=None, sa_column=Column(
+        BigInteger,
+        nullable=False,
+        server_default=text("CAST(CAST(pg_current_xact_id() AS text) AS bigint)")
+    ))
+    created_at: datetime = Field(default=None, sa_column=Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now()
+    ))
+
+    __table_args__ = (
+        Index("ix_changeevent_transaction_id", "transaction_id", "id"),
+    )
+
+class ChangeEventRead(SQLModel):
+    sequence: int
+    entity_type: str
+    entity_id: int
+    event_type: str
+    payload: Dict[str, Any]
+    created_at: datetime
+
+class ChangeFeedResponse(SQLModel):
+    events: List[ChangeEventRead]
+    next_sequence: int
@@ -1,7 +1,10 @@
 from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING, List
+from pydantic import ConfigDict
+from sqlalchemy import ForeignKeyConstraint, Index
 from sqlmodel import SQLModel, Column, DateTime, BigInteger, Enum as SQLAlchemyEnum, Relationship, ForeignKey, Field, func
+from models.common import Money, MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES
 from utils.helpers import get_current_timestamp
 
 if TYPE_CHECKING:
@@ -12,24 +15,40 @@ class OrderStatus(str, Enum):
     CANCELED = "canceled"
     COMPLETED = "completed"
 
+# Models that no route validates at import time use defer_build, so their
+# pydantic schemas are built on first use instead of slowing down startup.
+# Order and OrderItem are range partitioned by month on the order's created_at
+# (see db/partitions.py). Postgres requires the partition key in every unique
+# constraint, so it is part of both primary keys and of the order foreign key.
 class OrderItem(SQLModel, table=True):
-    order_id: int = Field(foreign_key="order.id", primary_key=True, ondelete="CASCADE")
-    product_id: int = Field(foreign_key="product.id", primary_key=True, ondelete="CASCADE")
+    model_config = ConfigDict(defer_build=True)
+
+    order_id: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    order_created_at: datetime = Field(default=None, sa_column=Column(DateTime(timezone=True), primary_key=True))
+    product_id: int = Field(sa_column=Column(BigInteger, ForeignKey("product.id", ondelete="CASCADE"), primary_key=True))
     quantity: int = Field(gt=0, description="Quantity must be at least 1")
-    unit_price: float = Field(gt=0, description="Price per unit at time of order")
+    unit_price: Money = Field(gt=0, max_digits=MONEY_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, description="Price per unit at time of order")
 
     product: "Product" = Relationship(back_populates="order_links")
     order: "Order" = Relationship(back_populates="product_links")
 
+    __table_args__ = (
+        ForeignKeyConstraint(["order_id", "order_created_at"], ["order.id", "order.created_at"], ondelete="CASCADE"),
+        Index("ix_orderitem_product_id", "product_id"),
+        {"postgresql_partition_by": "RANGE (order_created_at)"},
+    )
+
 class OrderBase(SQLModel):
-    total_price: float = Field(gt=0, description="Total order price")
+    total_price: Money = Field(gt=0, max_digits=MONEY_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, description="Total order price")
     status: OrderStatus = Field(sa_column=Column(SQLAlchemyEnum(OrderStatus)), default=OrderStatus.PENDING)
 
 class Order(OrderBase, table=True):
+    model_config = ConfigDict(defer_build=True)
+
     id: int = Field(default=None, sa_column=Column(BigInteger, autoincrement=True, primary_key=True))
     created_at: datetime = Field(default_factory=get_current_timestamp, sa_column=Column(
         DateTime(timezone=True),
-        nullable=False,
+        primary_key=True,
         server_default=func.now()
     ))
     updated_at: datetime = Field(default_factory=get_current_timestamp, sa_column=Column(
@@ -40,6 +59,8 @@ class Order(OrderBase, table=True):
 
     product_links: List[OrderItem] = Relationship(back_populates="order")
 
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
 class OrderItemCreate(SQLModel):
     product_id: int = Field(gt=0, description="Product ID must be at least 1")
     quantity: int = Field(gt=0, description="Quantity must be at least 1")
@@ -48,7 +69,9 @@ class OrderCreate(SQLModel):
     items: List[OrderItemCreate]
 
 class OrderRead(OrderBase):
+    model_config = ConfigDict(defer_build=True)
+
     id: int = Order.id
 
 class OrderUpdate(OrderBase):
-    pass
\ No newline at end of file
+    model_config = ConfigDict(defer_build=True)
\ No newline at end of file
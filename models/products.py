@@ -1,18 +1,23 @@
 from datetime import datetime
 from typing import List, Optional
+from pydantic import ConfigDict
 from sqlmodel import SQLModel, Column, Relationship, Computed, DateTime, BigInteger, Field, func
-from sqlalchemy import Index
+from sqlalchemy import Index, text
 from sqlalchemy.dialects.postgresql import TSVECTOR
+from models.common import Money, MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES, UtcDatetime
 from models.orders import OrderBase, Order, OrderItem
 from utils.helpers import get_current_timestamp
 
 class ProductBase(SQLModel):
     name: str = Field(index=True, min_length=3, max_length=255)
     description: Optional[str] = Field(default=None, max_length=500)
-    price: float = Field(gt=0, description="Product price must be positive")
+    price: Money = Field(gt=0, max_digits=MONEY_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, description="Product price must be positive")
     stock: int = Field(ge=0, description="Stock must be non-negative")
+    low_stock_threshold: int = Field(default=0, ge=0, sa_column_kwargs={"server_default": "0"}, description="Stock at or below this level raises a stock alert")
 
 class Product(ProductBase, table=True):
+    model_config = ConfigDict(defer_build=True)
+
     id: int = Field(default=None, sa_column=Column(BigInteger, autoincrement=True, primary_key=True))
     created_at: datetime = Field(default_factory=get_current_timestamp, sa_column=Column(
         DateTime(timezone=True),
@@ -39,6 +44,17 @@ class Product(ProductBase, table=True):
 
     __table_args__ = (
         Index("idx_product_search", "search_vector", postgresql_using="gin"),
+        # Only low-stock rows are indexed, so the report stays small as the catalog grows
+        Index("ix_product_low_stock", "stock", "id", postgresql_where=text("stock <= low_stock_threshold")),
+        # Listing orders: the sort column, then newest first with id as the tie-break
+        # (see parse_sort_fields); the default order is a backward scan of the first one
+        Index("ix_product_created_at_id", "created_at", "id"),
+        Index("ix_product_price_created_at_id", "price", text("created_at DESC"), text("id DESC")),
+        Index("ix_product_stock_created_at_id", "stock", text("created_at DESC"), text("id DESC")),
+        # in_stock=true listings and counts, matching build_stock_filter; an index-only
+        # scan of the narrow id index is the cheapest way to count in-stock rows
+        Index("ix_product_in_stock_id", "id", postgresql_where=text("stock > 0")),
+        Index("ix_product_in_stock_price_created_at_id", "price", text("created_at DESC"), text("id DESC"), postgresql_where=text("stock > 0")),
     )
 
 class ProductRead(ProductBase):
@@ -47,14 +63,54 @@ class ProductRead(ProductBase):
 class ProductCreate(ProductBase):
     pass
 
-class ProductUpdate(ProductBase):
-    pass
+class PriceFacetRead(SQLModel):
+    min_price: Optional[Money]
+    max_price: Optional[Money]
+    count: int
+
+class ProductFacetsRead(SQLModel):
+    total_records: int
+    in_stock: int
+    price_buckets: List[PriceFacetRead]
+
+class ProductDetailRead(ProductRead):
+    updated_at: datetime
+
+# Only the fields that are sent are changed. With expected_updated_at the
+# update is rejected if the product changed since the client read it.
+class ProductUpdate(SQLModel):
+    name: Optional[str] = Field(default=None, min_length=3, max_length=255)
+    description: Optional[str] = Field(default=None, max_length=500)
+    price: Optional[Money] = Field(default=None, gt=0, max_digits=MONEY_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES)
+    stock: Optional[int] = Field(default=None, ge=0)
+    low_stock_threshold: Optional[int] = Field(default=None, ge=0)
+    expected_updated_at: Optional[UtcDatetime] = None
+
+class ProductAdjustment(SQLModel):
+    id: int
+    price: Optional[Money] = Field(default=None, gt=0, max_digits=MONEY_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES)
+    stock: Optional[int] = Field(default=None, ge=0, description="New stock level")
+    stock_delta: Optional[int] = Field(default=None, description="Added to the current stock; ignored when stock is set")
+    expected_updated_at: Optional[UtcDatetime] = None
+
+class ProductAdjustmentRequest(SQLModel):
+    items: List[ProductAdjustment] = Field(min_length=1)
+
+class ProductAdjustmentRead(SQLModel):
+    id: int
+    price: Money
+    stock: int
+    updated_at: datetime
+
+class ProductAdjustmentResponse(SQLModel):
+    updated: int
+    items: List[ProductAdjustmentRead]
 
 class ProductOrderItemRead(SQLModel):
     product_id: int = Product.id
     product_name: str = Product.name
     quantity: int = OrderItem.quantity
-    price: float = OrderItem.unit_price
+    price: Money = OrderItem.unit_price
 
 class OrderWithProductRead(OrderBase):
     id: int = Order.id
@@ -67,4 +123,5 @@ product_public_fields = [
     Product.description,
     Product.price,
     Product.stock,
+    Product.low_stock_threshold,
 ]
\ No newline at end of file
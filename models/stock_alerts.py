@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import ConfigDict
+from sqlmodel import SQLModel, Column, DateTime, BigInteger, ForeignKey, Field, func
+
+# Written when an order takes a product's stock from above its
+# low_stock_threshold to at or below it.
+class StockAlert(SQLModel, table=True):
+    model_config = ConfigDict(defer_build=True)
+
+    id: int = Field(default=None, sa_column=Column(BigInteger, autoincrement=True, primary_key=True))
+    product_id: int = Field(sa_column=Column(BigInteger, ForeignKey("product.id", ondelete="CASCADE"), nullable=False, index=True))
+    # "order" is partitioned on created_at, so the order is referenced without a foreign key
+    order_id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, nullable=True))
+    stock: int
+    low_stock_threshold: int
+    created_at: datetime = Field(default=None, sa_column=Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now()
+    ))
+
+class StockAlertRead(SQLModel):
+    id: int
+    product_id: int
+    order_id: Optional[int]
+    stock: int
+    low_stock_threshold: int
+    created_at: datetime
+
+class LowStockProductRead(SQLModel):
+    id: int
+    name: str
+    stock: int
+    low_stock_threshold: int
@@ -3,7 +3,7 @@ from random import randint, choice
 from models.products import Product
 from models.orders import Order, OrderItem
 from db.sql import get_session
-from sqlmodel import select, delete
+from sqlmodel import select, text
 from services.orders import normalize_order_items
 from utils.logger import logger
 
@@ -45,8 +45,9 @@ async def seed_orders(n=1000, clear_existing=False):
                 return
 
         if clear_existing:
-            stmt = delete(Order)
-            await session.execute(stmt)
+            # Truncating the partitioned parents clears every partition without
+            # row-by-row cascades from "order" to orderitem
+            await session.execute(text('TRUNCATE TABLE orderitem, "order"'))
             await session.commit()
 
         products_stmt = select(Product.id, Product.price).limit(1000)
@@ -1,6 +1,6 @@
 import argparse
-from random import randint, uniform
-from faker import Faker
+from decimal import Decimal
+from random import randint
 from models.products import Product
 from db.sql import get_session
 from sqlmodel import select, delete
@@ -9,6 +9,9 @@ from utils.logger import logger
 BATCH_SIZE = 500
 
 def generate_fake_products(n=50):
+    # Faker is slow to import, so only pay for it when seeding actually runs
+    from faker import Faker
+
     fake = Faker()
     products = []
 
@@ -17,7 +20,7 @@ def generate_fake_products(n=50):
         product = Product(
             name=f"Product {i + 1}",
             description=fake.sentence(),
-            price=round(uniform(5.0, 500.0), 2),
+            price=Decimal(randint(500, 50000)) / 100,
             stock=randint(10, 100),
         )
         products.append(product)
@@ -0,0 +1,55 @@
+import argparse
+import os
+import uvicorn
+from config import settings
+from utils.lazy import is_available
+from utils.logger import logger
+
+def default_workers() -> int:
+    return settings.WEB_CONCURRENCY or os.cpu_count() or 1
+
+def check_worker_settings(workers: int):
+    """Refuse settings that only work in a single process, instead of failing per request."""
+    if workers > 1 and settings.CART_STORE_BACKEND == "memory":
+        raise SystemExit(
+            f"CART_STORE_BACKEND=memory keeps carts per process, so a cart created on one of the {workers} workers "
+            "would be missing on the others. Set CART_STORE_BACKEND=redis or run a single worker (--workers 1)."
+        )
+
+def event_loop_impl() -> str:
+    return "uvloop" if is_available("uvloop") else "asyncio"
+
+def http_impl() -> str:
+    return "httptools" if is_available("httptools") else "h11"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Production server for the FastCart API")
+    parser.add_argument("--host", type=str, default=settings.SERVER_HOST, help="Interface to bind")
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT, help="Port to bind")
+    parser.add_argument("-w", "--workers", type=int, default=default_workers(), help="Number of worker processes")
+    return parser.parse_args()
+
+def run():
+    args = parse_args()
+    check_worker_settings(args.workers)
+    loop, http = event_loop_impl(), http_impl()
+    logger.info("Starting %d worker(s) on %s:%d (loop=%s, http=%s)", args.workers, args.host, args.port, loop, http)
+
+    # Each worker runs the app lifespan, which opens and disposes of its own
+    # database pool. On SIGTERM uvicorn stops accepting connections and waits up
+    # to GRACEFUL_SHUTDOWN_TIMEOUT seconds for in-flight requests to finish.
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        lifespan="on",
+        proxy_headers=True,
+        timeout_keep_alive=settings.KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+    )
+
+if __name__ == "__main__":
+    run()
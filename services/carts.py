@@ -0,0 +1,153 @@
+import uuid
+from decimal import Decimal
+from typing import Awaitable, Callable, Dict, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from config import settings
+from db.cart_store import CartStore
+from models.carts import CartLineStatus
+from models.orders import OrderCreate, OrderItemCreate
+from models.products import Product
+from services.orders import normalize_order_items
+from utils.exceptions import ResourceNotFoundException, ValidationException
+from utils.logger import logger
+
+def build_cart_products_stmt(product_ids: List[int]):
+    """Current price and stock of every line in one query."""
+    return select(Product.id, Product.name, Product.price, Product.stock).where(Product.id.in_(product_ids))
+
+async def load_cart_products(session: AsyncSession, product_ids: List[int]) -> Dict[int, object]:
+    if not product_ids:
+        return {}
+    results = await session.execute(build_cart_products_stmt(product_ids))
+    return {product.id: product for product in results}
+
+def price_cart(cart_id: str, items: Dict[int, int], products: Dict[int, object]) -> Dict:
+    lines = []
+    total_price = Decimal(0)
+    for product_id, quantity in items.items():
+        product = products.get(product_id)
+        if product is None:
+            lines.append({
+                'product_id': product_id,
+                'product_name': None,
+                'quantity': quantity,
+                'unit_price': None,
+                'line_total': Decimal(0),
+                'available_stock': 0,
+                'status': CartLineStatus.UNAVAILABLE,
+            })
+            continue
+
+        line_total = product.price * quantity
+        total_price += line_total
+        lines.append({
+            'product_id': product_id,
+            'product_name': product.name,
+            'quantity': quantity,
+            'unit_price': product.price,
+            'line_total': line_total,
+            'available_stock': product.stock,
+            'status': CartLineStatus.OK if quantity <= product.stock else CartLineStatus.INSUFFICIENT_STOCK,
+        })
+
+    return {
+        'id': cart_id,
+        'items': lines,
+        'total_price': total_price,
+        'checkout_ready': bool(lines) and all(line['status'] == CartLineStatus.OK for line in lines),
+    }
+
+def check_cart_size(items: Dict[int, int]):
+    if len(items) > settings.CART_MAX_ITEMS:
+        raise ValidationException(message=f"A cart can hold at most {settings.CART_MAX_ITEMS} different products")
+
+async def create_cart(session: AsyncSession, store: CartStore, order_items: List[OrderItemCreate]):
+    try:
+        items = {item.product_id: item.quantity for item in normalize_order_items(order_items)}
+        check_cart_size(items)
+
+        products = await load_cart_products(session, list(items))
+        missing_products = [str(product_id) for product_id in items if product_id not in products]
+        if missing_products:
+            raise ValidationException(message=f"Products not found for IDs: {', '.join(missing_products)}")
+
+        cart_id = uuid.uuid4().hex
+        await store.create(cart_id, items)
+        return price_cart(cart_id, items, products)
+    except Exception as e:
+        logger.error("Exception in create_cart ==> %s", e)
+        raise
+
+async def get_cart_items(store: CartStore, cart_id: str) -> Dict[int, int]:
+    items = await store.get(cart_id)
+    if items is None:
+        raise ResourceNotFoundException(message=f"Cart {cart_id} not found")
+    return items
+
+async def get_cart(session: AsyncSession, store: CartStore, cart_id: str):
+    try:
+        items = await get_cart_items(store, cart_id)
+        return price_cart(cart_id, items, await load_cart_products(session, list(items)))
+    except Exception as e:
+        logger.error("Exception in get_cart ==> %s", e)
+        raise
+
+async def update_cart_item(session: AsyncSession, store: CartStore, cart_id: str, product_id: int, quantity: int, add: bool):
+    """Add to (or with add=False set) one line's quantity, then return the repriced cart."""
+    try:
+        items = await get_cart_items(store, cart_id)
+        if product_id not in items and quantity > 0:
+            check_cart_size({**items, product_id: quantity})
+
+        # The new line's product is priced in the same query as the rest of the cart
+        products = await load_cart_products(session, list({*items, product_id}))
+        if product_id not in products and quantity > 0:
+            raise ValidationException(message=f"Products not found for IDs: {product_id}")
+
+        new_quantity = await store.update_item(cart_id, product_id, quantity, add=add)
+        if new_quantity is None:
+            raise ResourceNotFoundException(message=f"Cart {cart_id} not found")
+
+        if new_quantity > 0:
+            items[product_id] = new_quantity
+        else:
+            items.pop(product_id, None)
+        return price_cart(cart_id, items, products)
+    except Exception as e:
+        logger.error("Exception in update_cart_item ==> %s", e)
+        raise
+
+async def delete_cart(store: CartStore, cart_id: str):
+    if not await store.delete(cart_id):
+        raise ResourceNotFoundException(message=f"Cart {cart_id} not found")
+
+async def checkout_cart(
+    session: AsyncSession,
+    store: CartStore,
+    cart_id: str,
+    create_order: Callable[..., Awaitable[Dict]],
+):
+    """Place the cart as an order through `create_order`; the cart is kept if the order is rejected.
+
+    The cart is claimed before ordering, so concurrent checkouts of one cart
+    (a double click, a client retry) place a single order; the others find
+    no cart.
+    """
+    try:
+        items = await store.claim(cart_id)
+        if items is None:
+            raise ResourceNotFoundException(message=f"Cart {cart_id} not found")
+
+        try:
+            order_data = OrderCreate(items=[
+                OrderItemCreate(product_id=product_id, quantity=quantity) for product_id, quantity in items.items()
+            ])
+            return await create_order(session, order_data=order_data)
+        except BaseException:
+            # Also when the request is cancelled, so a disconnect does not lose the cart
+            await store.create(cart_id, items)
+            raise
+    except Exception as e:
+        logger.error("Exception in checkout_cart ==> %s", e)
+        raise
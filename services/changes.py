@@ -0,0 +1,133 @@
+import asyncio
+import time
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import insert, text
+from models.events import ChangeEvent, ChangeEventType, EntityType
+from utils.logger import logger
+
+# Transaction ids (xid8) only grow, and every transaction below the snapshot's
+# xmin has finished, so the rows under that horizon never change again. Paging
+# by transaction id up to the horizon means a consumer resuming from a
+# sequence number cannot miss an event that committed late.
+FEED_BATCH_STMT = text("""
+SELECT id, transaction_id, entity_type, entity_id, event_type, payload, created_at
+FROM changeevent
+WHERE transaction_id > :after
+  AND transaction_id < CAST(CAST(pg_snapshot_xmin(pg_current_snapshot()) AS text) AS bigint)
+ORDER BY transaction_id, id
+LIMIT :limit
+""")
+
+# Rest of a single transaction that did not fit in one batch
+FEED_TRANSACTION_STMT = text("""
+SELECT id, transaction_id, entity_type, entity_id, event_type, payload, created_at
+FROM changeevent
+WHERE transaction_id = :transaction_id AND id > :after_id
+ORDER BY id
+""")
+
+def to_json_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def change_event(entity_type: str, entity_id: int, event_type: str, **payload) -> Dict[str, Any]:
+    return {
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "event_type": event_type,
+        "payload": {key: to_json_value(value) for key, value in payload.items()},
+    }
+
+def product_created_event(product: Dict[str, Any]) -> Dict[str, Any]:
+    fields = {key: value for key, value in product.items() if key != "id"}
+    return change_event(EntityType.PRODUCT, product["id"], ChangeEventType.PRODUCT_CREATED, **fields)
+
+def product_changed_event(product_id: int, **changes) -> Dict[str, Any]:
+    return change_event(EntityType.PRODUCT, product_id, ChangeEventType.PRODUCT_CHANGED, **changes)
+
+def order_created_event(order: Dict[str, Any]) -> Dict[str, Any]:
+    return change_event(
+        EntityType.ORDER, order["id"], ChangeEventType.ORDER_CREATED,
+        total_price=order["total_price"],
+        status=order["status"],
+        items=[
+            {"product_id": item["product_id"], "quantity": item["quantity"], "price": to_json_value(item["price"])}
+            for item in order["items"]
+        ],
+    )
+
+def stock_alert_event(alert: Dict[str, Any]) -> Dict[str, Any]:
+    fields = {key: value for key, value in alert.items() if key != "id"}
+    return change_event(EntityType.STOCK_ALERT, alert["id"], ChangeEventType.STOCK_ALERT_CREATED, **fields)
+
+async def record_events(session: AsyncSession, events: List[Dict[str, Any]]):
+    """Add outbox rows to the caller's transaction; they commit or roll back with it."""
+    if events:
+        await session.execute(insert(ChangeEvent), events)
+
+def coalesce_events(rows) -> List[Dict[str, Any]]:
+    """Merge every event of one entity in a batch into a single delta.
+
+    Later payload fields win, a *.created event stays a creation, and each
+    entity is placed at the position of its latest change.
+    """
+    coalesced: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for row in rows:
+        key = (row.entity_type, row.entity_id)
+        event = coalesced.pop(key, None)
+        if event is None:
+            event = {"entity_type": row.entity_type, "entity_id": row.entity_id, "event_type": row.event_type, "payload": {}}
+        elif not event["event_type"].endswith(".created"):
+            event["event_type"] = row.event_type
+        event["payload"].update(row.payload)
+        event["sequence"] = row.transaction_id
+        event["created_at"] = row.created_at
+        coalesced[key] = event
+    return list(coalesced.values())
+
+async def read_changes(session: AsyncSession, after: int, limit: int) -> Dict[str, Any]:
+    """Coalesced events of the transactions after `after`, and the sequence to resume from.
+
+    Batches always end on a transaction boundary, so `limit` is a soft cap.
+    """
+    try:
+        rows = (await session.execute(FEED_BATCH_STMT, {"after": after, "limit": limit})).all()
+
+        if len(rows) == limit:
+            last_transaction_id = rows[-1].transaction_id
+            complete = [row for row in rows if row.transaction_id != last_transaction_id]
+            if complete:
+                rows = complete
+            else:
+                rows += (await session.execute(FEED_TRANSACTION_STMT, {
+                    "transaction_id": last_transaction_id,
+                    "after_id": rows[-1].id,
+                })).all()
+
+        return {
+            "events": coalesce_events(rows),
+            "next_sequence": rows[-1].transaction_id if rows else after,
+        }
+    except Exception as e:
+        logger.error("Exception in read_changes ==> %s", e)
+        raise
+
+async def wait_for_changes(session: AsyncSession, after: int, limit: int, wait: float, poll_interval: float) -> Dict[str, Any]:
+    """Long-poll: return as soon as there are events, or an empty batch once `wait` seconds pass."""
+    deadline = time.monotonic() + wait
+    while True:
+        changes = await read_changes(session, after, limit)
+        # End the read transaction so no pooled connection is held while waiting
+        await session.rollback()
+        if changes["events"] or time.monotonic() >= deadline:
+            return changes
+        await asyncio.sleep(min(poll_interval, max(0, deadline - time.monotonic())))
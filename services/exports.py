@@ -0,0 +1,165 @@
+import asyncio
+import io
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import text
+from models.common import MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES
+from utils.exceptions import BaseAppException
+from utils.helpers import as_utc
+from utils.lazy import optional_import
+
+EXPORT_FORMATS = ("parquet", "arrow")
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# One row per order item, ordered by order id so an export can resume after
+# the last order it wrote. Both created_at ranges let Postgres prune partitions.
+EXPORT_ORDERS_STMT = text("""
+SELECT
+    o.id AS order_id,
+    o.created_at AS order_created_at,
+    lower(o.status::text) AS status,
+    o.total_price,
+    oi.product_id,
+    p.name AS product_name,
+    oi.quantity,
+    oi.unit_price
+FROM "order" AS o
+JOIN orderitem AS oi ON oi.order_id = o.id AND oi.order_created_at = o.created_at
+LEFT JOIN product AS p ON p.id = oi.product_id
+WHERE o.created_at >= :start AND o.created_at < :end
+    AND oi.order_created_at >= :start AND oi.order_created_at < :end
+    AND o.id > :after_id
+ORDER BY o.id, oi.product_id
+""")
+
+def require_pyarrow():
+    pyarrow = optional_import("pyarrow")
+    if pyarrow is None:
+        raise BaseAppException("Order exports require the 'pyarrow' package", status_code=501)
+    return pyarrow
+
+def export_schema():
+    pa = require_pyarrow()
+    money = pa.decimal128(MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES)
+    return pa.schema([
+        ("order_id", pa.int64()),
+        ("order_created_at", pa.timestamp("us", tz="UTC")),
+        ("status", pa.dictionary(pa.int8(), pa.string())),
+        ("total_price", money),
+        ("product_id", pa.int64()),
+        ("product_name", pa.string()),
+        ("quantity", pa.int32()),
+        ("unit_price", money),
+    ])
+
+async def iter_order_chunks(
+    conn: AsyncConnection,
+    start: datetime,
+    end: datetime,
+    after_id: int = 0,
+    chunk_size: int = 50_000,
+) -> AsyncIterator[List[Sequence]]:
+    """Yield the items of orders created in [start, end) after `after_id`, about `chunk_size` rows at a time.
+
+    Rows come from a server-side cursor, so only one chunk is held in memory.
+    A chunk never splits an order, so the last order id of every chunk is a
+    safe point to resume from.
+    """
+    result = await conn.stream(
+        EXPORT_ORDERS_STMT,
+        {"start": as_utc(start), "end": as_utc(end), "after_id": after_id},
+        execution_options={"yield_per": chunk_size},
+    )
+    carried: List[Sequence] = []
+    async for partition in result.partitions(chunk_size):
+        rows = carried + partition
+        # Hold back the last order's rows; its remaining items may be in the next partition
+        split = len(rows)
+        last_order_id = rows[-1].order_id
+        while split > 0 and rows[split - 1].order_id == last_order_id:
+            split -= 1
+        if split == 0:
+            carried = rows
+            continue
+        carried = rows[split:]
+        yield rows[:split]
+    if carried:
+        yield carried
+
+def rows_to_record_batch(rows: List[Sequence]):
+    pa = require_pyarrow()
+    schema = export_schema()
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+def encode_chunk(rows: List[Sequence], export_format: str, compression: str = "zstd") -> bytes:
+    """One chunk as a standalone Parquet file or Arrow IPC stream. CPU bound; run it on a thread pool."""
+    pa = require_pyarrow()
+    batch = rows_to_record_batch(rows)
+    sink = io.BytesIO()
+    if export_format == "parquet":
+        optional_import("pyarrow.parquet").write_table(pa.Table.from_batches([batch]), sink, compression=compression)
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.ipc.new_stream(sink, batch.schema, options=options) as writer:
+            writer.write_batch(batch)
+    return sink.getvalue()
+
+class ArrowStreamEncoder:
+    """Encodes chunks as the record batches of a single Arrow IPC stream.
+
+    `encode` returns the bytes written for a chunk (the first call also carries
+    the schema), and `finish` the end-of-stream marker. Calls must not overlap.
+    """
+
+    def __init__(self, compression: str = "zstd"):
+        pa = require_pyarrow()
+        self.sink = io.BytesIO()
+        self.writer = pa.ipc.new_stream(self.sink, export_schema(), options=pa.ipc.IpcWriteOptions(compression=compression))
+
+    def _drain(self) -> bytes:
+        data = self.sink.getvalue()
+        self.sink.seek(0)
+        self.sink.truncate()
+        return data
+
+    def encode(self, rows: List[Sequence]) -> bytes:
+        self.writer.write_batch(rows_to_record_batch(rows))
+        return self._drain()
+
+    def finish(self) -> bytes:
+        self.writer.close()
+        return self._drain()
+
+async def stream_orders_arrow(
+    conn: AsyncConnection,
+    start: datetime,
+    end: datetime,
+    after_id: int = 0,
+    chunk_size: int = 50_000,
+    executor: Optional[Executor] = None,
+) -> AsyncIterator[bytes]:
+    """An Arrow IPC stream of the orders export. Each chunk is encoded on `executor`
+    while the next one is read from the cursor."""
+    loop = asyncio.get_running_loop()
+    encoder = ArrowStreamEncoder()
+    pending: Optional[asyncio.Future] = None
+    try:
+        async for rows in iter_order_chunks(conn, start, end, after_id=after_id, chunk_size=chunk_size):
+            if pending is not None:
+                yield await pending
+            pending = loop.run_in_executor(executor, encoder.encode, rows)
+        if pending is not None:
+            yield await pending
+            pending = None
+        yield encoder.finish()
+    finally:
+        if pending is not None:
+            # An encode still running must not overlap the writer being closed
+            await asyncio.wait({pending})
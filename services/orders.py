@@ -1,8 +1,14 @@
+from decimal import Decimal
 from typing import List, Dict
+from sqlalchemy import BigInteger, Integer, Numeric, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, update
-from models.orders import Order, OrderItem, OrderCreate, OrderItemCreate
+from sqlmodel import select, text
+from models.common import MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES
+from models.orders import OrderCreate, OrderItemCreate, OrderStatus
 from models.products import Product
+from services.changes import order_created_event, product_changed_event, record_events
+from services.stock_alerts import crossed_low_stock_threshold, record_stock_alerts
 from utils.exceptions import ValidationException
 from utils.logger import logger
 
@@ -20,6 +26,124 @@ def normalize_order_items(order_items: List[OrderItemCreate]):
         
     return normalized_order_items
 
+# Checks and decrements stock, inserts the order and its items, and reports
+# per-item outcomes in one statement (one round trip). Data-modifying CTEs all
+# run against the same snapshot, so the final SELECT reads pre-order stock for
+# error messages while `updated` carries the rows that were actually reserved.
+# If any item could not be reserved no order row (and no change event) is
+# inserted, and the caller rolls back the partial stock updates. A stock alert
+# is written for each product this order takes to or below its threshold.
+CREATE_ORDER_STMT = text("""
+WITH requested AS (
+    SELECT r.product_id, r.quantity, r.item_position
+    FROM unnest(:product_ids, :quantities)
+        WITH ORDINALITY AS r(product_id, quantity, item_position)
+),
+updated AS (
+    UPDATE product AS p
+    SET stock = p.stock - requested.quantity, updated_at = now()
+    FROM requested
+    WHERE p.id = requested.product_id AND p.stock >= requested.quantity
+    RETURNING p.id, p.name, p.price, p.stock, p.low_stock_threshold, requested.quantity
+),
+new_order AS (
+    INSERT INTO "order" (total_price, status, created_at, updated_at)
+    SELECT sum(updated.price * updated.quantity), CAST('PENDING' AS orderstatus), now(), now()
+    FROM updated
+    HAVING count(*) = (SELECT count(*) FROM requested)
+    RETURNING id, total_price, status, created_at
+),
+new_items AS (
+    INSERT INTO orderitem (order_id, order_created_at, product_id, quantity, unit_price)
+    SELECT new_order.id, new_order.created_at, updated.id, updated.quantity, updated.price
+    FROM new_order CROSS JOIN updated
+),
+new_alerts AS (
+    INSERT INTO stockalert (product_id, order_id, stock, low_stock_threshold)
+    SELECT updated.id, new_order.id, updated.stock, updated.low_stock_threshold
+    FROM new_order CROSS JOIN updated
+    WHERE updated.stock <= updated.low_stock_threshold
+      AND updated.stock + updated.quantity > updated.low_stock_threshold
+    RETURNING id, product_id, order_id, stock, low_stock_threshold
+),
+new_events AS (
+    INSERT INTO changeevent (entity_type, entity_id, event_type, payload)
+    SELECT 'product', updated.id, 'product.changed', jsonb_build_object('stock', updated.stock)
+    FROM new_order CROSS JOIN updated
+    UNION ALL
+    SELECT 'order', new_order.id, 'order.created', jsonb_build_object(
+        'total_price', new_order.total_price,
+        'status', 'pending',
+        'items', (
+            SELECT jsonb_agg(jsonb_build_object('product_id', updated.id, 'quantity', updated.quantity, 'price', updated.price))
+            FROM updated
+        )
+    )
+    FROM new_order
+    UNION ALL
+    SELECT 'stock_alert', new_alerts.id, 'stock_alert.created', jsonb_build_object(
+        'product_id', new_alerts.product_id,
+        'order_id', new_alerts.order_id,
+        'stock', new_alerts.stock,
+        'low_stock_threshold', new_alerts.low_stock_threshold
+    )
+    FROM new_alerts
+)
+SELECT
+    requested.product_id,
+    requested.quantity,
+    existing.id IS NOT NULL AS found,
+    existing.stock AS available,
+    updated.id IS NOT NULL AS reserved,
+    updated.name AS product_name,
+    updated.price,
+    new_order.id AS order_id,
+    new_order.total_price,
+    new_order.status,
+    new_order.created_at
+FROM requested
+LEFT JOIN updated ON updated.id = requested.product_id
+LEFT JOIN product AS existing ON existing.id = requested.product_id
+LEFT JOIN new_order ON true
+ORDER BY requested.item_position
+""").bindparams(
+    bindparam("product_ids", type_=ARRAY(BigInteger)),
+    bindparam("quantities", type_=ARRAY(Integer)),
+)
+
+# The multi-statement write path writes set-based from parallel arrays, so
+# an order costs the same few statements and no per-item ORM objects or
+# parameter dicts however many items it has.
+INSERT_ORDER_STMT = text("""
+INSERT INTO "order" (total_price, status, created_at, updated_at)
+VALUES (:total_price, CAST('PENDING' AS orderstatus), now(), now())
+RETURNING id, status, created_at
+""")
+
+INSERT_ORDER_ITEMS_STMT = text("""
+INSERT INTO orderitem (order_id, order_created_at, product_id, quantity, unit_price)
+SELECT :order_id, :order_created_at, item.product_id, item.quantity, item.unit_price
+FROM unnest(:product_ids, :quantities, :unit_prices) AS item(product_id, quantity, unit_price)
+""").bindparams(
+    bindparam("product_ids", type_=ARRAY(BigInteger)),
+    bindparam("quantities", type_=ARRAY(Integer)),
+    bindparam("unit_prices", type_=ARRAY(Numeric(MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES))),
+)
+
+SET_PRODUCT_STOCKS_STMT = text("""
+UPDATE product AS p
+SET stock = item.stock, updated_at = now()
+FROM unnest(:product_ids, :stocks) AS item(id, stock)
+WHERE p.id = item.id
+""").bindparams(
+    bindparam("product_ids", type_=ARRAY(BigInteger)),
+    bindparam("stocks", type_=ARRAY(Integer)),
+)
+
+def build_reserve_products_stmt(product_ids: List[int]):
+    """Lock the ordered products' rows for the multi-statement write path."""
+    return select(Product.id, Product.name, Product.stock, Product.price, Product.low_stock_threshold).where(Product.id.in_(product_ids)).with_for_update()
+
 async def create_order(session: AsyncSession, order_data: OrderCreate):
     try:
         if len(order_data.items) == 0:
@@ -30,16 +154,18 @@ async def create_order(session: AsyncSession, order_data: OrderCreate):
         order_data.items = normalize_order_items(order_data.items)
         product_ids = [p.product_id for p in order_data.items]
 
-        stmt = select(Product.id, Product.name, Product.stock, Product.price).where(Product.id.in_(product_ids)).with_for_update()
-        products = await session.execute(stmt)
+        products = await session.execute(build_reserve_products_stmt(product_ids))
         product_dict = { p.id: p for p in products}
 
         missing_products = set()
-        order_items = []
-        updated_products = []
+        # Parallel arrays for the set-based writes, in item order
+        quantities = []
+        unit_prices = []
+        new_stocks = []
+        stock_alerts = []
         created_order = {
             "items": [],
-            "total_price": 0
+            "total_price": Decimal(0)
         }
 
         for order_item in order_data.items:
@@ -53,10 +179,16 @@ async def create_order(session: AsyncSession, order_data: OrderCreate):
                     message=f"Insufficient stock for Product ID {product_id}. Requested: {order_item.quantity}, Available: {product.stock}"
                 )
             else:
-                updated_products.append({
-                    'id': product.id,
-                    'stock': product.stock - order_item.quantity,
-                })
+                new_stock = product.stock - order_item.quantity
+                quantities.append(order_item.quantity)
+                unit_prices.append(product.price)
+                new_stocks.append(new_stock)
+                if crossed_low_stock_threshold(product.stock, new_stock, product.low_stock_threshold):
+                    stock_alerts.append({
+                        'product_id': product.id,
+                        'stock': new_stock,
+                        'low_stock_threshold': product.low_stock_threshold,
+                    })
                 created_order['items'].append({
                     'product_id': product.id,
                     'product_name': product.name,
@@ -64,30 +196,93 @@ async def create_order(session: AsyncSession, order_data: OrderCreate):
                     'price': product.price,
                 })
                 created_order['total_price'] += product.price * order_item.quantity
-                
-                new_order_item = OrderItem(product_id=order_item.product_id, quantity=order_item.quantity, unit_price=product.price)
-                order_items.append(new_order_item) 
 
         if missing_products:
             raise ValidationException(
                 message=f"Products not found for IDs: {', '.join(missing_products)}"
             )
 
-        new_order = Order(total_price=created_order['total_price'])
-        for order_item in order_items:
-            order_item.order = new_order
-
-        await session.execute(update(Product), updated_products)
-        session.add_all(order_items)
-        await session.commit()
+        await session.execute(SET_PRODUCT_STOCKS_STMT, {'product_ids': product_ids, 'stocks': new_stocks})
+        new_order = (await session.execute(INSERT_ORDER_STMT, {'total_price': created_order['total_price']})).one()
+        await session.execute(INSERT_ORDER_ITEMS_STMT, {
+            'order_id': new_order.id,
+            'order_created_at': new_order.created_at,
+            'product_ids': product_ids,
+            'quantities': quantities,
+            'unit_prices': unit_prices,
+        })
 
         created_order['id'] = new_order.id
-        created_order['status'] = new_order.status
+        created_order['status'] = OrderStatus[new_order.status]
         created_order['created_at'] = new_order.created_at
 
+        for alert in stock_alerts:
+            alert['order_id'] = new_order.id
+        alert_events = await record_stock_alerts(session, stock_alerts)
+
+        await record_events(session, [
+            *(product_changed_event(product_id, stock=stock) for product_id, stock in zip(product_ids, new_stocks)),
+            order_created_event(created_order),
+            *alert_events,
+        ])
+        await session.commit()
+
         return created_order
 
     except Exception as e:
-        logger.error(f"Exception in create_order ==> {e}")
+        logger.error("Exception in create_order ==> %s", e)
+        await session.rollback()
+        raise
+
+async def create_order_cte(session: AsyncSession, order_data: OrderCreate):
+    """Single round-trip variant of create_order with the same result and validation errors."""
+    try:
+        if len(order_data.items) == 0:
+            raise ValidationException(
+                message="Order must contain at least one item"
+            )
+
+        order_data.items = normalize_order_items(order_data.items)
+        results = await session.execute(CREATE_ORDER_STMT, {
+            'product_ids': [item.product_id for item in order_data.items],
+            'quantities': [item.quantity for item in order_data.items],
+        })
+        rows = results.all()
+
+        missing_products = []
+        for row in rows:
+            if not row.found:
+                missing_products.append(str(row.product_id))
+            elif not row.reserved:
+                raise ValidationException(
+                    message=f"Insufficient stock for Product ID {row.product_id}. Requested: {row.quantity}, Available: {row.available}"
+                )
+
+        if missing_products:
+            raise ValidationException(
+                message=f"Products not found for IDs: {', '.join(missing_products)}"
+            )
+
+        await session.commit()
+
+        order = rows[0]
+        return {
+            'id': order.order_id,
+            'status': OrderStatus[order.status],
+            'created_at': order.created_at,
+            'total_price': order.total_price,
+            'items': [
+                {
+                    'product_id': row.product_id,
+                    'product_name': row.product_name,
+                    'quantity': row.quantity,
+                    'price': row.price,
+                }
+                for row in rows
+            ],
+        }
+
+    except Exception as e:
+        logger.error("Exception in create_order_cte ==> %s", e)
         await session.rollback()
         raise
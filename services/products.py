@@ -1,29 +1,132 @@
-from typing import Optional, List
-from sqlalchemy import asc, desc, nulls_first, nulls_last
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Optional, List, Tuple
+from sqlalchemy import BigInteger, DateTime, Integer, Numeric, and_, asc, bindparam, cast, desc, nulls_first, nulls_last, or_, true
+from sqlalchemy.dialects.postgresql import ARRAY, array
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, text, func
-from models.products import Product, ProductCreate, product_public_fields
-from utils.exceptions import ValidationException
+from sqlmodel import select, text, func, update
+from sqlmodel.sql.expression import Select
+from config import settings
+from models.common import MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES
+from models.products import Product, ProductCreate, ProductUpdate, ProductAdjustment, product_public_fields
+from services.changes import product_changed_event, product_created_event, record_events, to_json_value
+from services.stock_alerts import crossed_low_stock_threshold, record_stock_alerts
+from utils.exceptions import ConflictException, ResourceNotFoundException, ValidationException
 from utils.logger import logger
 from utils.helpers import get_total_pages
 
-def build_sorting_expression(sort_by: Optional[str], model: Product, allowed_columns: List[str]) -> List:
-    """Helper to handle sorting logic."""
-    sort_expressions = []
-    if sort_by:
-        sort_fields = sort_by.split(",")
+PRODUCT_SORT_COLUMNS = ['name', 'price', 'stock']
+# JSON cursor values back to the types of their columns
+CURSOR_VALUE_PARSERS = {
+    'price': Decimal,
+    'created_at': datetime.fromisoformat,
+}
+NOT_NULL_UPDATE_FIELDS = ['name', 'price', 'stock', 'low_stock_threshold']
+
+# Applies a batch of price/stock adjustments as one set-based UPDATE and reports
+# per-item outcomes. The batch is all or nothing: events and stock alerts are
+# only inserted when every item was applied, otherwise the caller rolls back.
+# As in CREATE_ORDER_STMT, `existing` reads the rows as they were before the
+# update, which is what stock alerts compare against.
+ADJUST_PRODUCTS_STMT = text("""
+WITH adjustments AS (
+    SELECT a.id, a.price, a.stock, a.stock_delta, a.expected_updated_at, a.item_position
+    FROM unnest(:ids, :prices, :stocks, :stock_deltas, :expected_updated_ats)
+        WITH ORDINALITY AS a(id, price, stock, stock_delta, expected_updated_at, item_position)
+),
+updated AS (
+    UPDATE product AS p
+    SET price = coalesce(a.price, p.price),
+        stock = coalesce(a.stock, p.stock + coalesce(a.stock_delta, 0)),
+        updated_at = clock_timestamp()
+    FROM adjustments AS a
+    WHERE p.id = a.id
+      AND (a.expected_updated_at IS NULL OR p.updated_at = a.expected_updated_at)
+      AND coalesce(a.stock, p.stock + coalesce(a.stock_delta, 0)) >= 0
+    RETURNING p.id, p.price, p.stock, p.low_stock_threshold, p.updated_at,
+        a.price IS NOT NULL AS price_changed,
+        a.stock IS NOT NULL OR a.stock_delta IS NOT NULL AS stock_changed
+),
+applied AS (
+    SELECT updated.*
+    FROM updated
+    WHERE (SELECT count(*) FROM updated) = (SELECT count(*) FROM adjustments)
+),
+new_alerts AS (
+    INSERT INTO stockalert (product_id, stock, low_stock_threshold)
+    SELECT applied.id, applied.stock, applied.low_stock_threshold
+    FROM applied
+    JOIN product AS existing ON existing.id = applied.id
+    WHERE applied.stock <= applied.low_stock_threshold AND existing.stock > existing.low_stock_threshold
+    RETURNING id, product_id, order_id, stock, low_stock_threshold
+),
+new_events AS (
+    INSERT INTO changeevent (entity_type, entity_id, event_type, payload)
+    SELECT 'product', applied.id, 'product.changed', jsonb_strip_nulls(jsonb_build_object(
+        'price', CASE WHEN applied.price_changed THEN applied.price END,
+        'stock', CASE WHEN applied.stock_changed THEN applied.stock END
+    ))
+    FROM applied
+    UNION ALL
+    SELECT 'stock_alert', new_alerts.id, 'stock_alert.created', jsonb_build_object(
+        'product_id', new_alerts.product_id,
+        'order_id', new_alerts.order_id,
+        'stock', new_alerts.stock,
+        'low_stock_threshold', new_alerts.low_stock_threshold
+    )
+    FROM new_alerts
+)
+SELECT
+    a.id,
+    a.expected_updated_at,
+    existing.id IS NOT NULL AS found,
+    updated.id IS NOT NULL AS applied,
+    updated.price,
+    updated.stock,
+    updated.updated_at
+FROM adjustments AS a
+LEFT JOIN updated ON updated.id = a.id
+LEFT JOIN product AS existing ON existing.id = a.id
+ORDER BY a.item_position
+""").bindparams(
+    bindparam("ids", type_=ARRAY(BigInteger)),
+    bindparam("prices", type_=ARRAY(Numeric(MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES))),
+    bindparam("stocks", type_=ARRAY(Integer)),
+    bindparam("stock_deltas", type_=ARRAY(Integer)),
+    bindparam("expected_updated_ats", type_=ARRAY(DateTime(timezone=True))),
+)
 
-        for field in sort_fields:
+def parse_sort_fields(sort_by: Optional[str], model: Product, allowed_columns: List[str]) -> List[Tuple[Any, bool]]:
+    """(column, descending) pairs of the listing order, ending in a unique tie-break."""
+    sort_fields = []
+    if sort_by:
+        for field in sort_by.split(","):
             desc_order = field.startswith("-")
             col_name = field.lstrip("-")
 
             if col_name not in allowed_columns:
                 raise ValidationException(message=f"Invalid sort field: {col_name}")
 
-            sort_expr = nulls_last(desc(getattr(model, col_name))) if desc_order else nulls_first(asc(getattr(model, col_name)))
-            sort_expressions.append(sort_expr)
+            sort_fields.append((getattr(model, col_name), desc_order))
+
+    # Newest first, with the id making the order total so keyset pages never skip or repeat rows
+    sort_fields.append((model.created_at, True))
+    sort_fields.append((model.id, True))
 
-    sort_expressions.append(desc(model.created_at))
+    return sort_fields
+
+def build_sorting_expression(sort_by: Optional[str], model: Product, allowed_columns: List[str]) -> List:
+    """Helper to handle sorting logic."""
+    sort_expressions = []
+    for column, desc_order in parse_sort_fields(sort_by, model, allowed_columns):
+        sort_expr = desc(column) if desc_order else asc(column)
+        # NULLS FIRST/LAST on a NOT NULL column is a no-op that stops Postgres
+        # from walking the column's btree index in order
+        if model.__table__.c[column.key].nullable:
+            sort_expr = nulls_last(sort_expr) if desc_order else nulls_first(sort_expr)
+        sort_expressions.append(sort_expr)
 
     return sort_expressions
 
@@ -32,25 +135,124 @@ def build_query_filter(model: Product) -> Optional[str]:
     query_condition = model.search_vector.op('@@')(text("plainto_tsquery('english', :query)"))
     return query_condition
 
-async def get_products(session: AsyncSession, page: int, page_size: int, query: str, sort_by: str):
+def build_price_filter(model: Product, min_price: Optional[Decimal], max_price: Optional[Decimal]) -> List:
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise ValidationException(message="min_price cannot be greater than max_price")
+
+    conditions = []
+    if min_price is not None:
+        conditions.append(model.price >= min_price)
+    if max_price is not None:
+        conditions.append(model.price <= max_price)
+    return conditions
+
+def build_stock_filter(model: Product, in_stock: bool) -> List:
+    # Same predicate as the partial ix_product_in_stock_* indexes
+    return [model.stock > 0] if in_stock else []
+
+def encode_cursor(sort_by: Optional[str], values: List[Any]) -> str:
+    # Decimals are kept as strings: a float would not compare equal to the stored price
+    values = [str(value) if isinstance(value, Decimal) else to_json_value(value) for value in values]
+    payload = json.dumps({"sort_by": sort_by or "", "values": values})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str, sort_by: Optional[str], sort_fields: List[Tuple[Any, bool]]) -> List[Any]:
     try:
-        query = query.strip()
-        offset = (page - 1) * page_size
-        stmt = select(*product_public_fields)
-        total_count_stmt = select(func.count()).select_from(Product)
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        values = payload["values"]
+        if len(values) != len(sort_fields):
+            raise ValueError("cursor has the wrong number of values")
+        parsed = [CURSOR_VALUE_PARSERS.get(column.key, lambda value: value)(value) for (column, _), value in zip(sort_fields, values)]
+    except Exception as e:
+        raise ValidationException(message="Invalid cursor") from e
+
+    if payload.get("sort_by") != (sort_by or ""):
+        raise ValidationException(message="Cursor was issued for a different sort_by")
+    return parsed
 
-        if query:
-            where_clause = build_query_filter(Product)
+def build_keyset_condition(sort_fields: List[Tuple[Any, bool]], values: List[Any]):
+    """Rows after `values` in the listing order, for mixed sort directions.
 
-            stmt = stmt.where(where_clause).params(query=query)
-            total_count_stmt = total_count_stmt.where(where_clause).params(query=query)
+    Expands to a > x OR (a = x AND (b < y OR ...)). The extra bound on the
+    leading column lets Postgres start the index scan at the cursor.
+    """
+    condition = None
+    for (column, desc_order), value in reversed(list(zip(sort_fields, values))):
+        after = column < value if desc_order else column > value
+        condition = after if condition is None else or_(after, and_(column == value, condition))
 
+    leading_column, leading_desc = sort_fields[0]
+    leading_bound = leading_column <= values[0] if leading_desc else leading_column >= values[0]
+    return and_(leading_bound, condition)
 
-        sort_expressions = build_sorting_expression(sort_by=sort_by, model=Product, allowed_columns=['name'])
-        stmt = stmt.order_by(*sort_expressions).limit(page_size).offset(offset)
+def build_products_statements(
+    page: int,
+    page_size: int,
+    query: str,
+    sort_by: Optional[str],
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    in_stock: bool = False,
+    cursor: Optional[str] = None,
+) -> Tuple[Select, Select]:
+    """Page and total count statements for the product listing.
 
+    With a cursor (the previous page's next_cursor) the page is read by
+    keyset instead of OFFSET, and `page` is ignored.
+    """
+    query = query.strip()
+    sort_fields = parse_sort_fields(sort_by=sort_by, model=Product, allowed_columns=PRODUCT_SORT_COLUMNS)
+    # created_at is selected for next_cursor
+    stmt = select(*product_public_fields, Product.created_at)
+    total_count_stmt = select(func.count()).select_from(Product)
+
+    filters = [*build_price_filter(Product, min_price, max_price), *build_stock_filter(Product, in_stock)]
+    if query:
+        filters.append(build_query_filter(Product))
+    if filters:
+        stmt = stmt.where(*filters)
+        total_count_stmt = total_count_stmt.where(*filters)
+    if query:
+        stmt = stmt.params(query=query)
+        total_count_stmt = total_count_stmt.params(query=query)
+
+    if cursor:
+        stmt = stmt.where(build_keyset_condition(sort_fields, decode_cursor(cursor, sort_by, sort_fields)))
+    else:
+        stmt = stmt.offset((page - 1) * page_size)
+
+    sort_expressions = build_sorting_expression(sort_by=sort_by, model=Product, allowed_columns=PRODUCT_SORT_COLUMNS)
+    stmt = stmt.order_by(*sort_expressions).limit(page_size)
+
+    return stmt, total_count_stmt
+
+def build_next_cursor(products: List[Any], page_size: int, sort_by: Optional[str]) -> Optional[str]:
+    if len(products) < page_size:
+        return None
+    last = products[-1]
+    sort_fields = parse_sort_fields(sort_by=sort_by, model=Product, allowed_columns=PRODUCT_SORT_COLUMNS)
+    return encode_cursor(sort_by, [getattr(last, column.key) for column, _ in sort_fields])
+
+async def get_products(
+    session: AsyncSession,
+    page: int,
+    page_size: int,
+    query: str,
+    sort_by: str,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    in_stock: bool = False,
+    cursor: Optional[str] = None,
+):
+    try:
+        stmt, total_count_stmt = build_products_statements(
+            page=page, page_size=page_size, query=query, sort_by=sort_by,
+            min_price=min_price, max_price=max_price, in_stock=in_stock, cursor=cursor,
+        )
+
+        # Plain rows; the response model reads their attributes, with no mapping per row
         results = await session.execute(stmt)
-        products = results.mappings().all()
+        products = results.all()
 
         # Get Total Products
         total_results = await session.execute(total_count_stmt)
@@ -61,10 +263,72 @@ async def get_products(session: AsyncSession, page: int, page_size: int, query:
             'page_size': page_size,
             'total_records': total_count,
             'total_pages': get_total_pages(total_count, page_size),
-            'data': products
+            'data': products,
+            'next_cursor': build_next_cursor(products, page_size, sort_by),
+        }
+    except Exception as e:
+        logger.error("Exception in get_products ==> %s", e)
+        raise
+
+def build_facets_statement(
+    query: str,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    in_stock: bool = False,
+) -> Select:
+    """One grouped query for every facet count.
+
+    Each facet ignores its own filter so the other options stay visible:
+    price buckets count rows that pass the stock filter, and the in-stock
+    count rows that pass the price filter.
+    """
+    query = query.strip()
+    boundaries = cast(array(settings.PRODUCT_PRICE_FACET_BOUNDARIES), ARRAY(Numeric(MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES)))
+    bucket = func.width_bucket(Product.price, boundaries)
+    stock_filter = and_(true(), *build_stock_filter(Product, in_stock))
+    price_filter = and_(true(), *build_price_filter(Product, min_price, max_price))
+
+    stmt = select(
+        bucket.label("bucket"),
+        func.count().filter(stock_filter).label("products"),
+        func.count().filter(and_(price_filter, Product.stock > 0)).label("in_stock"),
+        func.count().filter(and_(price_filter, stock_filter)).label("matching"),
+    ).group_by(bucket)
+
+    if query:
+        stmt = stmt.where(build_query_filter(Product)).params(query=query)
+    return stmt
+
+async def get_product_facets(
+    session: AsyncSession,
+    query: str,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    in_stock: bool = False,
+):
+    try:
+        stmt = build_facets_statement(query=query, min_price=min_price, max_price=max_price, in_stock=in_stock)
+        counts = {row.bucket: row for row in (await session.execute(stmt)).all()}
+
+        # width_bucket: 0 is below the first boundary, len(boundaries) at or above the last
+        boundaries = settings.PRODUCT_PRICE_FACET_BOUNDARIES
+        edges = [None, *boundaries, None]
+        price_buckets = [
+            {
+                'min_price': edges[i],
+                'max_price': edges[i + 1],
+                'count': counts[i].products if i in counts else 0,
+            }
+            for i in range(len(boundaries) + 1)
+        ]
+
+        return {
+            'total_records': sum(row.matching for row in counts.values()),
+            'in_stock': sum(row.in_stock for row in counts.values()),
+            'price_buckets': price_buckets,
         }
     except Exception as e:
-        logger.error(f"Exception in get_products ==> {e}")
+        logger.error("Exception in get_product_facets ==> %s", e)
         raise
 
 async def create_product(session: AsyncSession, product_data: ProductCreate):
@@ -75,13 +339,123 @@ async def create_product(session: AsyncSession, product_data: ProductCreate):
 
         new_product = Product(**product_data.model_dump())
         session.add(new_product)
-        await session.commit()
+        await session.flush()
 
         new_product_data = {field.name: getattr(new_product, field.name) for field in product_public_fields}
+        await record_events(session, [product_created_event(new_product_data)])
+        await session.commit()
 
         return new_product_data
 
     except Exception as e:
-        logger.error(f"Exception in create_product ==> {e} {type(e)=}")
+        logger.error("Exception in create_product ==> %s %r", e, type(e))
+        await session.rollback()
+        raise
+
+async def update_product(session: AsyncSession, product_id: int, product_data: ProductUpdate):
+    try:
+        changes = product_data.model_dump(exclude_unset=True, exclude={"expected_updated_at"})
+        null_fields = [field for field in NOT_NULL_UPDATE_FIELDS if field in changes and changes[field] is None]
+        if null_fields:
+            raise ValidationException(message=f"Fields cannot be null: {', '.join(null_fields)}")
+        if changes.get('name'):
+            changes['name'] = changes['name'].strip()
+        if changes.get('description'):
+            changes['description'] = changes['description'].strip()
+
+        current = (await session.execute(
+            select(Product.stock, Product.low_stock_threshold, Product.updated_at).where(Product.id == product_id).with_for_update()
+        )).first()
+        if current is None:
+            raise ResourceNotFoundException(message=f"Product with ID {product_id} not found")
+        if product_data.expected_updated_at is not None and current.updated_at != product_data.expected_updated_at:
+            raise ConflictException(
+                message=f"Product ID {product_id} was modified at {current.updated_at.isoformat()}. Reload it and retry."
+            )
+
+        columns = [*product_public_fields, Product.updated_at]
+        if not changes:
+            return (await session.execute(select(*columns).where(Product.id == product_id))).mappings().one()
+
+        # updated_at doubles as the version for expected_updated_at, so it comes from
+        # clock_timestamp(): now() is the same for every write in one transaction.
+        # search_vector is recomputed by Postgres.
+        stmt = update(Product).where(Product.id == product_id).values(**changes, updated_at=func.clock_timestamp()).returning(*columns)
+        product = dict((await session.execute(stmt.execution_options(synchronize_session=False))).mappings().one())
+
+        events = [product_changed_event(product_id, **changes)]
+        if crossed_low_stock_threshold(current.stock, product['stock'], product['low_stock_threshold'], current.low_stock_threshold):
+            events += await record_stock_alerts(session, [{
+                'product_id': product_id,
+                'order_id': None,
+                'stock': product['stock'],
+                'low_stock_threshold': product['low_stock_threshold'],
+            }])
+        await record_events(session, events)
+        await session.commit()
+
+        return product
+
+    except Exception as e:
+        logger.error("Exception in update_product ==> %s", e)
+        await session.rollback()
+        raise
+
+async def adjust_products(session: AsyncSession, adjustments: List[ProductAdjustment]):
+    """Apply price/stock changes to many products in one statement, all or nothing."""
+    try:
+        if len(adjustments) > settings.PRODUCT_ADJUSTMENT_MAX_ITEMS:
+            raise ValidationException(message=f"At most {settings.PRODUCT_ADJUSTMENT_MAX_ITEMS} adjustments can be applied at once")
+
+        seen_ids = set()
+        for adjustment in adjustments:
+            if adjustment.id in seen_ids:
+                raise ValidationException(message=f"Product ID {adjustment.id} is adjusted more than once")
+            seen_ids.add(adjustment.id)
+            if adjustment.price is None and adjustment.stock is None and adjustment.stock_delta is None:
+                raise ValidationException(message=f"Adjustment for Product ID {adjustment.id} has no price, stock or stock_delta")
+
+        results = await session.execute(ADJUST_PRODUCTS_STMT, {
+            'ids': [a.id for a in adjustments],
+            'prices': [a.price for a in adjustments],
+            'stocks': [a.stock for a in adjustments],
+            'stock_deltas': [a.stock_delta for a in adjustments],
+            'expected_updated_ats': [a.expected_updated_at for a in adjustments],
+        })
+        rows = results.all()
+
+        missing_products = [str(row.id) for row in rows if not row.found]
+        if missing_products:
+            raise ValidationException(message=f"Products not found for IDs: {', '.join(missing_products)}")
+
+        not_applied = [row for row in rows if not row.applied]
+        if not_applied:
+            # Re-read under a lock: the statement compared against its snapshot, so an edit
+            # committed after it but before the row lock fails the UPDATE's recheck unseen
+            current_versions = dict((await session.execute(
+                select(Product.id, Product.updated_at).where(Product.id.in_([row.id for row in not_applied])).with_for_update(read=True)
+            )).all())
+            conflicts = [
+                str(row.id) for row in not_applied
+                if row.expected_updated_at is not None and row.expected_updated_at != current_versions.get(row.id)
+            ]
+            if conflicts:
+                raise ConflictException(message=f"Products were modified since they were read: {', '.join(conflicts)}. Reload them and retry.")
+            raise ValidationException(
+                message=f"Stock cannot go below zero for Product IDs: {', '.join(str(row.id) for row in not_applied)}"
+            )
+
+        await session.commit()
+
+        return {
+            'updated': len(rows),
+            'items': [
+                {'id': row.id, 'price': row.price, 'stock': row.stock, 'updated_at': row.updated_at}
+                for row in rows
+            ],
+        }
+
+    except Exception as e:
+        logger.error("Exception in adjust_products ==> %s", e)
         await session.rollback()
         raise
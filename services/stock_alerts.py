@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import func, insert, select
+from models.products import Product
+from models.stock_alerts import StockAlert
+from services.changes import stock_alert_event
+from utils.helpers import get_total_pages
+from utils.logger import logger
+
+# Same predicate as the partial index ix_product_low_stock, so Postgres can use it
+LOW_STOCK_CONDITION = Product.stock <= Product.low_stock_threshold
+
+def crossed_low_stock_threshold(previous_stock: int, stock: int, threshold: int, previous_threshold: Optional[int] = None) -> bool:
+    """True only for the change that takes stock from above the threshold to at or below it."""
+    if previous_threshold is None:
+        previous_threshold = threshold
+    return stock <= threshold and previous_stock > previous_threshold
+
+async def record_stock_alerts(session: AsyncSession, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Insert alert rows in the caller's transaction and return their change events."""
+    if not alerts:
+        return []
+    results = await session.execute(
+        insert(StockAlert).returning(
+            StockAlert.id, StockAlert.product_id, StockAlert.order_id, StockAlert.stock, StockAlert.low_stock_threshold,
+        ),
+        alerts,
+    )
+    return [stock_alert_event(dict(row)) for row in results.mappings()]
+
+def build_low_stock_statements(page: int, page_size: int):
+    stmt = (
+        select(Product.id, Product.name, Product.stock, Product.low_stock_threshold)
+        .where(LOW_STOCK_CONDITION)
+        .order_by(Product.stock, Product.id)
+        .limit(page_size)
+        .offset((page - 1) * page_size)
+    )
+    total_count_stmt = select(func.count()).select_from(Product).where(LOW_STOCK_CONDITION)
+    return stmt, total_count_stmt
+
+async def get_low_stock_products(session: AsyncSession, page: int, page_size: int):
+    try:
+        stmt, total_count_stmt = build_low_stock_statements(page=page, page_size=page_size)
+
+        products = (await session.execute(stmt)).mappings().all()
+        total_count = (await session.execute(total_count_stmt)).scalar()
+
+        return {
+            'current_page': page,
+            'page_size': page_size,
+            'total_records': total_count,
+            'total_pages': get_total_pages(total_count, page_size),
+            'data': products
+        }
+    except Exception as e:
+        logger.error("Exception in get_low_stock_products ==> %s", e)
+        raise
+
+async def get_stock_alerts(session: AsyncSession, after_id: int, limit: int, product_id: Optional[int] = None):
+    """Alerts in id order after `after_id`, for browsing recent alerts.
+
+    Best effort only: ids are taken when a transaction inserts an alert, but
+    transactions commit in any order, so an alert with a lower id than one
+    already returned can still appear later and be skipped by `after_id`.
+    Consumers that must see every alert read `stock_alert.created` from the
+    change feed, which only advances past committed transactions.
+    """
+    try:
+        stmt = select(StockAlert).where(StockAlert.id > after_id).order_by(StockAlert.id).limit(limit)
+        if product_id is not None:
+            stmt = stmt.where(StockAlert.product_id == product_id)
+
+        results = await session.execute(stmt)
+        return results.scalars().all()
+    except Exception as e:
+        logger.error("Exception in get_stock_alerts ==> %s", e)
+        raise
@@ -4,16 +4,111 @@ import asyncio
 from typing import AsyncIterator, Generator
 import pytest
 import pytest_asyncio
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
 from httpx import ASGITransport, AsyncClient
+
+# Every test client shares one address; keep per-client rate limits out of the API tests
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
 from main import app
-from db.sql import get_session
+from db.sql import TimeoutSession, get_session
 from config import settings
 
-engine = create_async_engine(settings.TEST_DB_URL, echo=True)
-async_session = async_sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
-)
+# Under pytest-xdist each worker runs against its own clone of the migrated and
+# seeded test database, made from it as a template before the worker starts.
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+TEMPLATE_DB_NAME = settings.TEST_DB_NAME
+
+def worker_db_name(worker_id: str) -> str:
+    return f"{TEMPLATE_DB_NAME}_{worker_id}"
+
+if XDIST_WORKER:
+    settings.TEST_DB_NAME = worker_db_name(XDIST_WORKER)
+    settings.TEST_DB_URL = f"postgresql+asyncpg://{settings.TEST_DB_USER}:{settings.TEST_DB_PASSWORD}@{settings.TEST_DB_HOST}:{settings.TEST_DB_PORT}/{settings.TEST_DB_NAME}"
+
+engine = create_async_engine(settings.TEST_DB_URL, echo=settings.TEST_DB_ECHO)
+
+def run_sync(coroutine):
+    # A private loop, so the one pytest-asyncio runs tests on is left untouched
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+async def execute_admin(*statements: str):
+    """Run statements from the maintenance database, e.g. CREATE/DROP DATABASE."""
+    import asyncpg
+
+    conn = await asyncpg.connect(
+        host=settings.TEST_DB_HOST,
+        port=settings.TEST_DB_PORT,
+        user=settings.TEST_DB_USER,
+        password=settings.TEST_DB_PASSWORD,
+        database="postgres",
+    )
+    try:
+        for statement in statements:
+            for attempt in range(10):
+                try:
+                    await conn.execute(statement)
+                    break
+                except asyncpg.ObjectInUseError:
+                    # e.g. autovacuum briefly connected to the template
+                    if attempt == 9:
+                        raise
+                    await asyncio.sleep(0.5)
+    finally:
+        await conn.close()
+
+def setup_script_env():
+    """Point the setup script (migrations and seeds) at the test database."""
+    return {
+        **os.environ,
+        "DB_HOST": settings.TEST_DB_HOST,
+        "DB_PORT": settings.TEST_DB_PORT,
+        "DB_NAME": TEMPLATE_DB_NAME,
+        "DB_USER": settings.TEST_DB_USER,
+        "DB_PASSWORD": settings.TEST_DB_PASSWORD,
+    }
+
+class XdistDatabasePlugin:
+    """Clones the test database for each xdist worker from the controller process."""
+
+    def __init__(self):
+        self.databases = []
+
+    def pytest_configure_node(self, node):
+        name = worker_db_name(node.gateway.id)
+        run_sync(execute_admin(
+            f'DROP DATABASE IF EXISTS "{name}"',
+            f'CREATE DATABASE "{name}" TEMPLATE "{TEMPLATE_DB_NAME}"',
+        ))
+        self.databases.append(name)
+
+    def drop_databases(self):
+        run_sync(execute_admin(*(f'DROP DATABASE IF EXISTS "{name}"' for name in self.databases)))
+
+def is_xdist_worker(config) -> bool:
+    return hasattr(config, "workerinput")
+
+def pytest_configure(config):
+    if not is_xdist_worker(config) and config.pluginmanager.hasplugin("xdist"):
+        config.pluginmanager.register(XdistDatabasePlugin(), "xdist-databases")
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionstart(session):
+    """Start, migrate and seed the test DB once, before any xdist worker is started."""
+    if not is_xdist_worker(session.config):
+        subprocess.run(["./scripts/setup_test_db.sh", settings.TEST_DB_URL], check=True, env=setup_script_env())
+
+def pytest_sessionfinish(session):
+    if is_xdist_worker(session.config):
+        return
+    plugin = session.config.pluginmanager.get_plugin("xdist-databases")
+    if plugin and plugin.databases:
+        plugin.drop_databases()
+    subprocess.run(["./scripts/teardown_test_db.sh"], check=True)
 
 @pytest.fixture(scope="session")
 def event_loop(request) -> Generator:  # noqa: indirect usage
@@ -21,28 +116,40 @@ def event_loop(request) -> Generator:  # noqa: indirect usage
     yield loop
     loop.close()
 
-@pytest.fixture(scope="session", autouse=True)
-def setup_database():
-    """Runs the setup script to start test DB & apply migrations."""
-    subprocess.run(["./scripts/setup_test_db.sh", settings.TEST_DB_URL], check=True)
-
-    yield  # Run tests
+@pytest_asyncio.fixture(scope="function")
+async def db_connection() -> AsyncIterator[AsyncConnection]:
+    """A connection inside a transaction that is rolled back after the test."""
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            yield conn
+        finally:
+            await transaction.rollback()
 
-    subprocess.run(["./scripts/teardown_test_db.sh"], check=True)
+def isolated_session(conn: AsyncConnection) -> AsyncSession:
+    # Service commits and rollbacks only release or roll back SAVEPOINTs, so
+    # tests see their own writes but never leave data behind
+    return AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint", sync_session_class=TimeoutSession)
 
 @pytest_asyncio.fixture(scope="function")
-async def db_session() -> AsyncIterator[AsyncSession]:
-    async with async_session() as session:
+async def db_session(db_connection: AsyncConnection) -> AsyncIterator[AsyncSession]:
+    async with isolated_session(db_connection) as session:
         yield session
 
-async def get_test_session() -> AsyncIterator[AsyncSession]:
-    async with async_session() as session:
+@pytest_asyncio.fixture(scope="function")
+async def committed_session() -> AsyncIterator[AsyncSession]:
+    """A plain session whose commits are real, for tests that need other transactions to see them."""
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
 @pytest_asyncio.fixture(scope="function")
-async def client():
+async def client(db_connection: AsyncConnection):
+    """Provides a test client for FastAPI; each request gets its own session in the test's transaction."""
+    async def get_test_session() -> AsyncIterator[AsyncSession]:
+        async with isolated_session(db_connection) as session:
+            yield session
+
     app.dependency_overrides[get_session] = get_test_session
-    """Provides a test client for FastAPI."""
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test/api/v1") as ac:
         yield ac
     app.dependency_overrides.clear()
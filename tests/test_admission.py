@@ -0,0 +1,156 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from pydantic import ValidationError
+from config import Settings
+from middlewares.admission import AdmissionControlMiddleware, ConcurrencyLimiter, RouteTable
+from middlewares.rate_limit import InMemoryRateLimitBackend, RedisRateLimitBackend
+from utils.metrics import metrics
+
+admission_app = FastAPI()
+admission_app.add_middleware(
+    AdmissionControlMiddleware,
+    concurrency_limits={"POST /orders": 1},
+    max_queue=1,
+    queue_timeout=0.2,
+    rate_limits={"GET /products": 1.0},
+    rate_limit_burst=2,
+    rate_limit_backend=InMemoryRateLimitBackend(),
+)
+
+@admission_app.post("/orders/")
+async def slow_order():
+    await admission_app.state.release_orders.wait()
+    return {"status": "ok"}
+
+@admission_app.get("/products/")
+async def list_products():
+    return {"status": "ok"}
+
+
+def admission_client():
+    return AsyncClient(transport=ASGITransport(app=admission_app), base_url="http://test")
+
+
+def test_route_table_prefers_longest_prefix():
+    """Test that route keys match by method and longest path prefix."""
+    table = RouteTable({"POST /api/v1/orders": "orders", "POST /api/v1": "api", "GET /api/v1/orders/": "get"})
+
+    assert table.match("POST", "/api/v1/orders")[1] == "orders"
+    assert table.match("POST", "/api/v1/orders/123")[1] == "orders"
+    assert table.match("POST", "/api/v1/ordersx")[1] == "api"
+    assert table.match("GET", "/api/v1/orders")[1] == "get"
+    assert table.match("DELETE", "/api/v1/orders") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_rejects_when_queue_is_full():
+    """Test that the limiter queues up to max_queue waiters and rejects the rest immediately."""
+    limiter = ConcurrencyLimiter(limit=1, max_queue=1, queue_timeout=1)
+
+    assert await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+
+    assert await limiter.acquire() is False
+
+    limiter.release()
+    assert await waiter
+    limiter.release()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_keeps_permits_of_timed_out_and_cancelled_waiters():
+    """Test that waiters giving up, including as the permit is handed to them, never take a permit with them."""
+    limiter = ConcurrencyLimiter(limit=2, max_queue=10, queue_timeout=0.01)
+
+    for _ in range(20):
+        assert await limiter.acquire()
+        assert await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        cancelled = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0.01)
+        # Released about when the waiter times out
+        limiter.release()
+        cancelled.cancel()
+        if await waiter:
+            limiter.release()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        limiter.release()
+
+    assert limiter.waiting == 0
+    assert await limiter.acquire() and await limiter.acquire()
+    assert await limiter.acquire() is False
+
+
+def test_admission_limits_must_fit_the_pool():
+    """Test that settings reject concurrency limits the database pool cannot serve."""
+    with pytest.raises(ValidationError):
+        Settings(DB_POOL_SIZE=5, DB_MAX_OVERFLOW=10, ADMISSION_CONCURRENCY_LIMITS={"POST /api/v1/orders": 10, "GET /api/v1/products": 6})
+
+    assert Settings(DB_POOL_SIZE=5, DB_MAX_OVERFLOW=10, ADMISSION_CONCURRENCY_LIMITS={"POST /api/v1/orders": 10, "GET /api/v1/products": 5})
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_uses_server_time_and_fails_open():
+    """Test the shared token bucket against fakeredis (with Lua), and that Redis errors let requests through."""
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = RedisRateLimitBackend("redis://unused", client=fakeredis.FakeAsyncRedis())
+
+    assert await backend.consume("client", rate=1.0, burst=2) == 0
+    assert await backend.consume("client", rate=1.0, burst=2) == 0
+    assert 0 < await backend.consume("client", rate=1.0, burst=2) <= 1.0
+
+    server = fakeredis.FakeServer()
+    server.connected = False
+    backend = RedisRateLimitBackend("redis://unused", client=fakeredis.FakeAsyncRedis(server=server))
+    before = metrics.get("rate_limit_backend_errors_total", backend="redis")
+
+    assert await backend.consume("client", rate=1.0, burst=2) == 0
+    assert metrics.get("rate_limit_backend_errors_total", backend="redis") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_refills_tokens():
+    """Test that the token bucket allows the burst, then reports the wait until the next token."""
+    backend = InMemoryRateLimitBackend()
+
+    assert await backend.consume("client", rate=1.0, burst=2) == 0
+    assert await backend.consume("client", rate=1.0, burst=2) == 0
+    wait = await backend.consume("client", rate=1.0, burst=2)
+
+    assert 0 < wait <= 1.0
+    assert await backend.consume("other-client", rate=1.0, burst=2) == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_client_gets_429_with_retry_after():
+    """Test that a client over its rate limit gets 429 with Retry-After."""
+    async with admission_client() as client:
+        responses = [await client.get("/products/", headers={"X-API-Key": "rate-test"}) for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[-1].headers["retry-after"] == "1"
+    assert responses[-1].json()["error"] == "Too many requests. Please retry later."
+
+
+@pytest.mark.asyncio
+async def test_overloaded_route_gets_503_with_retry_after():
+    """Test that requests beyond the concurrency limit and queue are shed with 503."""
+    release_orders = admission_app.state.release_orders = asyncio.Event()
+    async with admission_client() as client:
+        running = asyncio.ensure_future(client.post("/orders/"))
+        queued = asyncio.ensure_future(client.post("/orders/"))
+        await asyncio.sleep(0.05)
+
+        rejected = await client.post("/orders/")
+        timed_out = await queued
+        release_orders.set()
+        completed = await running
+
+    assert rejected.status_code == 503
+    assert rejected.headers["retry-after"] == "1"
+    assert timed_out.status_code == 503
+    assert completed.status_code == 200
@@ -0,0 +1,199 @@
+import asyncio
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from httpx import AsyncClient
+from pydantic import ValidationError
+from config import Settings, settings
+from db.cart_store import InMemoryCartStore, RedisCartStore
+from models.products import ProductCreate
+from server import check_worker_settings
+from services.carts import checkout_cart
+from services.products import create_product
+from utils.exceptions import ResourceNotFoundException, ValidationException
+
+
+@pytest.mark.asyncio
+async def test_in_memory_cart_store_expires_and_evicts():
+    """Test idle expiry, line updates and eviction of the least recently used cart."""
+    store = InMemoryCartStore(ttl=0.05, max_carts=2)
+    await store.create("a", {1: 2})
+
+    assert await store.update_item("a", 1, 3) == 5
+    assert await store.update_item("a", 2, 1, add=False) == 1
+    assert await store.update_item("a", 1, -5) == 0
+    assert await store.get("a") == {2: 1}
+    assert await store.update_item("missing", 1, 1) is None
+
+    await asyncio.sleep(0.06)
+    assert await store.get("a") is None
+
+    store.ttl = 60
+    for cart_id in ("b", "c"):
+        await store.create(cart_id, {})
+    await store.get("b")
+    await store.create("d", {})
+    assert await store.get("c") is None
+    assert await store.get("b") == {}
+
+
+@pytest.mark.asyncio
+async def test_redis_cart_store():
+    """Test the Redis store's line updates, expiry refresh and deletes against fakeredis (with Lua)."""
+    fakeredis = pytest.importorskip("fakeredis")
+    store = RedisCartStore("redis://unused", ttl=60, client=fakeredis.FakeAsyncRedis())
+    try:
+        await store.create("a", {1: 2})
+        await store.create("empty", {})
+
+        assert await store.update_item("a", 1, 3) == 5
+        assert await store.update_item("a", 2, 1, add=False) == 1
+        assert await store.update_item("a", 1, -5) == 0
+        assert await store.get("a") == {2: 1}
+        assert await store.get("empty") == {}
+        assert await store.update_item("missing", 1, 1) is None
+        assert await store.get("missing") is None
+        assert 0 < await store.client.pttl(store.prefix + "a") <= 60_000
+
+        assert await store.delete("a") is True
+        assert await store.delete("a") is False
+        assert await store.get("a") is None
+
+        await store.create("b", {3: 1})
+        assert await store.claim("b") == {3: 1}
+        assert await store.claim("b") is None
+    finally:
+        await store.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+async def test_concurrent_checkouts_place_one_order(backend):
+    """Test that two checkouts of one cart at once place a single order, and a rejected one puts the cart back."""
+    store = InMemoryCartStore(ttl=60)
+    if backend == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        store = RedisCartStore("redis://unused", ttl=60, client=fakeredis.FakeAsyncRedis())
+    orders = []
+
+    async def create_order(session, order_data):
+        # Slow enough that the second checkout runs while the first is ordering
+        await asyncio.sleep(0.05)
+        orders.append(order_data)
+        return {"id": len(orders)}
+
+    async def reject_order(session, order_data):
+        raise ValidationException(message="Insufficient stock")
+
+    try:
+        await store.create("cart", {1: 2})
+        results = await asyncio.gather(
+            checkout_cart(None, store, cart_id="cart", create_order=create_order),
+            checkout_cart(None, store, cart_id="cart", create_order=create_order),
+            return_exceptions=True,
+        )
+
+        assert len(orders) == 1
+        assert len([result for result in results if isinstance(result, ResourceNotFoundException)]) == 1
+        assert await store.get("cart") is None
+
+        await store.create("rejected", {1: 2})
+        with pytest.raises(ValidationException):
+            await checkout_cart(None, store, cart_id="rejected", create_order=reject_order)
+        assert await store.get("rejected") == {1: 2}
+    finally:
+        await store.close()
+
+
+def test_memory_cart_store_refuses_several_workers(monkeypatch):
+    """Test that the server will not start several workers that cannot see each other's carts."""
+    monkeypatch.setattr(settings, "CART_STORE_BACKEND", "memory")
+    check_worker_settings(1)
+    with pytest.raises(SystemExit, match="CART_STORE_BACKEND=redis"):
+        check_worker_settings(4)
+
+    monkeypatch.setattr(settings, "CART_STORE_BACKEND", "redis")
+    check_worker_settings(4)
+
+
+def test_unknown_backend_names_are_rejected():
+    """Test that a misspelt backend or log format fails settings validation instead of falling back silently."""
+    for name, value in (("CART_STORE_BACKEND", "rediss"), ("RATE_LIMIT_BACKEND", "Redis"), ("LOG_FORMAT", "jsonl")):
+        with pytest.raises(ValidationError, match=name):
+            Settings(**{name: value})
+
+
+@pytest.mark.asyncio
+async def test_cart_is_repriced_with_one_query(client: AsyncClient, db_session: AsyncSession, db_connection: AsyncConnection):
+    """Test that a cart view reads every line's current price and stock in one statement."""
+    products = [
+        await create_product(db_session, ProductCreate(name=f"Cart Product {i}", description="Cart", price=10, stock=3))
+        for i in range(3)
+    ]
+    ids = [p["id"] for p in products]
+
+    response = await client.post("/carts/", json={"items": [
+        {"product_id": ids[0], "quantity": 1}, {"product_id": ids[1], "quantity": 2}, {"product_id": ids[0], "quantity": 1},
+    ]})
+    assert response.status_code == 201
+    cart = response.json()
+    assert [(line["product_id"], line["quantity"]) for line in cart["items"]] == [(ids[0], 2), (ids[1], 2)]
+
+    response = await client.post(f"/carts/{cart['id']}/items", json={"product_id": ids[2], "quantity": 5})
+    assert response.json()["checkout_ready"] is False
+    assert response.json()["items"][2]["status"] == "insufficient_stock"
+
+    await client.patch(f"/products/{ids[0]}", json={"price": 12})
+
+    statements = []
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db_connection.sync_connection, "before_cursor_execute", count_statement)
+    try:
+        response = await client.get(f"/carts/{cart['id']}")
+    finally:
+        event.remove(db_connection.sync_connection, "before_cursor_execute", count_statement)
+
+    assert len([s for s in statements if "FROM product" in s]) == 1
+    cart = response.json()
+    assert [line["unit_price"] for line in cart["items"]] == [12, 10, 10]
+    assert cart["total_price"] == 12 * 2 + 10 * 2 + 10 * 5
+
+
+@pytest.mark.asyncio
+async def test_cart_checkout(client: AsyncClient, db_session: AsyncSession):
+    """Test that a rejected checkout keeps the cart and a successful one places the order and deletes it."""
+    product = await create_product(db_session, ProductCreate(name="Checkout Product", description="Cart", price=7, stock=2))
+    cart = (await client.post("/carts/", json={"items": [{"product_id": product["id"], "quantity": 3}]})).json()
+
+    response = await client.post(f"/carts/{cart['id']}/checkout")
+    assert response.status_code == 400
+    assert response.json()["error"].startswith(f"Insufficient stock for Product ID {product['id']}")
+
+    response = await client.put(f"/carts/{cart['id']}/items/{product['id']}", json={"quantity": 2})
+    assert response.json()["checkout_ready"] is True
+
+    response = await client.post(f"/carts/{cart['id']}/checkout")
+    assert response.status_code == 201
+    order = response.json()
+    assert order["total_price"] == 14
+    assert [(item["product_id"], item["quantity"]) for item in order["items"]] == [(product["id"], 2)]
+
+    assert (await client.get(f"/carts/{cart['id']}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_cart_errors(client: AsyncClient):
+    """Test unknown carts and products."""
+    assert (await client.get("/carts/unknown")).status_code == 404
+    assert (await client.delete("/carts/unknown")).status_code == 404
+
+    response = await client.post("/carts/", json={"items": [{"product_id": 999999999, "quantity": 1}]})
+    assert response.status_code == 400
+    assert response.json() == {"error": "Products not found for IDs: 999999999"}
+
+    cart = (await client.post("/carts/", json={})).json()
+    assert cart["items"] == [] and cart["checkout_ready"] is False
+    response = await client.post(f"/carts/{cart['id']}/items", json={"product_id": 999999999, "quantity": 1})
+    assert response.status_code == 400
+    assert (await client.delete(f"/carts/{cart['id']}")).status_code == 204
@@ -0,0 +1,152 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from collections import namedtuple
+from typing import AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, or_, select, text
+from httpx import AsyncClient
+from api.v1.routes.changes import format_sse
+from models.events import ChangeEvent, EntityType
+from models.orders import Order, OrderCreate, OrderItem, OrderItemCreate
+from models.products import Product, ProductCreate
+from services.changes import coalesce_events, read_changes
+from services.orders import create_order, create_order_cte
+from services.products import create_product
+from utils.exceptions import ValidationException
+
+Row = namedtuple("Row", "id transaction_id entity_type entity_id event_type payload created_at")
+
+
+# The feed only serves committed transactions, so these tests use real commits
+# (feed_session) instead of the rolled back db_session.
+
+FEED_DESCRIPTION = "Feed"
+
+
+@pytest_asyncio.fixture(scope="function")
+async def feed_session(committed_session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """committed_session; afterwards deletes the products these tests commit, their orders and change events."""
+    yield committed_session
+    await committed_session.rollback()
+    product_ids = list((await committed_session.execute(select(Product.id).where(Product.description == FEED_DESCRIPTION))).scalars())
+    order_ids = list((await committed_session.execute(select(OrderItem.order_id).where(OrderItem.product_id.in_(product_ids)).distinct())).scalars())
+    await committed_session.execute(delete(ChangeEvent).where(or_(
+        (ChangeEvent.entity_type == EntityType.ORDER) & ChangeEvent.entity_id.in_(order_ids),
+        (ChangeEvent.entity_type == EntityType.PRODUCT) & ChangeEvent.entity_id.in_(product_ids),
+    )))
+    await committed_session.execute(delete(Order).where(Order.id.in_(order_ids)))
+    await committed_session.execute(delete(Product).where(Product.id.in_(product_ids)))
+    await committed_session.commit()
+
+
+async def current_sequence(session: AsyncSession) -> int:
+    result = await session.execute(text("SELECT coalesce(max(transaction_id), 0) FROM changeevent"))
+    sequence = result.scalar()
+    await session.rollback()
+    return sequence
+
+
+async def wait_for_horizon(session: AsyncSession, timeout: float = 10):
+    """Wait until every transaction started so far has finished.
+
+    The feed's horizon is cluster-wide, so transactions held open by tests in
+    other xdist workers can briefly delay it.
+    """
+    xmax = (await session.execute(text("SELECT CAST(CAST(pg_snapshot_xmax(pg_current_snapshot()) AS text) AS bigint)"))).scalar()
+    await session.rollback()
+    for _ in range(int(timeout / 0.05)):
+        xmin = (await session.execute(text("SELECT CAST(CAST(pg_snapshot_xmin(pg_current_snapshot()) AS text) AS bigint)"))).scalar()
+        await session.rollback()
+        if xmin >= xmax:
+            return
+        await asyncio.sleep(0.05)
+    raise AssertionError("Transaction horizon did not advance")
+
+
+def test_coalesce_events_merges_deltas_per_entity():
+    """Test that events of one entity merge into one delta placed at its latest change."""
+    rows = [
+        Row(1, 10, "product", 1, "product.created", {"name": "A", "stock": 5}, None),
+        Row(2, 11, "product", 2, "product.changed", {"stock": 3}, None),
+        Row(3, 12, "product", 1, "product.changed", {"stock": 4}, None),
+        Row(4, 12, "order", 9, "order.created", {"total_price": 1.5}, None),
+        Row(5, 13, "product", 2, "product.changed", {"price": 2.5}, None),
+    ]
+
+    events = coalesce_events(rows)
+
+    assert [(e["entity_type"], e["entity_id"], e["sequence"]) for e in events] == [("product", 1, 12), ("order", 9, 12), ("product", 2, 13)]
+    assert events[0]["event_type"] == "product.created"
+    assert events[0]["payload"] == {"name": "A", "stock": 4}
+    assert events[2]["payload"] == {"stock": 3, "price": 2.5}
+
+
+def test_format_sse_sets_id_only_on_batch_boundary():
+    """Test SSE framing with and without a resumable id."""
+    event = {"event_type": "product.changed", "entity_id": 1, "payload": {"stock": 2}}
+
+    assert format_sse(event, None).startswith("event: product.changed\ndata: ")
+    assert "\nid: 42\n" in format_sse(event, 42)
+    assert format_sse(event, 42).endswith("\n\n")
+
+
+@pytest.mark.asyncio
+async def test_product_and_order_writes_emit_coalesced_events(feed_session: AsyncSession):
+    """Test that both order write paths add outbox events in the same transaction."""
+    session = feed_session
+    after = await current_sequence(session)
+    product = await create_product(session, ProductCreate(name="Feed Product", description=FEED_DESCRIPTION, price=10, stock=10))
+
+    await create_order(session, OrderCreate(items=[OrderItemCreate(product_id=product["id"], quantity=2)]))
+    cte_order = await create_order_cte(session, OrderCreate(items=[OrderItemCreate(product_id=product["id"], quantity=3)]))
+
+    await wait_for_horizon(session)
+    changes = await read_changes(session, after=after, limit=100)
+    events = {(e["entity_type"], e["entity_id"]): e for e in changes["events"]}
+
+    product_event = events[("product", product["id"])]
+    assert product_event["event_type"] == "product.created"
+    assert product_event["payload"]["name"] == "Feed Product"
+    assert product_event["payload"]["stock"] == 5
+    assert product_event["sequence"] == changes["next_sequence"]
+
+    order_event = events[("order", cte_order["id"])]
+    assert order_event["payload"]["total_price"] == 30
+    assert order_event["payload"]["status"] == "pending"
+    assert order_event["payload"]["items"] == [{"product_id": product["id"], "quantity": 3, "price": 10}]
+    assert len([e for e in changes["events"] if e["event_type"] == "order.created"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_rejected_order_emits_no_events(feed_session: AsyncSession):
+    """Test that a rolled back order leaves nothing in the outbox."""
+    session = feed_session
+    product = await create_product(session, ProductCreate(name="Quiet Product", description=FEED_DESCRIPTION, price=10, stock=1))
+    after = await current_sequence(session)
+
+    for writer in (create_order, create_order_cte):
+        with pytest.raises(ValidationException):
+            await writer(session, OrderCreate(items=[OrderItemCreate(product_id=product["id"], quantity=5)]))
+
+    await wait_for_horizon(session)
+    changes = await read_changes(session, after=after, limit=100)
+    assert changes["events"] == []
+    assert changes["next_sequence"] == after
+
+
+@pytest.mark.asyncio
+async def test_change_feed_endpoint_resumes_from_sequence(client: AsyncClient, feed_session: AsyncSession):
+    """Test that the feed returns new events once and then long-polls to an empty batch."""
+    after = await current_sequence(feed_session)
+    await create_product(feed_session, ProductCreate(name="Polled Product", description=FEED_DESCRIPTION, price=5, stock=1))
+    await wait_for_horizon(feed_session)
+
+    response = await client.get("/changes/", params={"after": after})
+    assert response.status_code == 200
+    body = response.json()
+    assert [e["payload"]["name"] for e in body["events"]] == ["Polled Product"]
+
+    response = await client.get("/changes/", params={"after": body["next_sequence"], "wait": 0.2})
+    assert response.status_code == 200
+    assert response.json() == {"events": [], "next_sequence": body["next_sequence"]}
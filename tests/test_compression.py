@@ -0,0 +1,102 @@
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from middlewares.compression import CompressionMiddleware, select_encoding, GzipCompressor
+
+LARGE_BODY = "fastcart " * 500
+
+compression_app = FastAPI()
+compression_app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+@compression_app.get("/large", response_class=PlainTextResponse)
+async def large():
+    return LARGE_BODY
+
+@compression_app.get("/small", response_class=PlainTextResponse)
+async def small():
+    return "ok"
+
+@compression_app.get("/stream")
+async def stream():
+    async def chunks():
+        for _ in range(5):
+            yield LARGE_BODY
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+@compression_app.get("/events")
+async def events():
+    async def chunks():
+        yield "data: " + LARGE_BODY + "\n\n"
+
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+def raw_client():
+    return AsyncClient(transport=ASGITransport(app=compression_app), base_url="http://test")
+
+
+def test_select_encoding_respects_quality_values():
+    """Test that the highest q-value wins and server order breaks ties."""
+    encodings = {"zstd": None, "br": None, "gzip": GzipCompressor}
+
+    assert select_encoding("gzip, br", encodings) == "br"
+    assert select_encoding("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+    assert select_encoding("br;q=0, gzip;q=0", encodings) is None
+    assert select_encoding("*", encodings) == "zstd"
+    assert select_encoding("", encodings) is None
+
+
+@pytest.mark.asyncio
+async def test_large_response_is_gzip_compressed():
+    """Test that responses above the threshold are compressed."""
+    async with raw_client() as client:
+        response = await client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(LARGE_BODY)
+    assert response.text == LARGE_BODY
+
+
+@pytest.mark.asyncio
+async def test_small_response_is_not_compressed():
+    """Test that responses below the threshold are sent as-is."""
+    async with raw_client() as client:
+        response = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text == "ok"
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_is_compressed():
+    """Test that streamed chunks are compressed into a single valid gzip stream."""
+    async with raw_client() as client:
+        response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == LARGE_BODY * 5
+
+
+@pytest.mark.asyncio
+async def test_event_stream_is_not_compressed():
+    """Test that server-sent event streams bypass compression."""
+    async with raw_client() as client:
+        response = await client.get("/events", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text.startswith("data: ")
+
+
+def test_gzip_compressor_flush_produces_decodable_prefix():
+    """Test that a sync flush lets clients decode streamed data before the response ends."""
+    compressor = GzipCompressor(level=6)
+    prefix = compressor.compress(LARGE_BODY.encode()) + compressor.flush()
+    full = prefix + compressor.finish()
+
+    assert gzip.decompress(full).decode() == LARGE_BODY
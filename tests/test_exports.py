@@ -0,0 +1,135 @@
+import json
+from datetime import timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlmodel import delete, func, or_, select
+from httpx import AsyncClient
+from config import settings
+from db.sql import get_export_engine
+from main import app
+from models.events import ChangeEvent, EntityType
+from models.orders import Order, OrderCreate, OrderItemCreate
+from models.products import Product, ProductCreate
+from services.exports import iter_order_chunks
+from services.orders import create_order
+from services.products import create_product
+from tools.export_orders import MANIFEST_NAME, export_orders, save_manifest
+from utils.helpers import get_current_timestamp
+
+async def create_orders(session: AsyncSession, count: int):
+    """`count` two-item orders; returns the id of the last order that existed before them, and the product ids."""
+    last_order_id = (await session.execute(select(func.coalesce(func.max(Order.id), 0)))).scalar()
+    products = [
+        await create_product(session, ProductCreate(name=f"Export Product {i}", description="Exported", price=10 + i, stock=1000))
+        for i in range(2)
+    ]
+    for _ in range(count):
+        await create_order(session, OrderCreate(items=[
+            OrderItemCreate(product_id=product['id'], quantity=2) for product in products
+        ]))
+    return last_order_id, [product['id'] for product in products]
+
+async def delete_orders(session: AsyncSession, after_id: int, product_ids):
+    """Remove committed orders after `after_id`, the products and their change events."""
+    order_ids = list((await session.execute(select(Order.id).where(Order.id > after_id))).scalars())
+    await session.execute(delete(ChangeEvent).where(or_(
+        (ChangeEvent.entity_type == EntityType.ORDER) & ChangeEvent.entity_id.in_(order_ids),
+        (ChangeEvent.entity_type == EntityType.PRODUCT) & ChangeEvent.entity_id.in_(product_ids),
+    )))
+    await session.execute(delete(Order).where(Order.id.in_(order_ids)))
+    await session.execute(delete(Product).where(Product.id.in_(product_ids)))
+    await session.commit()
+
+def export_range():
+    now = get_current_timestamp()
+    return now - timedelta(days=1), now + timedelta(days=1)
+
+
+@pytest.mark.asyncio
+async def test_order_chunks_never_split_an_order(db_connection: AsyncConnection, db_session: AsyncSession):
+    """Test that chunks end on order boundaries even when smaller than an order."""
+    after_id, _ = await create_orders(db_session, 3)
+    start, end = export_range()
+
+    chunks = [chunk async for chunk in iter_order_chunks(db_connection, start, end, after_id=after_id, chunk_size=3)]
+
+    order_ids = [[row.order_id for row in chunk] for chunk in chunks]
+    assert sum(len(ids) for ids in order_ids) == 6
+    for index, ids in enumerate(order_ids[:-1]):
+        assert ids[-1] < order_ids[index + 1][0]
+    assert all(row.status == "pending" and row.product_name.startswith("Export Product") for chunk in chunks for row in chunk)
+
+
+@pytest.mark.asyncio
+async def test_export_orders_to_parquet_and_resume(db_connection: AsyncConnection, db_session: AsyncSession, tmp_path):
+    """Test that the export writes one Parquet file per chunk and a rerun resumes after the manifest's last order."""
+    after_id, _ = await create_orders(db_session, 4)
+    start, end = export_range()
+    # Only this test's orders
+    start = (await db_session.execute(select(func.min(Order.created_at)).where(Order.id > after_id))).scalar()
+
+    manifest = await export_orders(db_connection, str(tmp_path), start, end, chunk_size=3, workers=2)
+
+    assert manifest["complete"] is True
+    assert manifest["rows"] == 8
+    assert len(manifest["files"]) == 4
+    table = pa.concat_tables([pq.read_table(tmp_path / name) for name in manifest["files"]])
+    assert table.column("order_id").to_pylist() == sorted(table.column("order_id").to_pylist())
+    assert table.column("unit_price").type == pa.decimal128(12, 2)
+
+    # As if the run had stopped after the first chunk
+    first_chunk = pq.read_table(tmp_path / manifest["files"][0])
+    save_manifest(str(tmp_path), {
+        **manifest,
+        "files": manifest["files"][:1],
+        "rows": first_chunk.num_rows,
+        "last_order_id": max(first_chunk.column("order_id").to_pylist()),
+        "complete": False,
+    })
+
+    resumed = await export_orders(db_connection, str(tmp_path), start, end, chunk_size=3, workers=2)
+
+    assert resumed["files"] == manifest["files"]
+    assert resumed["rows"] == 8
+    assert json.loads((tmp_path / MANIFEST_NAME).read_text())["complete"] is True
+
+    with pytest.raises(ValueError):
+        await export_orders(db_connection, str(tmp_path), start, end, export_format="arrow")
+
+
+@pytest.mark.asyncio
+async def test_export_orders_endpoint(client: AsyncClient, committed_session: AsyncSession, monkeypatch):
+    """Test that the admin export requires the admin key and streams committed orders as Arrow IPC on a connection of its own."""
+    after_id, product_ids = await create_orders(committed_session, 3)
+    start, end = export_range()
+    params = {"start": start.isoformat(), "end": end.isoformat(), "after_id": after_id, "chunk_size": 2}
+    # The stream must not depend on the request's session, which is closed before the body is sent
+    app.dependency_overrides[get_export_engine] = lambda: committed_session.bind
+    try:
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "")
+        assert (await client.get("/admin/exports/orders", params=params, headers={"X-Admin-Key": ""})).status_code == 403
+
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "secret")
+        assert (await client.get("/admin/exports/orders", params=params, headers={"X-Admin-Key": "wrong"})).status_code == 403
+
+        response = await client.get("/admin/exports/orders", params=params, headers={"X-Admin-Key": "secret"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.num_rows == 6
+        assert len(set(table.column("order_id").to_pylist())) == 3
+    finally:
+        app.dependency_overrides.pop(get_export_engine, None)
+        await delete_orders(committed_session, after_id, product_ids)
+
+
+@pytest.mark.asyncio
+async def test_export_orders_endpoint_mixed_offsets(client: AsyncClient, monkeypatch):
+    """Test that a range bound without an offset is taken as UTC when compared with one that has it."""
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "secret")
+    params = {"start": "2026-01-02T00:00:00", "end": "2026-01-01T00:00:00+00:00"}
+    response = await client.get("/admin/exports/orders", params=params, headers={"X-Admin-Key": "secret"})
+    assert response.status_code == 400
+    assert "end must be after start" in response.text
@@ -0,0 +1,63 @@
+import json
+import logging
+import queue
+from logging.handlers import QueueListener
+import utils.logger
+from utils.logger import JsonFormatter, RateLimitFilter, RequestIdFilter, request_id_var, stop_logging
+
+
+def make_record(msg: str = "Exception in create_order ==> %s", level: int = logging.ERROR) -> logging.LogRecord:
+    return logging.LogRecord("app", level, __file__, 1, msg, ("boom",), None)
+
+
+def test_rate_limit_filter_suppresses_bursts_and_reports_count():
+    """Test that repeated errors past the burst are dropped and counted on the next emitted record."""
+    rate_limit = RateLimitFilter(rate=1e-9, burst=2)  # effectively no refill during the test
+
+    results = [rate_limit.filter(make_record()) for _ in range(5)]
+    assert results == [True, True, False, False, False]
+
+    rate_limit.rate = 1e9  # refill immediately
+    record = make_record()
+    assert rate_limit.filter(record)
+    assert record.suppressed == 3
+
+
+def test_rate_limit_filter_ignores_info_records():
+    """Test that records below WARNING are never rate limited."""
+    rate_limit = RateLimitFilter(rate=1e-9, burst=0)
+
+    assert all(rate_limit.filter(make_record(level=logging.INFO)) for _ in range(10))
+
+
+def test_json_formatter_includes_request_id():
+    """Test that JSON log lines carry the request ID bound to the current context."""
+    token = request_id_var.set("req-123")
+    try:
+        record = make_record()
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["request_id"] == "req-123"
+    assert entry["level"] == "ERROR"
+    assert entry["message"] == "Exception in create_order ==> boom"
+
+
+def test_stop_logging_flushes_once(monkeypatch):
+    """Test that stopping logging writes out queued records and that a second stop does nothing."""
+    log_queue, records = queue.Queue(), []
+    handler = logging.Handler()
+    handler.emit = records.append
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    monkeypatch.setattr(utils.logger, "log_listener", listener)
+    monkeypatch.setattr(utils.logger, "_listener_running", True)
+
+    log_queue.put(logging.makeLogRecord({"msg": "queued"}))
+    stop_logging()
+    stop_logging()
+
+    assert [record.getMessage() for record in records] == ["queued"]
@@ -1,11 +1,12 @@
 import pytest
+from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 from httpx import AsyncClient
-from models.products import Product, ProductCreate
+from models.products import Product, ProductCreate, OrderWithProductRead
 from models.orders import Order, OrderCreate, OrderItemCreate, OrderStatus
 from services.products import create_product
-from services.orders import create_order
+from services.orders import create_order, create_order_cte
 from utils.exceptions import ValidationException
 
 
@@ -86,7 +87,7 @@ async def test_create_order_with_client_success(client: AsyncClient, db_session:
 
     assert response.status_code == 201
     assert response_data['id'] > 0
-    assert response_data["total_price"] == total_price
+    assert Decimal(str(response_data["total_price"])) == total_price
     assert len(response_data["items"]) == len(order_data['items'])
     assert response_data["items"][0]["product_id"] == db_product.id
     assert response_data["items"][0]["quantity"] == db_product.stock
@@ -152,3 +153,72 @@ async def test_create_order_with_negative_quantity(client: AsyncClient, db_sessi
 
     assert response.status_code == 422
     assert response.json()['detail'][0]['msg'] == "Input should be greater than 0"
+
+
+@pytest.mark.asyncio
+async def test_create_order_cte_matches_orm_result(db_session: AsyncSession):
+    """Test that the single-statement order path returns the same shape and values as the ORM path."""
+    products = [
+        {"name": "CTE Product One", "description": "CTE Product One Description", "price": 10, "stock": 10},
+        {"name": "CTE Product Two", "description": "CTE Product Two Description", "price": 20, "stock": 5},
+    ]
+    created_products = [await create_product(db_session, ProductCreate(**p)) for p in products]
+
+    order_items = [
+        OrderItemCreate(product_id=created_products[0]['id'], quantity=3),
+        OrderItemCreate(product_id=created_products[1]['id'], quantity=2),
+        OrderItemCreate(product_id=created_products[0]['id'], quantity=1),
+    ]
+    created_order = await create_order_cte(db_session, order_data=OrderCreate(items=order_items))
+
+    assert created_order['id'] > 0
+    assert created_order['status'] == OrderStatus.PENDING
+    assert created_order['total_price'] == 4 * 10 + 2 * 20
+    assert [item['product_id'] for item in created_order['items']] == [p['id'] for p in created_products]
+    assert [item['quantity'] for item in created_order['items']] == [4, 2]
+    assert created_order['items'][0]['product_name'] == "CTE Product One"
+    assert created_order['items'][1]['price'] == 20
+    OrderWithProductRead.model_validate(created_order)
+
+    db_order = (await db_session.execute(select(Order).where(Order.id == created_order["id"]))).scalars().first()
+    assert db_order.total_price == 80
+
+    stmt = select(Product.stock).where(Product.id.in_([p['id'] for p in created_products])).order_by(Product.id)
+    assert (await db_session.execute(stmt)).scalars().all() == [6, 3]
+
+
+@pytest.mark.asyncio
+async def test_create_order_cte_insufficient_stock(db_session: AsyncSession):
+    """Test that the single-statement path raises the same insufficient stock error and writes nothing."""
+    product_data = ProductCreate(name="CTE Product Low", description="Low stock", price=10, stock=2)
+    created_product = await create_product(db_session, product_data=product_data)
+    other_product = await create_product(db_session, ProductCreate(name="CTE Product Other", price=5, stock=50))
+
+    order_data = OrderCreate(items=[
+        OrderItemCreate(product_id=other_product['id'], quantity=1),
+        OrderItemCreate(product_id=created_product['id'], quantity=3),
+    ])
+    expected_msg = (
+        f"Insufficient stock for Product ID {created_product['id']}. "
+        f"Requested: 3, Available: 2"
+    )
+
+    with pytest.raises(ValidationException, match=expected_msg):
+        await create_order_cte(db_session, order_data=order_data)
+
+    stmt = select(Product.stock).where(Product.id == other_product['id'])
+    assert (await db_session.execute(stmt)).scalar() == 50
+
+
+@pytest.mark.asyncio
+async def test_create_order_cte_missing_products(db_session: AsyncSession):
+    """Test that the single-statement path reports missing products like the ORM path."""
+    created_product = await create_product(db_session, ProductCreate(name="CTE Product Present", price=5, stock=5))
+    order_data = OrderCreate(items=[
+        OrderItemCreate(product_id=999998, quantity=1),
+        OrderItemCreate(product_id=created_product['id'], quantity=1),
+        OrderItemCreate(product_id=999999, quantity=1),
+    ])
+
+    with pytest.raises(ValidationException, match="Products not found for IDs: 999998, 999999"):
+        await create_order_cte(db_session, order_data=order_data)
@@ -0,0 +1,70 @@
+import pytest
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import text
+from db.partitions import add_months, default_partitions_with_rows, ensure_partitions, list_partitions, partition_month, partitions_older_than
+
+
+def test_month_arithmetic_and_partition_names():
+    """Test month helpers across year boundaries and partition name parsing."""
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partition_month("order_p2025_07") == date(2025, 7, 1)
+    assert partition_month("orderitem_p2025_07") == date(2025, 7, 1)
+    assert partition_month("order_default") is None
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_creates_future_months(db_session: AsyncSession):
+    """Test that monthly partitions are created for both tables, once."""
+    conn = await db_session.connection()
+
+    created = await ensure_partitions(conn, months_ahead=1, start=date(2100, 1, 15))
+
+    assert created == ["order_p2100_01", "order_p2100_02", "orderitem_p2100_01", "orderitem_p2100_02"]
+    assert "orderitem_p2100_02" in await list_partitions(conn, "orderitem")
+    assert await ensure_partitions(conn, months_ahead=1, start=date(2100, 1, 1)) == []
+    assert "order_p2100_01" in await partitions_older_than(conn, "order", date(2100, 2, 1))
+    assert "order_p2100_02" not in await partitions_older_than(conn, "order", date(2100, 2, 1))
+
+    await db_session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_created_at_range_prunes_to_one_partition(db_session: AsyncSession):
+    """Test that a query bounded by created_at only scans the matching partition."""
+    conn = await db_session.connection()
+    await ensure_partitions(conn, months_ahead=2, start=date(2100, 1, 1))
+
+    results = await conn.execute(text("""
+        EXPLAIN SELECT o.id, oi.product_id
+        FROM "order" AS o
+        JOIN orderitem AS oi ON oi.order_id = o.id AND oi.order_created_at = o.created_at
+        WHERE o.created_at >= '2100-02-01' AND o.created_at < '2100-03-01'
+          AND oi.order_created_at >= '2100-02-01' AND oi.order_created_at < '2100-03-01'
+    """))
+    plan = "\n".join(results.scalars())
+
+    assert "order_p2100_02" in plan
+    assert "orderitem_p2100_02" in plan
+    assert "order_p2100_01" not in plan
+    assert "order_p2100_03" not in plan
+    assert "order_default" not in plan
+
+    await db_session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_default_partitions_with_rows(db_session: AsyncSession):
+    """Test that an order outside every monthly partition is reported in the default partition."""
+    conn = await db_session.connection()
+    assert await default_partitions_with_rows(conn) == []
+
+    await conn.execute(text("""
+        INSERT INTO "order" (total_price, status, created_at, updated_at)
+        VALUES (1, 'PENDING', '2300-01-01', now())
+    """))
+
+    assert await default_partitions_with_rows(conn) == ["order_default"]
+
+    await db_session.rollback()
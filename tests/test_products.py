@@ -1,10 +1,16 @@
+import asyncio
 import pytest
+from datetime import datetime
+from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlmodel import delete, select, text
 from pydantic import ValidationError
-from models.products import Product, ProductCreate
+from config import Settings
+from models.events import ChangeEvent, EntityType
+from models.products import Product, ProductAdjustment, ProductCreate
 from httpx import AsyncClient
-from services.products import create_product
+from services.products import adjust_products, create_product
+from utils.exceptions import ConflictException
 
 
 def test_create_product_missing_fields():
@@ -15,7 +21,7 @@ def test_create_product_missing_fields():
     errors = exc_info.value.errors()
     assert len(errors) == 3
     assert errors[0]["msg"].lower() == "input should be a valid string"
-    assert errors[1]["msg"].lower() == "input should be a valid number"
+    assert errors[1]["msg"].lower() == "decimal input should be an integer, float, string or decimal object"
     assert errors[2]["msg"].lower() == "input should be a valid integer"
 
 
@@ -37,6 +43,18 @@ def test_create_product_invalid_values():
     assert errors[3]["msg"].lower() == "input should be greater than or equal to 0"
 
 
+def test_create_product_price_precision():
+    """Test that prices are exact decimals limited to whole cents."""
+    product = ProductCreate(name="Precise Product", price=19.99, stock=1)
+    assert product.price == Decimal("19.99")
+    assert product.model_dump(mode="json")["price"] == 19.99
+
+    with pytest.raises(ValidationError) as exc_info:
+        ProductCreate(name="Precise Product", price=19.999, stock=1)
+
+    assert exc_info.value.errors()[0]["msg"].lower() == "decimal input should have no more than 2 decimal places"
+
+
 @pytest.mark.asyncio
 async def test_create_product_success(db_session: AsyncSession):
     """Test successfully creating a product in the database."""
@@ -107,3 +125,153 @@ async def test_list_products(client: AsyncClient):
     assert isinstance(response_data['data'], list)
     if response_data['data']:
         assert response_data['data'][0]['id'] > 0
+
+
+@pytest.mark.asyncio
+async def test_update_product_with_client(client: AsyncClient, db_session: AsyncSession):
+    """Test a partial update and the optimistic concurrency check on updated_at."""
+    product = await create_product(db_session, ProductCreate(name="Patch Product", description="Old", price=10, stock=5))
+
+    response = await client.patch(f"/products/{product['id']}", json={"price": 12.5, "description": " New "})
+    assert response.status_code == 200
+    updated = response.json()
+    assert (updated["name"], updated["description"], updated["price"], updated["stock"]) == ("Patch Product", "New", 12.5, 5)
+
+    response = await client.patch(f"/products/{product['id']}", json={"stock": 4, "expected_updated_at": updated["updated_at"]})
+    assert response.status_code == 200
+    assert response.json()["stock"] == 4
+    latest = response.json()
+
+    # Still carries the first response's timestamp
+    response = await client.patch(f"/products/{product['id']}", json={"stock": 3, "expected_updated_at": updated["updated_at"]})
+    assert response.status_code == 409
+
+    # A timestamp without an offset is taken as UTC
+    naive_updated_at = datetime.fromisoformat(latest["updated_at"].replace("Z", "+00:00")).replace(tzinfo=None).isoformat()
+    response = await client.patch(f"/products/{product['id']}", json={"low_stock_threshold": 1, "expected_updated_at": naive_updated_at})
+    assert response.status_code == 200
+
+    db_product = (await db_session.execute(select(Product).where(Product.id == product["id"]))).scalars().one()
+    await db_session.refresh(db_product)
+    assert (db_product.price, db_product.stock) == (Decimal("12.50"), 4)
+
+
+@pytest.mark.asyncio
+async def test_update_product_errors(client: AsyncClient):
+    """Test that unknown products are 404s and required fields cannot be nulled."""
+    response = await client.patch("/products/999999999", json={"stock": 1})
+    assert response.status_code == 404
+
+    response = await client.patch("/products/999999999", json={"name": None})
+    assert response.status_code == 400
+    assert response.json() == {"error": "Fields cannot be null: name"}
+
+
+@pytest.mark.asyncio
+async def test_adjust_products_all_or_nothing(client: AsyncClient, db_session: AsyncSession):
+    """Test that a bulk adjustment applies every item in one statement or none of them."""
+    products = [
+        await create_product(db_session, ProductCreate(name=f"Bulk Product {i}", description="Bulk", price=10, stock=5))
+        for i in range(3)
+    ]
+    ids = [p["id"] for p in products]
+
+    response = await client.post("/products/adjustments", json={"items": [
+        {"id": ids[0], "price": 11},
+        {"id": ids[1], "stock_delta": -5},
+        {"id": ids[2], "stock": 20, "price": 9.99},
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["updated"] == 3
+    assert [(i["id"], i["price"], i["stock"]) for i in body["items"]] == [(ids[0], 11, 5), (ids[1], 10, 0), (ids[2], 9.99, 20)]
+
+    response = await client.post("/products/adjustments", json={"items": [{"id": ids[0], "price": 1}, {"id": ids[1], "stock_delta": -1}]})
+    assert response.status_code == 400
+    assert response.json() == {"error": f"Stock cannot go below zero for Product IDs: {ids[1]}"}
+
+    response = await client.post("/products/adjustments", json={"items": [
+        {"id": ids[0], "price": 1, "expected_updated_at": body["items"][0]["updated_at"]},
+        {"id": ids[2], "price": 1, "expected_updated_at": "2000-01-01T00:00:00Z"},
+    ]})
+    assert response.status_code == 409
+
+    response = await client.post("/products/adjustments", json={"items": [{"id": ids[0], "price": 1}, {"id": ids[0], "stock": 1}]})
+    assert response.status_code == 400
+
+    prices = (await db_session.execute(select(Product.price).where(Product.id.in_(ids)).order_by(Product.id))).scalars().all()
+    assert prices == [Decimal("11.00"), Decimal("10.00"), Decimal("9.99")]
+
+
+@pytest.mark.asyncio
+async def test_adjustment_racing_a_committed_edit_is_a_conflict(committed_session: AsyncSession):
+    """Test that an edit committing while an adjustment waits for the row lock is a 409, not a negative stock error."""
+    product = await create_product(committed_session, ProductCreate(name="Raced Product", description="Race", price=10, stock=5))
+    read_at = (await committed_session.execute(select(Product.updated_at).where(Product.id == product["id"]))).scalar()
+    await committed_session.rollback()
+    engine = committed_session.bind
+    try:
+        async with engine.connect() as editor, AsyncSession(engine) as session:
+            await editor.execute(text("UPDATE product SET price = 11, updated_at = clock_timestamp() WHERE id = :id"), {"id": product["id"]})
+            adjustment = asyncio.ensure_future(adjust_products(session, [
+                ProductAdjustment(id=product["id"], stock_delta=1, expected_updated_at=read_at),
+            ]))
+            # Let the adjustment take its snapshot and block on the editor's row lock
+            await asyncio.sleep(0.3)
+            await editor.commit()
+
+            with pytest.raises(ConflictException):
+                await adjustment
+    finally:
+        await committed_session.execute(delete(ChangeEvent).where(ChangeEvent.entity_type == EntityType.PRODUCT, ChangeEvent.entity_id == product["id"]))
+        await committed_session.execute(delete(Product).where(Product.id == product["id"]))
+        await committed_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_list_products_filters_and_keyset_pages(client: AsyncClient, db_session: AsyncSession):
+    """Test price/in-stock filters with price sorting, paged by cursor across equal prices."""
+    for name, price, stock in [("Facet A", 5, 3), ("Facet B", 15, 0), ("Facet C", 30, 1), ("Facet D", 30, 2), ("Facet E", 120, 5)]:
+        await create_product(db_session, ProductCreate(name=name, description="Facetword", price=price, stock=stock))
+
+    params = {"query": "Facetword", "min_price": 10, "max_price": 200, "in_stock": True, "sort_by": "price", "page_size": 2}
+    response = await client.get("/products/", params=params)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert first_page["total_records"] == 3
+    # Equal prices fall back to newest first
+    assert [p["name"] for p in first_page["data"]] == ["Facet D", "Facet C"]
+
+    response = await client.get("/products/", params={**params, "cursor": first_page["next_cursor"]})
+    second_page = response.json()
+    assert [p["name"] for p in second_page["data"]] == ["Facet E"]
+    assert second_page["next_cursor"] is None
+
+    response = await client.get("/products/", params={**params, "sort_by": "-stock", "cursor": first_page["next_cursor"]})
+    assert response.status_code == 400
+
+    response = await client.get("/products/", params={"min_price": 10, "max_price": 5})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("boundaries", [[], [10, 25, 25], [50, 10]])
+def test_price_facet_boundaries_must_increase(boundaries):
+    """Test that empty or unordered facet price boundaries are rejected when settings load."""
+    with pytest.raises(ValidationError):
+        Settings(PRODUCT_PRICE_FACET_BOUNDARIES=boundaries)
+
+
+@pytest.mark.asyncio
+async def test_product_facets(client: AsyncClient, db_session: AsyncSession):
+    """Test that each facet count ignores its own filter but applies the others."""
+    for name, price, stock in [("Bucket A", 5, 3), ("Bucket B", 15, 0), ("Bucket C", 30, 1), ("Bucket D", 1000, 2)]:
+        await create_product(db_session, ProductCreate(name=name, description="Bucketword", price=price, stock=stock))
+
+    response = await client.get("/products/facets", params={"query": "Bucketword", "in_stock": True, "max_price": 20})
+    assert response.status_code == 200
+    facets = response.json()
+    assert facets["total_records"] == 1
+    assert facets["in_stock"] == 1
+    assert [(b["min_price"], b["max_price"], b["count"]) for b in facets["price_buckets"]] == [
+        (None, 10, 1), (10, 25, 0), (25, 50, 1), (50, 100, 0), (100, 250, 0), (250, 500, 0), (500, None, 1),
+    ]
@@ -0,0 +1,103 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlmodel import delete, text
+from httpx import AsyncClient
+from db.sql import TimeoutSession, query_timeout_reason, request_query_timeouts
+from middlewares.query_limits import QueryLimitsMiddleware
+from models.products import Product, ProductCreate
+from services.products import create_product
+from utils.metrics import metrics
+
+
+def test_route_timeouts_fall_back_to_defaults():
+    """Test that a route overriding one timeout keeps the default for the other."""
+    middleware = QueryLimitsMiddleware(
+        app=None,
+        statement_timeouts={"GET /api/v1/products": 3000},
+        lock_timeouts={"POST /api/v1/orders": 1000},
+        default_statement_timeout=30000,
+    )
+
+    assert middleware.route_timeouts("GET", "/api/v1/products") == (3000, 0)
+    assert middleware.route_timeouts("POST", "/api/v1/orders") == (30000, 1000)
+    assert middleware.route_timeouts("GET", "/api/v1/changes") is None
+
+
+def timeout_session(conn: AsyncConnection) -> AsyncSession:
+    return AsyncSession(bind=conn, join_transaction_mode="create_savepoint", sync_session_class=TimeoutSession)
+
+
+@pytest.mark.asyncio
+async def test_request_timeouts_apply_to_each_transaction(db_connection: AsyncConnection):
+    """Test that the request's statement timeout is set locally and surfaces as a timeout."""
+    token = request_query_timeouts.set((50, 0))
+    try:
+        async with timeout_session(db_connection) as session:
+            assert (await session.execute(text("SHOW statement_timeout"))).scalar() == "50ms"
+            with pytest.raises(DBAPIError) as exc_info:
+                await session.execute(text("SELECT pg_sleep(1)"))
+            assert query_timeout_reason(exc_info.value) == "statement_timeout"
+    finally:
+        request_query_timeouts.reset(token)
+
+    async with timeout_session(db_connection) as session:
+        assert (await session.execute(text("SHOW statement_timeout"))).scalar() == "0"
+
+
+@pytest.mark.asyncio
+async def test_lock_timeout_returns_503(client: AsyncClient, committed_session: AsyncSession):
+    """Test that an update blocked on a row lock gives up after the route's lock timeout."""
+    product = await create_product(committed_session, ProductCreate(name="Locked Product", description="Locks", price=10, stock=5))
+    before = metrics.get("db_queries_cancelled_total", route="PATCH /api/v1/products/{product_id}", reason="lock_timeout")
+    try:
+        async with committed_session.bind.connect() as locker:
+            await locker.execute(text("SELECT id FROM product WHERE id = :id FOR UPDATE"), {"id": product["id"]})
+
+            started_at = time.monotonic()
+            response = await client.patch(f"/products/{product['id']}", json={"stock": 1})
+
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "1"
+            assert time.monotonic() - started_at < 3
+            await locker.rollback()
+        assert metrics.get("db_queries_cancelled_total", route="PATCH /api/v1/products/{product_id}", reason="lock_timeout") == before + 1
+    finally:
+        await committed_session.execute(delete(Product).where(Product.id == product["id"]))
+        await committed_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_running_query(committed_session: AsyncSession):
+    """Test that a disconnect before the response cancels the handler and its query on the server."""
+    engine = committed_session.bind
+
+    async def slow_app(scope, receive, send):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT pg_sleep(5) /* abandoned request */"))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(0.3)
+        return {"type": "http.disconnect"}
+
+    sent = []
+    async def send(message):
+        sent.append(message)
+
+    before = metrics.get("db_queries_cancelled_total", route="GET unmatched", reason="client_disconnect")
+    started_at = time.monotonic()
+    await QueryLimitsMiddleware(slow_app)({"type": "http", "method": "GET", "path": "/slow"}, receive, send)
+
+    assert time.monotonic() - started_at < 2
+    assert sent == []
+    assert metrics.get("db_queries_cancelled_total", route="GET unmatched", reason="client_disconnect") == before + 1
+    async with engine.connect() as conn:
+        running = await conn.execute(text("SELECT count(*) FROM pg_stat_activity WHERE state = 'active' AND query LIKE '%abandoned request%' AND pid <> pg_backend_pid()"))
+        assert running.scalar() == 0
@@ -0,0 +1,184 @@
+import asyncio
+import json
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel import text
+from config import settings
+from services.orders import CREATE_ORDER_STMT, SET_PRODUCT_STOCKS_STMT, build_reserve_products_stmt
+from services.products import ADJUST_PRODUCTS_STMT, PRODUCT_SORT_COLUMNS, build_facets_statement, build_next_cursor, build_products_statements
+from services.stock_alerts import build_low_stock_statements
+
+SEEDED_PRODUCTS = 50_000
+SEED_MARKER = "query-plan-fixture"
+# Rare enough for the GIN index; common words make a seq scan the right plan
+SEARCH_TERM = "zirconium"
+
+# Estimated total cost ceilings; a plan that needs more than this has regressed
+MAX_LISTING_COST = 2_000
+MAX_COUNT_COST = 3_000
+MAX_ORDER_COST = 500
+
+TABLES = {"product", "order", "orderitem"}
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain, "postgresql")
+def compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+def iter_plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+async def explain(session, statement, params=None) -> Dict[str, Any]:
+    result = await session.execute(Explain(statement), params or {})
+    plan = result.scalar()
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+def assert_plan(plan: Dict[str, Any], max_cost: float, allow_seq_scan: bool = False):
+    nodes = list(iter_plan_nodes(plan))
+    seq_scans = [n.get("Relation Name") for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in TABLES]
+    summary = json.dumps(plan, indent=1)
+
+    if not allow_seq_scan:
+        assert not seq_scans, f"Sequential scan on {seq_scans}:\n{summary}"
+    assert plan["Total Cost"] <= max_cost, f"Estimated cost {plan['Total Cost']} is over {max_cost}:\n{summary}"
+
+def listing_cases() -> List[Dict[str, Any]]:
+    sorts = [None] + [prefix + column for column in PRODUCT_SORT_COLUMNS for prefix in ("", "-")]
+    filters = [{}, {"in_stock": True}, {"min_price": Decimal("10"), "max_price": Decimal("20")}]
+    return [
+        {"query": query, "sort_by": sort_by, **listing_filter}
+        for query in ("", SEARCH_TERM) for sort_by in sorts for listing_filter in filters
+    ]
+
+def is_unfiltered(case: Dict[str, Any]) -> bool:
+    return not case["query"] and not any(key in case for key in ("in_stock", "min_price", "max_price"))
+
+def listing_case_id(case: Dict[str, Any]) -> str:
+    filters = ",".join(f"{key}={case[key]}" for key in ("in_stock", "min_price", "max_price") if key in case)
+    return f"query={case['query'] or '-'},sort={case['sort_by']}" + (f",{filters}" if filters else "")
+
+
+async def seed_products(engine):
+    async with engine.begin() as conn:
+        await conn.execute(text("""
+            INSERT INTO product (name, description, price, stock, created_at, updated_at)
+            SELECT
+                'Plan Product ' || md5(i::text),
+                CASE WHEN i % 2500 = 0 THEN 'Rare ' || CAST(:term AS text) ELSE 'Everyday item number ' || i END || ' ' || CAST(:marker AS text),
+                (i % 10000) / 100.0 + 1,
+                i % 100,
+                now() - make_interval(secs => i),
+                now()
+            FROM generate_series(1, :n) AS i
+        """), {"n": SEEDED_PRODUCTS, "marker": SEED_MARKER, "term": SEARCH_TERM})
+    await vacuum_products(engine)
+
+async def remove_seeded_products(engine):
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM product WHERE description LIKE '%' || CAST(:marker AS text)"), {"marker": SEED_MARKER})
+    await vacuum_products(engine)
+
+async def vacuum_products(engine):
+    # Refreshes statistics and the visibility map behind index-only scans
+    async with engine.connect() as conn:
+        autocommit = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await autocommit.execute(text("VACUUM ANALYZE product"))
+
+def run_with_engine(coroutine_function):
+    async def run():
+        engine = create_async_engine(settings.TEST_DB_URL)
+        try:
+            await coroutine_function(engine)
+        finally:
+            await engine.dispose()
+    # A private loop: asyncio.run would unset the loop pytest-asyncio runs tests on
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+@pytest.fixture(scope="module")
+def seeded_products():
+    """Commit a sizeable product table with fresh statistics, removed after the module."""
+    run_with_engine(seed_products)
+    yield
+    run_with_engine(remove_seeded_products)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("case", listing_cases(), ids=listing_case_id)
+async def test_product_listing_plans(db_session, seeded_products, case):
+    """Test that every search/filter/sort combination of get_products, and its keyset pages, is served by an index."""
+    stmt, total_count_stmt = build_products_statements(page=1, page_size=10, **case)
+
+    assert_plan(await explain(db_session, stmt), MAX_LISTING_COST)
+    # Counting every row may rightly read the heap instead of an index; only its cost is bounded
+    assert_plan(await explain(db_session, total_count_stmt), MAX_COUNT_COST, allow_seq_scan=is_unfiltered(case))
+
+    products = (await db_session.execute(stmt)).all()
+    cursor = build_next_cursor(products, page_size=10, sort_by=case["sort_by"])
+    if cursor:
+        next_page_stmt, _ = build_products_statements(page=1, page_size=10, cursor=cursor, **case)
+        assert_plan(await explain(db_session, next_page_stmt), MAX_LISTING_COST)
+
+
+@pytest.mark.asyncio
+async def test_product_facets_plan(db_session, seeded_products):
+    """Test that search facets come from the full-text index in one grouped query."""
+    stmt = build_facets_statement(query=SEARCH_TERM, min_price=Decimal("10"), in_stock=True)
+
+    assert_plan(await explain(db_session, stmt), MAX_COUNT_COST)
+
+
+@pytest.mark.asyncio
+async def test_low_stock_report_plans(db_session, seeded_products):
+    """Test that the replenishment report reads only the partial low-stock index."""
+    stmt, total_count_stmt = build_low_stock_statements(page=1, page_size=50)
+
+    assert_plan(await explain(db_session, stmt), MAX_LISTING_COST)
+    assert_plan(await explain(db_session, total_count_stmt), MAX_COUNT_COST)
+
+
+@pytest.mark.asyncio
+async def test_create_order_plans(db_session, seeded_products):
+    """Test that both order write paths touch products only through the primary key."""
+    product_ids = list((await db_session.execute(text("SELECT id FROM product ORDER BY id DESC LIMIT 3"))).scalars())
+
+    assert_plan(await explain(db_session, build_reserve_products_stmt(product_ids)), MAX_ORDER_COST)
+
+    assert_plan(
+        await explain(db_session, SET_PRODUCT_STOCKS_STMT, {"product_ids": product_ids, "stocks": [1] * len(product_ids)}),
+        MAX_ORDER_COST,
+    )
+
+    assert_plan(
+        await explain(db_session, CREATE_ORDER_STMT, {"product_ids": product_ids, "quantities": [1] * len(product_ids)}),
+        MAX_ORDER_COST,
+    )
+
+
+@pytest.mark.asyncio
+async def test_adjust_products_plan(db_session, seeded_products):
+    """Test that bulk adjustments reach products only through the primary key."""
+    product_ids = list((await db_session.execute(text("SELECT id FROM product ORDER BY id DESC LIMIT 3"))).scalars())
+
+    assert_plan(await explain(db_session, ADJUST_PRODUCTS_STMT, {
+        "ids": product_ids,
+        "prices": [None] * len(product_ids),
+        "stocks": [None] * len(product_ids),
+        "stock_deltas": [1] * len(product_ids),
+        "expected_updated_ats": [None] * len(product_ids),
+    }), MAX_ORDER_COST)
@@ -0,0 +1,93 @@
+import asyncio
+import gzip
+import json
+import time
+import pytest
+from tools.replay_orders import ACCEPTED, LatencyHistogram, classify_rejection, read_order_records, replay
+
+
+def write_records(path, lines):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def test_read_order_records_streams_and_flags_invalid_lines(tmp_path):
+    """Test that NDJSON records are parsed lazily and bad lines are yielded as invalid."""
+    path = str(tmp_path / "orders.ndjson.gz")
+    write_records(path, [
+        json.dumps({"recorded_at": "2025-01-01T10:00:00+00:00", "items": [{"product_id": 1, "quantity": 2}]}),
+        "not json",
+        "",
+        json.dumps({"items": [{"product_id": 0, "quantity": 1}]}),
+    ])
+
+    records = read_order_records(path)
+    first = next(records)
+    rest = list(records)
+
+    assert first.order.items[0].quantity == 2
+    assert first.recorded_at.hour == 10
+    assert [(r.line_number, r.order) for r in rest] == [(2, None), (4, None)]
+
+
+def test_classify_rejection():
+    """Test that service error messages map to rejection reasons."""
+    assert classify_rejection("Insufficient stock for Product ID 1. Requested: 2, Available: 1") == "insufficient_stock"
+    assert classify_rejection("Products not found for IDs: 7") == "missing_product"
+    assert classify_rejection("Order must contain at least one item") == "empty_order"
+    assert classify_rejection("boom") == "error"
+
+
+def test_latency_histogram_percentiles_within_bucket_error():
+    """Test that histogram percentiles stay within one bucket of the exact nearest-rank values."""
+    histogram = LatencyHistogram()
+    values = [i / 10_000 for i in range(1, 10_001)]
+    for value in values:
+        histogram.observe(value)
+
+    assert histogram.count == 10_000
+    for percentile in (50, 95, 99):
+        exact = values[percentile * 100 - 1]
+        assert exact <= histogram.percentile(percentile) <= exact * 1.05
+    assert LatencyHistogram().percentile(99) == 0
+
+
+@pytest.mark.asyncio
+async def test_replay_bounds_concurrency_and_counts_outcomes(tmp_path):
+    """Test that replay never exceeds the concurrency limit and tallies every outcome."""
+    path = str(tmp_path / "orders.ndjson.gz")
+    write_records(path, [json.dumps({"items": [{"product_id": i % 3 + 1, "quantity": 1}]}) for i in range(30)] + ["{}}"])
+
+    in_flight, peak = 0, 0
+
+    async def submit(order):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return ACCEPTED if order.items[0].product_id != 3 else "missing_product"
+
+    report = await replay(read_order_records(path), submit, concurrency=4)
+
+    assert peak == 4
+    assert report.submitted == 30
+    assert report.outcomes == {ACCEPTED: 20, "missing_product": 10, "invalid_record": 1}
+    assert report.latency.count == 30
+    assert "rejected missing_product: 10" in report.format()
+
+
+@pytest.mark.asyncio
+async def test_replay_paces_to_target_rate(tmp_path):
+    """Test that a target rate spreads submissions over time."""
+    path = str(tmp_path / "orders.ndjson.gz")
+    write_records(path, [json.dumps({"items": [{"product_id": 1, "quantity": 1}]}) for _ in range(6)])
+
+    async def submit(order):
+        return ACCEPTED
+
+    started_at = time.perf_counter()
+    report = await replay(read_order_records(path), submit, concurrency=10, rate=50)
+
+    assert report.outcomes[ACCEPTED] == 6
+    assert time.perf_counter() - started_at >= 5 / 50
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import func, select
+from httpx import AsyncClient
+from models.events import ChangeEvent
+from models.orders import OrderCreate, OrderItemCreate
+from models.products import ProductCreate
+from models.stock_alerts import StockAlert
+from services.orders import create_order, create_order_cte
+from services.products import create_product
+from services.stock_alerts import crossed_low_stock_threshold
+
+
+def test_crossed_low_stock_threshold():
+    """Test that only the change going from above the threshold to at or below it counts."""
+    assert crossed_low_stock_threshold(previous_stock=10, stock=5, threshold=5)
+    assert crossed_low_stock_threshold(previous_stock=6, stock=0, threshold=5)
+    assert not crossed_low_stock_threshold(previous_stock=10, stock=6, threshold=5)
+    assert not crossed_low_stock_threshold(previous_stock=5, stock=3, threshold=5)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("writer", [create_order, create_order_cte])
+async def test_order_crossing_threshold_records_one_alert(db_session: AsyncSession, writer):
+    """Test that both order write paths alert once, when stock first drops to the threshold."""
+    product = await create_product(db_session, ProductCreate(name="Alert Product", description="Alerts", price=10, stock=10, low_stock_threshold=5))
+    other = await create_product(db_session, ProductCreate(name="Plenty Product", description="Alerts", price=10, stock=100, low_stock_threshold=5))
+
+    await writer(db_session, OrderCreate(items=[OrderItemCreate(product_id=product["id"], quantity=4), OrderItemCreate(product_id=other["id"], quantity=1)]))
+    first_order = await writer(db_session, OrderCreate(items=[OrderItemCreate(product_id=product["id"], quantity=2)]))
+    await writer(db_session, OrderCreate(items=[OrderItemCreate(product_id=product["id"], quantity=1)]))
+
+    alerts = (await db_session.execute(select(StockAlert).where(StockAlert.product_id.in_([product["id"], other["id"]])))).scalars().all()
+    assert [(a.product_id, a.order_id, a.stock, a.low_stock_threshold) for a in alerts] == [(product["id"], first_order["id"], 4, 5)]
+
+    event = (await db_session.execute(select(ChangeEvent).where(ChangeEvent.entity_type == "stock_alert", ChangeEvent.entity_id == alerts[0].id))).scalars().one()
+    assert event.event_type == "stock_alert.created"
+    assert event.payload == {"product_id": product["id"], "order_id": first_order["id"], "stock": 4, "low_stock_threshold": 5}
+
+
+@pytest.mark.asyncio
+async def test_low_stock_report_and_alerts_endpoints(client: AsyncClient, db_session: AsyncSession):
+    """Test the replenishment report ordering and paging through alerts by id."""
+    after_id = (await db_session.execute(select(func.coalesce(func.max(StockAlert.id), 0)))).scalar()
+    products = [
+        await create_product(db_session, ProductCreate(name=name, description="Report", price=5, stock=stock, low_stock_threshold=3))
+        for name, stock in [("Low Stock B", 8), ("Low Stock A", 6)]
+    ]
+    product_ids = [p["id"] for p in products]
+    for product_id in product_ids:
+        response = await client.post("/orders/", json={"items": [{"product_id": product_id, "quantity": 5}]})
+        assert response.status_code == 201
+
+    response = await client.get("/products/low-stock", params={"page_size": 500})
+    assert response.status_code == 200
+    report = [p for p in response.json()["data"] if p["id"] in product_ids]
+    assert [(p["name"], p["stock"], p["low_stock_threshold"]) for p in report] == [("Low Stock A", 1, 3), ("Low Stock B", 3, 3)]
+
+    response = await client.get("/products/stock-alerts", params={"after_id": after_id})
+    assert response.status_code == 200
+    alerts = response.json()
+    assert [a["product_id"] for a in alerts] == product_ids
+
+    response = await client.get("/products/stock-alerts", params={"after_id": after_id, "product_id": product_ids[1]})
+    assert [a["id"] for a in response.json()] == [alerts[1]["id"]]
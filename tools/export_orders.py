@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Deque, Dict, NamedTuple, Optional
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from config import settings
+from services.exports import EXPORT_FORMATS, encode_chunk, iter_order_chunks, require_pyarrow
+from utils.helpers import as_utc
+from utils.logger import logger
+
+CHUNK_SIZE = 50_000
+MANIFEST_NAME = "manifest.json"
+
+class PendingChunk(NamedTuple):
+    future: asyncio.Future
+    file_name: str
+    rows: int
+    last_order_id: int
+
+def new_manifest(start: datetime, end: datetime, export_format: str) -> Dict:
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "format": export_format,
+        "last_order_id": 0,
+        "rows": 0,
+        "files": [],
+        "complete": False,
+    }
+
+def load_manifest(out_dir: str, start: datetime, end: datetime, export_format: str) -> Dict:
+    """The manifest of an earlier run of the same export, or a new one."""
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = new_manifest(start, end, export_format)
+    if not os.path.exists(path):
+        return manifest
+
+    with open(path, encoding="utf-8") as f:
+        previous = json.load(f)
+    if any(previous[key] != manifest[key] for key in ("start", "end", "format")):
+        raise ValueError(f"{path} belongs to a different export ({previous['start']} - {previous['end']}, {previous['format']})")
+    return previous
+
+def save_manifest(out_dir: str, manifest: Dict):
+    # Replaced atomically, so an interrupted run never leaves a torn manifest
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def write_chunk(path: str, rows, export_format: str, compression: str):
+    data = encode_chunk(rows, export_format, compression=compression)
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+async def export_orders(
+    conn: AsyncConnection,
+    out_dir: str,
+    start: datetime,
+    end: datetime,
+    export_format: str = "parquet",
+    chunk_size: int = CHUNK_SIZE,
+    workers: int = 4,
+    compression: str = "zstd",
+) -> Dict:
+    """Export the items of orders created in [start, end) to one compressed file per chunk in `out_dir`.
+
+    Chunks are encoded and written on `workers` threads while the next ones are
+    read; at most `workers` chunks are held in memory. The manifest records a
+    chunk once it and every chunk before it are on disk, so a rerun with the
+    same arguments resumes after the last recorded order.
+    """
+    require_pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir, start, end, export_format)
+    if manifest["complete"]:
+        logger.info("Export in %s is already complete.", out_dir)
+        return manifest
+
+    loop = asyncio.get_running_loop()
+    pending: Deque[PendingChunk] = deque()
+    started_at = time.perf_counter()
+    resumed_rows = manifest["rows"]
+
+    async def record_oldest():
+        chunk = pending.popleft()
+        await chunk.future
+        manifest["files"].append(chunk.file_name)
+        manifest["rows"] += chunk.rows
+        manifest["last_order_id"] = chunk.last_order_id
+        save_manifest(out_dir, manifest)
+        logger.info("Wrote %s (%d rows, through order %d)", chunk.file_name, chunk.rows, chunk.last_order_id)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export") as executor:
+        try:
+            chunks = iter_order_chunks(conn, start, end, after_id=manifest["last_order_id"], chunk_size=chunk_size)
+            async for rows in chunks:
+                # File names follow the chunk's position, so a resumed run overwrites unrecorded files
+                file_name = f"orders-{len(manifest['files']) + len(pending):06d}.{export_format}"
+                future = loop.run_in_executor(executor, write_chunk, os.path.join(out_dir, file_name), rows, export_format, compression)
+                pending.append(PendingChunk(future, file_name, len(rows), rows[-1].order_id))
+                while pending and (len(pending) >= workers or pending[0].future.done()):
+                    await record_oldest()
+            while pending:
+                await record_oldest()
+        except Exception as e:
+            logger.error("Exception in export_orders ==> %s", e)
+            if pending:
+                await asyncio.wait({chunk.future for chunk in pending})
+            raise
+
+    manifest["complete"] = True
+    save_manifest(out_dir, manifest)
+    elapsed = time.perf_counter() - started_at
+    exported = manifest["rows"] - resumed_rows
+    logger.info(
+        "Exported %d order items in %.1fs (%.0f rows/s) to %s",
+        exported, elapsed, exported / elapsed if elapsed else 0, out_dir,
+    )
+    return manifest
+
+def parse_timestamp(value: str) -> datetime:
+    return as_utc(datetime.fromisoformat(value))
+
+async def run(args):
+    # Reads from the replica when one is configured, keeping the scan off the primary
+    engine = create_async_engine(args.db_url or settings.DB_REPLICA_URL or settings.DB_URL, pool_size=1, max_overflow=0)
+    try:
+        async with engine.connect() as conn:
+            await export_orders(
+                conn, args.out_dir, args.start, args.end,
+                export_format=args.format, chunk_size=args.chunk_size,
+                workers=args.workers, compression=args.compression,
+            )
+    finally:
+        await engine.dispose()
+
+def parse_args(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Export orders and their items for a date range to Parquet or Arrow IPC files")
+    parser.add_argument("out_dir", help="Directory for the chunk files and manifest.json; rerun with the same arguments to resume")
+    parser.add_argument("--start", type=parse_timestamp, required=True, help="First order creation time (ISO 8601, UTC if no offset)")
+    parser.add_argument("--end", type=parse_timestamp, required=True, help="Exclusive end of the creation time range")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="parquet")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Order items per file")
+    parser.add_argument("--workers", type=int, default=4, help="Threads encoding chunks")
+    parser.add_argument("--compression", default="zstd", help="zstd or lz4; Parquet also takes snappy and gzip")
+    parser.add_argument("--db-url", default=None, help="Defaults to DB_REPLICA_URL, then DB_URL")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
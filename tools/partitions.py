@@ -0,0 +1,110 @@
+import argparse
+import gzip
+import os
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import text
+from config import settings
+from db.partitions import add_months, ensure_partitions, month_floor, partition_month, partitions_older_than
+from db.sql import engine
+from utils.logger import logger
+
+# Foreign keys on a detached orderitem partition still point at the "order"
+# parent, which would block detaching the matching order partition.
+ORDER_FOREIGN_KEYS_STMT = text("""
+SELECT conname FROM pg_constraint
+WHERE contype = 'f' AND conrelid = CAST(:table AS regclass) AND confrelid = CAST('"order"' AS regclass)
+""")
+
+async def detach_month(conn: AsyncConnection, order_partition: str, item_partition: str):
+    await conn.execute(text(f'ALTER TABLE orderitem DETACH PARTITION "{item_partition}"'))
+    foreign_keys = await conn.execute(ORDER_FOREIGN_KEYS_STMT, {"table": f'"{item_partition}"'})
+    for name in foreign_keys.scalars().all():
+        await conn.execute(text(f'ALTER TABLE "{item_partition}" DROP CONSTRAINT "{name}"'))
+    await conn.execute(text(f'ALTER TABLE "order" DETACH PARTITION "{order_partition}"'))
+
+async def export_table(conn: AsyncConnection, table: str, output_dir: str) -> str:
+    """COPY a table into a gzip-compressed CSV file with a header row."""
+    path = os.path.join(output_dir, f"{table}.csv.gz")
+    raw_connection = (await conn.get_raw_connection()).driver_connection
+    with gzip.open(path, "wb") as output:
+        async def write_chunk(chunk: bytes):
+            output.write(chunk)
+
+        await raw_connection.copy_from_table(table, output=write_chunk, format="csv", header=True)
+    return path
+
+async def archive_partitions(older_than_months: int, output_dir: str, keep_detached: bool = False):
+    """Detach, export and drop every monthly partition that ended more than `older_than_months` months ago."""
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        cutoff = add_months(month_floor(datetime.now(timezone.utc).date()), -older_than_months)
+
+        async with engine.connect() as conn:
+            order_partitions = await partitions_older_than(conn, "order", cutoff)
+            await conn.rollback()
+
+            if not order_partitions:
+                logger.info("No partitions older than %s to archive.", cutoff)
+                return []
+
+            archived = []
+            for order_partition in order_partitions:
+                item_partition = f"orderitem_p{partition_month(order_partition):%Y_%m}"
+
+                async with conn.begin():
+                    await detach_month(conn, order_partition, item_partition)
+                logger.info("Detached %s and %s", order_partition, item_partition)
+
+                async with conn.begin():
+                    for table in (order_partition, item_partition):
+                        path = await export_table(conn, table, output_dir)
+                        logger.info("Exported %s to %s", table, path)
+
+                if not keep_detached:
+                    async with conn.begin():
+                        await conn.execute(text(f'DROP TABLE "{item_partition}", "{order_partition}"'))
+                    logger.info("Dropped %s and %s", order_partition, item_partition)
+
+                archived.append(order_partition)
+
+            return archived
+    except Exception as e:
+        logger.error("Exception in archive_partitions ==> %s", e)
+        raise
+    finally:
+        await engine.dispose()
+
+async def create_partitions(months_ahead: int):
+    try:
+        async with engine.begin() as conn:
+            created = await ensure_partitions(conn, months_ahead)
+        logger.info("Created %d partitions: %s", len(created), ", ".join(created) or "none")
+        return created
+    except Exception as e:
+        logger.error("Exception in create_partitions ==> %s", e)
+        raise
+    finally:
+        await engine.dispose()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Manage the monthly order/orderitem partitions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ensure = subparsers.add_parser("ensure", help="Create partitions for this month and the coming months")
+    ensure.add_argument("--months-ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD, help="Months to create past the current one")
+
+    archive = subparsers.add_parser("archive", help="Detach old partitions and export them to gzip CSV files")
+    archive.add_argument("--older-than-months", type=int, required=True, help="Archive partitions that ended this many months ago")
+    archive.add_argument("--output-dir", default="archive", help="Directory for the exported files")
+    archive.add_argument("--keep-detached", action="store_true", help="Keep the detached tables instead of dropping them")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    import asyncio
+
+    args = parse_args()
+    if args.command == "ensure":
+        asyncio.run(create_partitions(args.months_ahead))
+    else:
+        asyncio.run(archive_partitions(args.older_than_months, args.output_dir, keep_detached=args.keep_detached))
@@ -0,0 +1,96 @@
+import argparse
+import time
+from sqlmodel import func, select, text
+from db.sql import async_session, engine
+from models.orders import Order
+from models.products import Product  # noqa: F401 - resolves the Order/OrderItem relationships
+from utils.logger import logger
+
+BATCH_SIZE = 50_000
+
+# Each batch recomputes totals for a whole id range in one aggregate query
+# instead of loading orders into Python.
+COMPUTED_TOTALS_CTE = """
+WITH computed AS (
+    SELECT oi.order_id, oi.order_created_at, sum(oi.quantity * oi.unit_price) AS total_price
+    FROM orderitem AS oi
+    WHERE oi.order_id BETWEEN :start_id AND :end_id
+    GROUP BY oi.order_id, oi.order_created_at
+)
+"""
+
+VERIFY_BATCH_STMT = text(COMPUTED_TOTALS_CTE + """
+SELECT
+    count(*) AS checked,
+    count(*) FILTER (WHERE o.total_price <> computed.total_price) AS mismatched,
+    coalesce(sum(abs(o.total_price - computed.total_price)), 0) AS drift
+FROM "order" AS o
+JOIN computed ON computed.order_id = o.id AND computed.order_created_at = o.created_at
+""")
+
+FIX_BATCH_STMT = text(COMPUTED_TOTALS_CTE + """
+UPDATE "order" AS o
+SET total_price = computed.total_price, updated_at = now()
+FROM computed
+WHERE computed.order_id = o.id AND computed.order_created_at = o.created_at AND o.total_price <> computed.total_price
+""")
+
+async def reconcile_orders(batch_size=BATCH_SIZE, fix=False, start_id=None, end_id=None):
+    try:
+        async with async_session() as session:
+            bounds = (await session.execute(select(func.min(Order.id), func.max(Order.id)))).one()
+            first_id = start_id if start_id is not None else bounds[0]
+            last_id = end_id if end_id is not None else bounds[1]
+            if first_id is None or last_id is None:
+                logger.info("No orders to reconcile.")
+                return
+
+            totals = {"checked": 0, "mismatched": 0, "fixed": 0, "drift": 0}
+            started_at = time.perf_counter()
+
+            for batch_start in range(first_id, last_id + 1, batch_size):
+                params = {"start_id": batch_start, "end_id": min(batch_start + batch_size - 1, last_id)}
+
+                result = (await session.execute(VERIFY_BATCH_STMT, params)).one()
+                totals["checked"] += result.checked
+                totals["mismatched"] += result.mismatched
+                totals["drift"] += result.drift
+
+                if fix and result.mismatched:
+                    fixed = await session.execute(FIX_BATCH_STMT, params)
+                    await session.commit()
+                    totals["fixed"] += fixed.rowcount
+                else:
+                    await session.rollback()
+
+                logger.info(
+                    "Orders %d-%d: checked %d, mismatched %d",
+                    params["start_id"], params["end_id"], result.checked, result.mismatched,
+                )
+
+            elapsed = time.perf_counter() - started_at
+            logger.info(
+                "Reconciled %d orders in %.1fs (%.0f orders/s): %d mismatched, total drift %s, %d fixed",
+                totals["checked"], elapsed, totals["checked"] / elapsed if elapsed else 0,
+                totals["mismatched"], totals["drift"], totals["fixed"],
+            )
+            return totals
+    except Exception as e:
+        logger.error("Exception in reconcile_orders ==> %s", e)
+        raise
+    finally:
+        await engine.dispose()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Verify (and optionally fix) order totals against their items")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Order id range checked per query")
+    parser.add_argument("--start-id", type=int, default=None, help="First order id to check")
+    parser.add_argument("--end-id", type=int, default=None, help="Last order id to check")
+    parser.add_argument("--fix", action="store_true", help="Rewrite mismatched totals")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    import asyncio
+
+    args = parse_args()
+    asyncio.run(reconcile_orders(batch_size=args.batch_size, fix=args.fix, start_id=args.start_id, end_id=args.end_id))
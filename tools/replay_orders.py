@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import math
+import time
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from typing import Awaitable, Callable, Iterator, NamedTuple, Optional
+from pydantic import ValidationError
+from models.orders import OrderCreate
+
+ACCEPTED = "accepted"
+
+class OrderRecord(NamedTuple):
+    line_number: int
+    recorded_at: Optional[datetime]
+    order: Optional[OrderCreate]
+
+# Submitters place one order and return ACCEPTED or a rejection reason
+Submitter = Callable[[OrderCreate], Awaitable[str]]
+
+def read_order_records(path: str) -> Iterator[OrderRecord]:
+    """Lazily parse an NDJSON file (plain, .gz or "-" for stdin) one line at a time.
+
+    Each line is an OrderCreate body, optionally with a top-level "recorded_at"
+    ISO timestamp used for time-compressed replay. Unparseable lines are
+    yielded with order=None so they are counted instead of aborting the run.
+    """
+    if path == "-":
+        lines = sys.stdin
+    elif path.endswith(".gz"):
+        lines = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        lines = open(path, encoding="utf-8")
+
+    try:
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                recorded_at = data.pop("recorded_at", None)
+                yield OrderRecord(
+                    line_number,
+                    datetime.fromisoformat(recorded_at) if recorded_at else None,
+                    OrderCreate.model_validate(data),
+                )
+            except (ValueError, TypeError, AttributeError, ValidationError):
+                yield OrderRecord(line_number, None, None)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+def classify_rejection(message: str) -> str:
+    if message.startswith("Insufficient stock"):
+        return "insufficient_stock"
+    if message.startswith("Products not found"):
+        return "missing_product"
+    if message.startswith("Order must contain"):
+        return "empty_order"
+    return "error"
+
+def service_submitter(writer: str = "orm") -> Submitter:
+    """Place orders in-process through the service layer, one session per order."""
+    from db.sql import async_session
+    from models.products import Product  # noqa: F401 - resolves the Order/OrderItem relationships
+    from services.orders import create_order, create_order_cte
+    from utils.exceptions import ValidationException
+
+    create = {"orm": create_order, "cte": create_order_cte}[writer]
+
+    async def submit(order: OrderCreate) -> str:
+        async with async_session() as session:
+            try:
+                await create(session, order_data=order)
+                return ACCEPTED
+            except ValidationException as e:
+                return classify_rejection(e.message)
+            except Exception:
+                return "error"
+
+    return submit
+
+def http_submitter(client, url: str) -> Submitter:
+    """Place orders through the public API with a shared httpx.AsyncClient."""
+    async def submit(order: OrderCreate) -> str:
+        try:
+            response = await client.post(url, content=order.model_dump_json(), headers={"Content-Type": "application/json"})
+        except Exception:
+            return "connection_error"
+        if response.status_code == 201:
+            return ACCEPTED
+        if response.status_code == 400:
+            return classify_rejection(response.json().get("error", ""))
+        if response.status_code == 429:
+            return "rate_limited"
+        if response.status_code == 503:
+            return "overloaded"
+        return f"http_{response.status_code}"
+
+    return submit
+
+class LatencyHistogram:
+    """Fixed log-scale buckets from 10 µs to 60 s, so memory stays constant however many orders replay.
+
+    Bounds grow by 5%, so a percentile is the upper bound of its bucket and
+    overstates the exact value by at most 5%.
+    """
+    __slots__ = ("bounds", "counts", "count")
+
+    def __init__(self, lowest: float = 1e-5, highest: float = 60.0, growth: float = 1.05):
+        steps = math.ceil(math.log(highest / lowest, growth))
+        self.bounds = [lowest * growth ** i for i in range(steps + 1)]
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+
+    def percentile(self, percentile: float) -> float:
+        """Nearest-rank percentile, reported as its bucket's upper bound (the highest bound past 60 s)."""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(percentile / 100 * self.count))
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.bounds[-1]
+
+class ReplayReport(NamedTuple):
+    submitted: int
+    outcomes: Counter
+    elapsed: float
+    latency: LatencyHistogram
+
+    @property
+    def accepted_per_second(self) -> float:
+        return self.outcomes[ACCEPTED] / self.elapsed if self.elapsed else 0
+
+    def format(self) -> str:
+        lines = [
+            f"Submitted {self.submitted} orders in {self.elapsed:.1f}s: "
+            f"{self.outcomes[ACCEPTED]} accepted ({self.accepted_per_second:.1f} orders/s)",
+            f"Latency p50 {self.latency.percentile(50) * 1000:.2f} ms | "
+            f"p95 {self.latency.percentile(95) * 1000:.2f} ms | "
+            f"p99 {self.latency.percentile(99) * 1000:.2f} ms",
+        ]
+        for reason, count in self.outcomes.most_common():
+            if reason != ACCEPTED:
+                lines.append(f"  rejected {reason}: {count}")
+        return "\n".join(lines)
+
+async def replay(
+    records: Iterator[OrderRecord],
+    submit: Submitter,
+    concurrency: int = 10,
+    rate: Optional[float] = None,
+    speed: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> ReplayReport:
+    """Submit orders with at most `concurrency` in flight.
+
+    `rate` paces submissions at a fixed number of orders per second; `speed`
+    replays the recorded_at gaps compressed by that factor. Records are pulled
+    from the iterator only when a slot frees up, so memory stays bounded.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes: Counter = Counter()
+    latency = LatencyHistogram()
+    in_flight = set()
+    submitted = 0
+    first_recorded_at = None
+
+    async def place(order: OrderCreate):
+        try:
+            started_at = time.perf_counter()
+            outcome = await submit(order)
+            latency.observe(time.perf_counter() - started_at)
+            outcomes[outcome] += 1
+        finally:
+            semaphore.release()
+
+    started_at = time.perf_counter()
+    for record in records:
+        if limit is not None and submitted >= limit:
+            break
+        if record.order is None:
+            outcomes["invalid_record"] += 1
+            continue
+
+        due_at = None
+        if rate:
+            due_at = started_at + submitted / rate
+        elif speed and record.recorded_at is not None:
+            first_recorded_at = first_recorded_at or record.recorded_at
+            due_at = started_at + (record.recorded_at - first_recorded_at).total_seconds() / speed
+        if due_at is not None and due_at > time.perf_counter():
+            await asyncio.sleep(due_at - time.perf_counter())
+
+        await semaphore.acquire()
+        task = asyncio.ensure_future(place(record.order))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        submitted += 1
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+    return ReplayReport(submitted, outcomes, time.perf_counter() - started_at, latency)
+
+async def run(args):
+    records = read_order_records(args.path)
+    options = dict(concurrency=args.concurrency, rate=args.rate, speed=args.speed, limit=args.limit)
+
+    if args.target == "http":
+        import httpx
+
+        async with httpx.AsyncClient(timeout=args.timeout, headers={"X-API-Key": args.api_key} if args.api_key else None) as client:
+            report = await replay(records, http_submitter(client, args.url), **options)
+    else:
+        from db.sql import engine
+
+        try:
+            report = await replay(records, service_submitter(args.writer), **options)
+        finally:
+            await engine.dispose()
+
+    print(report.format())
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay recorded orders (NDJSON OrderCreate records) at a controlled rate")
+    parser.add_argument("path", help="NDJSON file, optionally gzipped; '-' reads stdin")
+    parser.add_argument("--target", choices=["service", "http"], default="service", help="Call the service layer in-process or the HTTP API")
+    parser.add_argument("--writer", choices=["orm", "cte"], default="orm", help="Order write path for --target service")
+    parser.add_argument("--url", default="http://localhost:8000/api/v1/orders/", help="Order endpoint for --target http")
+    parser.add_argument("--api-key", default=None, help="X-API-Key header for --target http")
+    parser.add_argument("--timeout", type=float, default=10.0, help="HTTP request timeout in seconds")
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="Orders in flight at once")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--rate", type=float, default=None, help="Target orders per second")
+    pacing.add_argument("--speed", type=float, default=None, help="Replay recorded_at gaps this many times faster")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many orders")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
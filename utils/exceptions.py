@@ -1,9 +1,11 @@
+from typing import Dict, Optional
 from fastapi import status
 
 class BaseAppException(Exception):
-    def __init__(self, message: str, status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR):
+    def __init__(self, message: str, status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR, headers: Optional[Dict[str, str]] = None):
         self.message = message
         self.status_code = status_code
+        self.headers = headers
         super().__init__(self.message)
 
 class ResourceNotFoundException(BaseAppException):
@@ -12,4 +14,29 @@ class ResourceNotFoundException(BaseAppException):
 
 class ValidationException(BaseAppException):
     def __init__(self, message: str, status_code: int = status.HTTP_400_BAD_REQUEST):
-        super().__init__(message, status_code=status_code)
\ No newline at end of file
+        super().__init__(message, status_code=status_code)
+
+class ForbiddenException(BaseAppException):
+    def __init__(self, message: str):
+        super().__init__(message, status_code=status.HTTP_403_FORBIDDEN)
+
+class ConflictException(BaseAppException):
+    def __init__(self, message: str):
+        super().__init__(message, status_code=status.HTTP_409_CONFLICT)
+
+class QueryTimeoutException(BaseAppException):
+    """A statement hit its statement_timeout (504) or lock_timeout (503, retry shortly)."""
+
+    def __init__(self, reason: str):
+        if reason == "lock_timeout":
+            super().__init__(
+                "The requested items are busy. Please retry shortly.",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+        else:
+            super().__init__(
+                "The request took too long to complete. Please try again later.",
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            )
+        self.reason = reason
@@ -1,7 +1,19 @@
+import math
 from datetime import datetime, timezone
 
 def get_total_pages(total_count, page_size):
     return (total_count // page_size) + (1 if total_count % page_size else 0)
 
 def get_current_timestamp():
-    return datetime.now(timezone.utc) 
\ No newline at end of file
+    return datetime.now(timezone.utc) 
+
+def as_utc(timestamp: datetime) -> datetime:
+    """Timestamps without an offset are taken to be UTC."""
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+def get_percentile(sorted_values, percentile):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
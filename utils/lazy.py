@@ -0,0 +1,17 @@
+import importlib
+import importlib.util
+from functools import lru_cache
+from types import ModuleType
+from typing import Optional
+
+@lru_cache(maxsize=None)
+def is_available(module_name: str) -> bool:
+    """Check whether an optional dependency is installed without importing it."""
+    return importlib.util.find_spec(module_name) is not None
+
+@lru_cache(maxsize=None)
+def optional_import(module_name: str) -> Optional[ModuleType]:
+    """Import an optional dependency on first use; returns None when it is not installed."""
+    if not is_available(module_name):
+        return None
+    return importlib.import_module(module_name)
@@ -1,21 +1,151 @@
+import atexit
+import json
 import logging
-import os
+import queue
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+from config import settings
+from utils.metrics import metrics
 
-APP_ENV = os.getenv("APP_ENV", "development").lower()
+# From Settings, so values in .env apply as well as process environment variables
+APP_ENV = settings.APP_ENV.lower()
 IS_PROD = APP_ENV == "production"
+LOG_FORMAT = settings.LOG_FORMAT or ("json" if IS_PROD else "text")
+LOG_QUEUE_SIZE = settings.LOG_QUEUE_SIZE
+LOG_RATE_LIMIT_PER_SEC = settings.LOG_RATE_LIMIT_PER_SEC
+LOG_RATE_LIMIT_BURST = settings.LOG_RATE_LIMIT_BURST
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+metrics.describe("log_records_dropped_total", "Log records dropped because the log queue was full.")
+metrics.describe("log_records_suppressed_total", "Warning and error records suppressed by the rate limiter.")
+
+class RequestIdFilter(logging.Filter):
+    """Stamp the current request ID on the record; runs on the calling thread where the context is visible."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per (logger, level, message template) for warnings and errors.
+
+    Records over the limit are dropped and counted; the next record that gets
+    through carries the number suppressed since the previous one.
+    """
+
+    max_keys = 1000
+
+    def __init__(self, rate: float, burst: int):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.rate <= 0:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.clear()
+                # [tokens, last refill, suppressed since last emitted record]
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                metrics.inc("log_records_suppressed_total", logger=record.name)
+                return False
+
+            bucket[0] -= 1
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+            return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hand records to the listener thread without formatting them on the event loop."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so skip the default eager
+        # formatting; message interpolation and tracebacks are rendered by the
+        # listener thread.
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped_total")
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{message} (suppressed {suppressed} similar)" if suppressed else message
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
 
 logger = logging.getLogger("app")
 logger.setLevel(logging.INFO if IS_PROD else logging.DEBUG)
+logger.propagate = False
 
-log_format = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s ==> %(message)s")
+if LOG_FORMAT == "json":
+    log_format = JsonFormatter()
+else:
+    log_format = TextFormatter("%(asctime)s - %(levelname)s - %(name)s [%(request_id)s] ==> %(message)s")
 
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(log_format)
-logger.addHandler(console_handler)
+handlers = [console_handler]
 
 if IS_PROD:
     file_handler = logging.FileHandler("app.log", mode="a")
     file_handler.setFormatter(log_format)
-    logger.addHandler(file_handler)
+    handlers.append(file_handler)
+
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+queue_handler = NonBlockingQueueHandler(log_queue)
+queue_handler.addFilter(RequestIdFilter())
+queue_handler.addFilter(RateLimitFilter(rate=LOG_RATE_LIMIT_PER_SEC, burst=LOG_RATE_LIMIT_BURST))
+logger.addHandler(queue_handler)
+
+log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+log_listener.start()
+_listener_running = True
+
+def stop_logging():
+    """Flush queued records and stop the writer thread; later calls do nothing."""
+    global _listener_running
+    if not _listener_running:
+        return
+    _listener_running = False
+    try:
+        log_listener.stop()
+    except queue.Full:
+        pass
 
-logger.info(f"Logging initialized in {APP_ENV} mode")
+atexit.register(stop_logging)